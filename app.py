@@ -1,19 +1,44 @@
-from flask import Flask, render_template, request, jsonify
-import os
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context, url_for
+import time
 import json
-from planner.itinerary import generate_itinerary
-from planner.flight_api import search_flights
-from planner.hotel_api import get_hotels_by_city
-from planner.location_api import get_iata_code
-from google import genai
-from config.settings import GEMINI_API_KEY, DEFAULT_MODEL
+import re
+from planner.itinerary import generate_itinerary, stream_itinerary, iter_sections
+from planner.location_api import (
+    IataResolver, airports_within, get_city_airports, get_iata_code, locate, nearest_airports, use_dataset,
+)
+from planner.iata_store import load_dataset, watch_dataset
+from planner.orchestrator import gather_trip_data
+from planner.cache import cache_stats, make_key
+from planner.fx import convert_flight_prices
+from planner.flexible_search import flexible_search
+from planner.jobs import JobQueue, QueueFull, webhook_allowed
+from planner.llm_cache import canonical_interests
+from planner.plan_store import load_plan, new_plan_id, save_plan
+from planner import metrics
+from planner import famous_cities as famous
+from planner.autocomplete import CityIndex, load_city_index, suggest_cities, use_city_index
+from config.settings import (
+    AUTOCOMPLETE_LIMIT, FAMOUS_CITIES_MODE, FLEX_MAX_AIRPORTS, GEO_MAX_RADIUS_KM, SERVER_TIMING,
+)
 
 # ... your imports ...
 
 app = Flask(__name__)
 
-# Simple in-memory FX rate cache to reduce Gemini calls
-_FX_CACHE = {}
+@app.before_request
+def _start_timing():
+    g.request_start = time.perf_counter()
+    if SERVER_TIMING:
+        metrics.start_request()
+
+@app.after_request
+def _finish_timing(response):
+    metrics.observe(f"http.{request.endpoint or 'unknown'}", time.perf_counter() - g.request_start)
+    if SERVER_TIMING:
+        header = metrics.finish_request()
+        if header:
+            response.headers["Server-Timing"] = header
+    return response
 
 _SYMBOL_TO_CODE = {
     "₹": "INR",
@@ -23,122 +48,232 @@ _SYMBOL_TO_CODE = {
     "¥": "JPY",  # default to JPY for Yen symbol
 }
 
-def _get_fx_rate(from_code: str, to_code: str) -> float:
-    if not from_code or not to_code or from_code == to_code:
-        return 1.0
-    key = (from_code.upper(), to_code.upper())
-    if key in _FX_CACHE:
-        return _FX_CACHE[key]
-    client = genai.Client(api_key=GEMINI_API_KEY)
-    prompt = f"""
-Return ONLY the current foreign exchange rate as a decimal number from {from_code} to {to_code}.
-No words, no symbols, just the numeric rate, e.g. 82.45
-"""
-    response = client.models.generate_content(model=DEFAULT_MODEL, contents=prompt)
-    text = (response.text or "").strip()
-    # Extract first numeric token
-    import re
-    match = re.search(r"[-+]?[0-9]*\.?[0-9]+", text)
-    rate = 1.0
-    if match:
-        try:
-            rate = float(match.group(0))
-        except Exception:
-            rate = 1.0
-    if rate <= 0:
-        rate = 1.0
-    _FX_CACHE[key] = rate
-    return rate
+_PLAN_ID_RE = re.compile(r"^[0-9a-f]{32}$")
 
 # Load IATA cities per country at startup for canonical matching
 COUNTRY_TO_CITY_SET = {}
 COUNTRY_CITY_FREQ = {}
+# Ready-to-serve popularity ranking per country (most airports first)
+COUNTRY_TOP_CITIES = {}
+
+def _iata_tables(data):
+    # Cities per country and airports per (country, city), plus the popularity ranking
+    country_to_cities = {}
+    freq = {}
+    for country, city in zip(data.column('country'), data.column('city')):
+        country = country.strip()
+        city = city.strip()
+        if not country or not city:
+            continue
+        country_to_cities.setdefault(country, set()).add(city)
+        key = (country, city)
+        freq[key] = freq.get(key, 0) + 1
+    return country_to_cities, freq, famous.rank_top_cities(country_to_cities, freq)
 
 def load_iata_index():
-    global COUNTRY_TO_CITY_SET, COUNTRY_CITY_FREQ
+    global COUNTRY_TO_CITY_SET, COUNTRY_CITY_FREQ, COUNTRY_TOP_CITIES
     try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        iata_path = os.path.join(base_dir, 'planner', 'iata_codes_full.json')
-        with open(iata_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        country_to_cities = {}
-        freq = {}
-        for rec in data:
-            country = (rec.get('country') or '').strip()
-            city = (rec.get('city') or '').strip()
-            if not country or not city:
-                continue
-            country_to_cities.setdefault(country, set()).add(city)
-            key = (country, city)
-            freq[key] = freq.get(key, 0) + 1
-        COUNTRY_TO_CITY_SET = country_to_cities
-        COUNTRY_CITY_FREQ = freq
+        # Same mapped dataset the location lookups use; no second JSON parse
+        data = load_dataset()
+        COUNTRY_TO_CITY_SET, COUNTRY_CITY_FREQ, COUNTRY_TOP_CITIES = _iata_tables(data)
+        # Autocomplete ranks suggestions by the same airport counts
+        load_city_index(data, COUNTRY_CITY_FREQ)
     except Exception:
         COUNTRY_TO_CITY_SET = {}
         COUNTRY_CITY_FREQ = {}
+        COUNTRY_TOP_CITIES = {}
+
+def _swap_iata_dataset(data):
+    # Called on the reload thread with a newly published dataset. Everything derived from
+    # it is built first; the swap is then a few reference assignments, so requests keep
+    # being served from the old version until then and never wait for the rebuild
+    global COUNTRY_TO_CITY_SET, COUNTRY_CITY_FREQ, COUNTRY_TOP_CITIES
+    resolver = IataResolver(data).warm()
+    tables = _iata_tables(data)
+    city_index = CityIndex(data, tables[1])
+    use_dataset(data, resolver)
+    use_city_index(city_index)
+    COUNTRY_TO_CITY_SET, COUNTRY_CITY_FREQ, COUNTRY_TOP_CITIES = tables
+    print(f"IATA dataset switched to version {data.version} ({data.rows} airports)")
 
 load_iata_index()
 
+@app.before_request
+def _watch_iata_dataset():
+    # Pick up datasets published by planner/script_to_get_iata.py without a restart. Started
+    # from the first request rather than at import: under gunicorn --preload the import runs
+    # in the master, and forked workers do not inherit its threads
+    watch_dataset(_swap_iata_dataset)
+
+def _read_plan_form(form):
+    amount = form.get("budget")
+    currency = form.get("currency", "")
+    return {
+        "destination_input": form.get("destination"),
+        "days": int(form.get("days", 3)),
+        # Compose budget with currency symbol if provided
+        "budget": (f"{currency} {amount}".strip() if currency else (amount or "")),
+        "currency": currency,
+        "interests": form.get("interests"),
+        "origin_input": form.get("origin"),
+        "departure_date": form.get("departure_date"),
+    }
+
+def _convert_flight_prices(flights, currency):
+    # Convert flight prices to selected budget currency if provided
+    if not currency:
+        return
+    target_code = _SYMBOL_TO_CODE.get(currency, None)
+    if target_code:
+        convert_flight_prices(flights, target_code, currency)
+
+def _plan_trip(plan):
+    """Resolve, fetch and generate a full plan; used by the page and by background jobs."""
+    result = {"itinerary": "", "flights": [], "hotels": [], "error": None}
+
+    # Resolve IATA codes using your improved lookup
+    origin_iata = get_iata_code(plan["origin_input"])
+    destination_iata = get_iata_code(plan["destination_input"])
+
+    if not origin_iata or not destination_iata:
+        result["error"] = "Invalid origin or destination city. Please check your input."
+        return result
+
+    # Query flights and hotels APIs concurrently with resolved codes (keeps the 3 best offers)
+    flights, hotels = gather_trip_data(origin_iata, destination_iata, plan["departure_date"], adults=1, max_results=3)
+
+    # Pass all gathered info to AI prompt orchestration
+    result["itinerary"] = generate_itinerary(
+        plan["destination_input"], plan["days"], plan["budget"], plan["interests"],
+        origin_iata, destination_iata, flights, hotels
+    )
+
+    _convert_flight_prices(flights, plan["currency"])
+    # Plain dicts, so background job results stay JSON-serializable
+    result["flights"] = [flight.to_dict() for flight in flights]
+    result["hotels"] = hotels
+    return result
+
+def _save_plan_page(itinerary, flights, hotels):
+    # Render a finished plan's page once and keep it, precompressed, for /plan/<id>.
+    # Returns (stored plan or None if it could not be stored, rendered html)
+    plan_id = new_plan_id()
+    with metrics.timed("render"):
+        html = render_template(
+            "index.html",
+            itinerary=itinerary,
+            flights=flights,
+            hotels=hotels,
+            error=None,
+            form_values=request.form,
+            plan_url=url_for("plan_page", plan_id=plan_id),
+        )
+    try:
+        with metrics.timed("plan_store"):
+            return save_plan(plan_id, html), html
+    except Exception as e:
+        print(f"Could not store plan {plan_id}: {e}")
+        return None, html
+
+def _send_plan(stored, conditional=True):
+    # Stored bytes in the best encoding the client accepts; 304 when it already has them
+    encoding = stored.negotiate(request.accept_encodings)
+    headers = {
+        "ETag": f'"{stored.etag_for(encoding)}"',
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+        "Content-Location": url_for("plan_page", plan_id=stored.id),
+    }
+    if conditional and any(request.if_none_match.contains_weak(etag) for etag in stored.etags()):
+        return Response(status=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(stored.body(encoding), mimetype="text/html", headers=headers)
+
 @app.route("/", methods=["GET", "POST"])
 def home():
-    itinerary = ""
-    flights = []
-    hotels = []
-    error = None
+    result = {"itinerary": "", "flights": [], "hotels": [], "error": None}
 
     if request.method == "POST":
-        destination_input = request.form.get("destination")
-        days = int(request.form.get("days", 3))
-        amount = request.form.get("budget")
-        currency = request.form.get("currency", "")
-        # Compose budget with currency symbol if provided
-        budget = (f"{currency} {amount}".strip() if currency else (amount or ""))
-        interests = request.form.get("interests")
-        origin_input = request.form.get("origin")
-        departure_date = request.form.get("departure_date")
-
-        # Resolve IATA codes using your improved lookup
-        origin_iata = get_iata_code(origin_input)
-        destination_iata = get_iata_code(destination_input)
+        plan = _read_plan_form(request.form)
+        result = _plan_trip(plan)
+        if not result["error"]:
+            stored, html = _save_plan_page(result["itinerary"], result["flights"], result["hotels"])
+            return _send_plan(stored, conditional=False) if stored else html
+
+    with metrics.timed("render"):
+        return render_template(
+            "index.html",
+            itinerary=result["itinerary"],
+            flights=result["flights"],
+            hotels=result["hotels"],
+            error=result["error"],
+            form_values=request.form
+        )
 
+@app.route("/plan/<plan_id>", methods=["GET"])
+def plan_page(plan_id):
+    """
+    Permalink to a generated plan: the stored page, precompressed, with an
+    ETag for conditional requests. Never calls an upstream.
+    """
+    stored = load_plan(plan_id) if _PLAN_ID_RE.match(plan_id) else None
+    if stored is None:
+        html = render_template("index.html", itinerary="", flights=[], hotels=[], form_values={},
+                               error="This plan has expired or never existed. Plan the trip again below.")
+        return html, 404
+    return _send_plan(stored)
+
+def _sse(event, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@app.route("/plan/stream", methods=["POST"])
+def plan_stream():
+    """
+    Server-sent events version of the POST / flow.
+
+    Emits `results` (rendered flight/hotel cards) as soon as the upstream
+    lookups finish, then one `section` event per itinerary section as the
+    model writes it, then `done` with the plan's permalink. Failures are
+    reported as an `error` event.
+    """
+    plan = _read_plan_form(request.form)
+
+    def events():
+        # Open the stream right away so the client gets its first byte immediately
+        yield ": planning\n\n"
+
+        origin_iata = get_iata_code(plan["origin_input"])
+        destination_iata = get_iata_code(plan["destination_input"])
         if not origin_iata or not destination_iata:
-            error = "Invalid origin or destination city. Please check your input."
-        else:
-            # Query flights and hotels APIs with resolved codes (limit results for speed)
-            flights = search_flights(origin_iata, destination_iata, departure_date, adults=1, max_results=3) or []
-            hotels = get_hotels_by_city(destination_iata) or []
+            yield _sse("error", {"message": "Invalid origin or destination city. Please check your input."})
+            return
 
-            # Pass all gathered info to AI prompt orchestration
-            itinerary = generate_itinerary(
-                destination_input, days, budget, interests,
+        flights, hotels = gather_trip_data(origin_iata, destination_iata, plan["departure_date"], adults=1, max_results=3)
+        _convert_flight_prices(flights, plan["currency"])
+        yield _sse("results", {"html": render_template("_results.html", flights=flights, hotels=hotels)})
+
+        try:
+            chunks = stream_itinerary(
+                plan["destination_input"], plan["days"], plan["budget"], plan["interests"],
                 origin_iata, destination_iata, flights, hotels
             )
-
-            # Convert flight prices to selected budget currency if provided
-            if currency:
-                target_code = _SYMBOL_TO_CODE.get(currency, None)
-                if target_code:
-                    for f in flights:
-                        try:
-                            orig_currency = (f.get('price', {}).get('currency') or '').upper()
-                            amount_str = f.get('price', {}).get('grandTotal')
-                            amount = float(str(amount_str).replace(',', '')) if amount_str is not None else None
-                            if amount is not None and orig_currency:
-                                rate = _get_fx_rate(orig_currency, target_code)
-                                converted = amount * rate
-                                f['converted_price'] = f"{converted:.2f}"
-                                f['converted_currency'] = currency
-                        except Exception:
-                            # If conversion fails, skip gracefully
-                            continue
-
-    return render_template(
-        "index.html",
-        itinerary=itinerary,
-        flights=flights,
-        hotels=hotels,
-        error=error,
-        form_values=request.form
+            sections = []
+            for name, html in iter_sections(chunks):
+                sections.append(html)
+                yield _sse("section", {"name": name, "html": html})
+        except Exception as e:
+            yield _sse("error", {"message": f"Itinerary generation failed: {e}"})
+            return
+        # Same page a full POST would have produced, so the plan gets its permalink too
+        stored, _ = _save_plan_page("".join(sections), flights, hotels)
+        yield _sse("done", {"url": url_for("plan_page", plan_id=stored.id)} if stored else {})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 @app.route("/api/famous-cities", methods=["GET"])
@@ -147,85 +282,182 @@ def famous_cities():
     if not country:
         return jsonify({"error": "Missing 'country' parameter"}), 400
 
+    valid = COUNTRY_TO_CITY_SET.get(country, set())
+    top = COUNTRY_TOP_CITIES.get(country, [])
+
+    if FAMOUS_CITIES_MODE == "table":
+        # Fast path: never wait on the LLM. Serve its cached list when we have one,
+        # otherwise the popularity table, and refresh the LLM list off the request path.
+        curated = famous.cached_curated(country)
+        if curated is None and valid:
+            famous.schedule_refresh(country, valid)
+        cities = curated or top
+        if not cities:
+            return jsonify({"error": "No cities found"}), 502
+        return jsonify({"country": country, "cities": cities, "source": "llm" if curated else "table"})
+
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        prompt = f"""
-You are a travel data assistant. List the most famous cities in the country: {country}.
-Return ONLY a JSON array of city names, no explanations. Limit to 8-12 items, diverse across regions.
-Examples: ["Paris", "Lyon", "Nice"]
-"""
-        response = client.models.generate_content(
-            model=DEFAULT_MODEL,
-            contents=prompt
-        )
-        text = (response.text or "").strip()
-
-        # Normalize common code-fence formats from LLM output
-        if text.startswith("```"):
-            # Strip the first fence line and any trailing fence
-            lines = text.splitlines()
-            # drop first line like ```json
-            if lines:
-                lines = lines[1:]
-            # remove trailing ``` if present
-            if lines and lines[-1].strip().startswith("```"):
-                lines = lines[:-1]
-            text = "\n".join(lines).strip()
-
-        # Best-effort: ensure we return a JSON array
-        import json
-        cities = []
-        try:
-            # Try to parse direct JSON or extract array by brackets
-            if not (text.startswith("[") and text.endswith("]")):
-                # Find first '[' and last ']'
-                start = text.find("[")
-                end = text.rfind("]")
-                if start != -1 and end != -1 and end > start:
-                    text_candidate = text[start:end+1]
-                else:
-                    text_candidate = text
-            else:
-                text_candidate = text
-
-            cities = json.loads(text_candidate)
-            if not isinstance(cities, list):
-                cities = []
-        except Exception:
-            # Fallback: try to extract lines
-            for line in text.splitlines():
-                line = line.strip("- •* \t\n\r ")
-                if line and not line.startswith("[") and not line.startswith("`") and line.lower() != "json":
-                    cities.append(line)
-
-        # Clean and dedupe
-        cleaned = []
-        seen = set()
-        for c in cities:
-            name = str(c).strip()
-            if name and name not in seen:
-                seen.add(name)
-                cleaned.append(name)
-
-        # Filter by IATA dataset for exact city names in the selected country
-        valid = COUNTRY_TO_CITY_SET.get(country, set())
-        filtered = [name for name in cleaned if name in valid]
+        filtered = famous.ask_llm(country, valid)
+        source = "llm"
 
         # Fallback: if nothing matched, pick popular cities from dataset
-        if not filtered and valid:
-            items = []
-            for city in valid:
-                items.append((city, COUNTRY_CITY_FREQ.get((country, city), 0)))
-            items.sort(key=lambda x: (-x[1], x[0]))
-            filtered = [city for city, _ in items[:12]]
+        if not filtered:
+            filtered = top
+            source = "table"
 
         if not filtered:
             return jsonify({"error": "No cities found"}), 502
 
-        return jsonify({"country": country, "cities": filtered[:12]})
+        return jsonify({"country": country, "cities": filtered[:12], "source": source})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/autocomplete", methods=["GET"])
+def autocomplete():
+    """
+    City suggestions while typing: ?q=<partial city, accents and typos allowed>&limit=N.
+    Each suggestion has the city, country, its IATA codes and how it matched.
+    """
+    query = request.args.get("q", "")
+    try:
+        limit = max(1, min(int(request.args.get("limit", AUTOCOMPLETE_LIMIT)), 20))
+    except ValueError:
+        return jsonify({"error": "Invalid 'limit' parameter"}), 400
+    response = jsonify({"query": query, "suggestions": suggest_cities(query, limit)})
+    # Same answer for everyone until the dataset changes; let the browser reuse it per keystroke
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return response
+
+@app.route("/api/flexible-dates", methods=["GET"])
+def flexible_dates():
+    """
+    Price calendar: the cheapest flights for each day of a window.
+
+    Query: origin, destination (city names or IATA codes), start (YYYY-MM-DD),
+    days (default 7), nearby=1 to include other airports of the same cities,
+    adults, currency (code or symbol) and per_day (offers listed per day).
+    """
+    args = request.args
+    origin = args.get("origin", "").strip()
+    destination = args.get("destination", "").strip()
+    if not origin or not destination:
+        return jsonify({"error": "Missing 'origin' or 'destination' parameter"}), 400
+
+    origin_iata = get_iata_code(origin)
+    destination_iata = get_iata_code(destination)
+    if not origin_iata or not destination_iata:
+        return jsonify({"error": "Invalid origin or destination city. Please check your input."}), 400
+
+    origins, destinations = [origin_iata], [destination_iata]
+    if args.get("nearby", "").lower() in ("1", "true", "yes"):
+        origins = get_city_airports(origin_iata)[:FLEX_MAX_AIRPORTS]
+        destinations = get_city_airports(destination_iata)[:FLEX_MAX_AIRPORTS]
+
+    currency = args.get("currency", "").strip()
+    currency = _SYMBOL_TO_CODE.get(currency, currency.upper()) or None
+    try:
+        result = flexible_search(
+            origins, destinations, args.get("start", ""),
+            days=int(args.get("days", 7)),
+            adults=int(args.get("adults", 1)),
+            per_day=max(1, int(args.get("per_day", 3))),
+            currency=currency,
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid 'start', 'days', 'adults' or 'per_day' parameter"}), 400
+    return jsonify(result)
+
+@app.route("/api/nearby-airports", methods=["GET"])
+def nearby_airports():
+    """
+    Airports near a point, nearest first.
+
+    Query: near (city, town, IATA code or "lat,lon") or lat and lon, then
+    radius_km for every airport within that distance (up to GEO_MAX_RADIUS_KM),
+    otherwise the `limit` nearest (default 5).
+    """
+    args = request.args
+    try:
+        if args.get("near", "").strip():
+            point = locate(args["near"])
+            if point is None:
+                return jsonify({"error": "Unknown place. Please check your input."}), 400
+        else:
+            point = float(args["lat"]), float(args["lon"])
+            if not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+                raise ValueError
+        limit = max(1, min(int(args.get("limit", 5)), 50))
+        radius = float(args["radius_km"]) if args.get("radius_km") else None
+    except (KeyError, ValueError):
+        return jsonify({"error": "Provide 'near' or valid 'lat' and 'lon'; 'radius_km' and 'limit' must be numbers"}), 400
+
+    if radius is not None:
+        airports = airports_within(*point, min(max(radius, 0.0), GEO_MAX_RADIUS_KM), limit=limit)
+    else:
+        airports = nearest_airports(*point, k=limit)
+    return jsonify({"lat": round(point[0], 4), "lon": round(point[1], 4), "airports": airports})
+
+@app.route("/metrics", methods=["GET"])
+def metrics_view():
+    """Prometheus text exposition of stage latencies, upstream errors/timeouts and cache counters."""
+    caches = cache_stats()
+    gauges = {
+        "planner_cache_hits_total": {name: c["hits"] for name, c in caches.items()},
+        "planner_cache_misses_total": {name: c["misses"] for name, c in caches.items()},
+        "planner_cache_hit_ratio": {name: c["hit_ratio"] for name, c in caches.items()},
+        "planner_cache_bytes_saved_total": {name: c["bytes_saved"] for name, c in caches.items()},
+        "planner_cache_evictions_total": {name: c["backend_evictions"] for name, c in caches.items()},
+    }
+    body = metrics.render_prometheus(gauges)
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/cache-stats", methods=["GET"])
+def cache_stats_view():
+    return jsonify(cache_stats())
+
+_JOBS = JobQueue()
+
+@app.route("/api/jobs", methods=["POST"])
+def create_job():
+    """
+    Queue a planning request (form or JSON fields as for POST /) and return its id.
+
+    Identical requests already queued or running share one job. Answers 429
+    when the queue is full. An optional `callback_url` (on an allowed host)
+    receives the finished job as a JSON POST, including when the request
+    joined an existing job.
+    """
+    data = request.get_json(silent=True) or request.form
+    try:
+        plan = _read_plan_form(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid 'days' parameter"}), 400
+
+    webhook = data.get("callback_url")
+    if webhook and not webhook_allowed(webhook):
+        return jsonify({"error": "callback_url host is not allowed"}), 400
+
+    key = make_key(
+        plan["origin_input"], plan["destination_input"], plan["departure_date"], plan["days"],
+        plan["budget"], canonical_interests(plan["interests"]),
+    )
+    try:
+        job, created = _JOBS.submit(key, _plan_trip, plan, webhook=webhook)
+    except QueueFull:
+        return jsonify({"error": "Too many pending plans, please retry shortly"}), 429, {"Retry-After": "5"}
+
+    status_url = url_for("job_status", job_id=job.id)
+    body = {"job_id": job.id, "status": job.status, "deduplicated": not created, "status_url": status_url}
+    return jsonify(body), 202, {"Location": status_url}
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Poll a job; clients should wait a second or two between polls, or pass a callback_url instead."""
+    snapshot = _JOBS.get(job_id)
+    if snapshot is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(snapshot)
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=8080)
 
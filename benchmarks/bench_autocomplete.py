@@ -0,0 +1,92 @@
+"""
+City autocomplete over misspelled queries: hit rate and per-keystroke latency.
+
+Uses the hand-collected misspellings in fixtures/misspellings.json plus one
+random typo (insert, delete, substitute or swap) in each of the most popular
+cities. A query hits when the intended city is among the top suggestions.
+Latency is also measured for every prefix of each query, as a user typing it
+would send them; the old exact/prefix/substring lookup is shown for contrast.
+
+Run from the repository root:
+    python -m benchmarks.bench_autocomplete
+"""
+import json
+import math
+import os
+import random
+import string
+import time
+
+from planner.autocomplete import fold, get_city_index
+from planner.location_api import _RESOLVER
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "misspellings.json")
+TOP = 5
+GENERATED = 200
+
+
+def typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("insert", "delete", "substitute", "swap"))
+    if kind == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "substitute":
+        return word[:i] + rng.choice(string.ascii_lowercase.replace(word[i], "")) + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def corpus(index):
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        pairs = [(entry["query"], entry["expected"]) for entry in json.load(f)]
+    rng = random.Random(3)
+    popular = sorted(index._entries, key=lambda entry: (-entry[3], entry[0]))
+    names = [entry[0] for entry in popular if len(fold(entry[0])) >= 7 and fold(entry[0]).isalpha()][:GENERATED]
+    return pairs + [(typo(fold(name), rng), name) for name in names]
+
+
+def exact_lookup(query):
+    # get_iata_code's tiers before the fuzzy one: exact city, city prefix, airport name substring
+    text = query.strip().lower()
+    return _RESOLVER.by_city(text) or _RESOLVER.by_city_prefix(text) or _RESOLVER.by_name_substring(text)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    index = get_city_index()
+    build = time.perf_counter() - start
+    queries = corpus(index)
+
+    hits = legacy_hits = 0
+    misses = []
+    final, keystrokes = [], []
+    for query, expected in queries:
+        start = time.perf_counter()
+        suggestions = index.suggest(query, TOP)
+        final.append(time.perf_counter() - start)
+        if expected in [s["city"] for s in suggestions]:
+            hits += 1
+        else:
+            misses.append(query)
+        code = exact_lookup(query)
+        legacy_hits += bool(code) and code in [c for s in index.suggest(expected, 1) for c in s["iata"]]
+        for n in range(2, len(query)):
+            start = time.perf_counter()
+            index.suggest(query[:n], TOP)
+            keystrokes.append(time.perf_counter() - start)
+
+    rate = hits / len(queries)
+    print(f"index: {len(index)} cities, built in {build * 1000:.0f} ms")
+    print(f"{len(queries)} misspelled queries, intended city in top {TOP}: {rate:.1%} "
+          f"(exact/prefix/substring lookup: {legacy_hits / len(queries):.1%})")
+    print(f"full query latency : p50 {percentile(final, 50) * 1000:.2f} ms, p95 {percentile(final, 95) * 1000:.2f} ms")
+    print(f"per keystroke      : p50 {percentile(keystrokes, 50) * 1000:.2f} ms, "
+          f"p95 {percentile(keystrokes, 95) * 1000:.2f} ms over {len(keystrokes)} prefixes")
+    if misses:
+        print("missed:", ", ".join(misses[:15]) + (" ..." if len(misses) > 15 else ""))
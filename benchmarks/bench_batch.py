@@ -0,0 +1,114 @@
+"""
+Batch planning vs. planning the same trips one by one with main.plan_trip(),
+sequentially and on a thread pool of the same size.
+
+Builds TRIPS requests from fixtures/trips.json (a few destinations, each on
+a few dates with several trip lengths) and plans them against the fake
+Amadeus and LLM clients with fixed latencies. Reports wall time, Amadeus
+calls made against the number of distinct lookups (a plain pool repeats a
+lookup whenever trips needing it run at the same time; batch makes each one
+once) and peak traced memory.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch
+"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+os.environ.setdefault("USE_FAKE_AMADEUS", "1")
+os.environ.setdefault("USE_FAKE_LLM", "1")
+os.environ.setdefault("FAKE_AMADEUS_LATENCY", "fixed:0.05")
+os.environ.setdefault("FAKE_LLM_LATENCY", "fixed:0.2")
+os.environ["LLM_CACHE_ENABLED"] = "0"
+os.environ["AMADEUS_RATE_LIMIT"] = "0"
+
+import main  # noqa: E402
+from planner import batch  # noqa: E402
+from planner.clients import get_amadeus_client  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+TRIPS = 60
+DATES = 2
+LENGTHS = 5
+CONCURRENCY = 8
+
+
+def build_trips(first_day):
+    with open(os.path.join(FIXTURES, "trips.json"), "r", encoding="utf-8") as f:
+        base = json.load(f)
+    trips = []
+    for i in range(TRIPS):
+        # Each destination on a few dates, each date with several trip lengths, listed
+        # together as a generated campaign file would: neighbours share their lookups
+        trip = dict(base[(i // (DATES * LENGTHS)) % len(base)])
+        trip["departure_date"] = (first_day + timedelta(days=(i // LENGTHS) % DATES)).isoformat()
+        trip["days"] = str(2 + i % LENGTHS)
+        trips.append(trip)
+    return trips
+
+
+def write_jsonl(trips, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for trip in trips:
+            f.write(json.dumps(trip, ensure_ascii=False) + "\n")
+
+
+def measure(fn):
+    client = get_amadeus_client()
+    calls = client.calls
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, wall, client.calls - calls, peak
+
+
+def plan_one(trip):
+    main.plan_trip(trip["destination"], int(trip["days"]), f"{trip['currency']} {trip['budget']}",
+                   trip["interests"], trip["origin"], trip["departure_date"], out=lambda *_: None)
+
+
+def one_by_one(trips):
+    for trip in trips:
+        plan_one(trip)
+
+
+def pooled(trips):
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(plan_one, trips))
+
+
+def distinct_lookups(trips):
+    flights = {(t["origin"], t["destination"], t["departure_date"]) for t in trips}
+    return len(flights) + len({t["destination"] for t in trips})
+
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix="bench_batch_")
+    quiet = lambda *_: None  # noqa: E731
+
+    # Different dates per run so flight lookups never hit another run's cache; hotel
+    # lists are per city, so only the first run fetches them
+    _, seq_wall, seq_calls, seq_peak = measure(lambda: one_by_one(build_trips(date(2027, 3, 1))))
+    _, pool_wall, pool_calls, pool_peak = measure(lambda: pooled(build_trips(date(2027, 4, 1))))
+
+    trips = build_trips(date(2027, 6, 1))
+    flight_lookups = distinct_lookups(trips) - len({t["destination"] for t in trips})
+    source, output = os.path.join(workdir, "trips.jsonl"), os.path.join(workdir, "results.jsonl")
+    write_jsonl(trips, source)
+    counts, batch_wall, batch_calls, batch_peak = measure(
+        lambda: batch.run_batch(source, output, concurrency=CONCURRENCY, out=quiet))
+
+    print(f"{TRIPS} trips, Amadeus {os.environ['FAKE_AMADEUS_LATENCY']}, LLM {os.environ['FAKE_LLM_LATENCY']}")
+    print(f"{distinct_lookups(trips)} distinct lookups per run ({flight_lookups} flight searches once hotels are cached)")
+    print(f"one by one : {seq_wall:6.2f} s, {seq_calls:3d} Amadeus calls, peak {seq_peak / 1024:7.0f} KiB")
+    print(f"plain pool : {pool_wall:6.2f} s, {pool_calls:3d} Amadeus calls, peak {pool_peak / 1024:7.0f} KiB")
+    print(f"batch      : {batch_wall:6.2f} s, {batch_calls:3d} Amadeus calls, peak {batch_peak / 1024:7.0f} KiB"
+          f"  ({counts['ok']} ok, {counts['failed']} failed)")
@@ -0,0 +1,95 @@
+"""
+Per-request overhead of fresh upstream clients vs. the shared client registry.
+
+Starts a local HTTP stub that speaks just enough of the Amadeus API (OAuth
+token + flight offers), then issues the same calls two ways:
+
+  fresh  : a new amadeus.Client per call (the old behaviour: new connection,
+           new OAuth token every time)
+  shared : planner.clients (one client, pooled keep-alive connections, one
+           early-refreshing token)
+
+Run from the repository root:
+    python -m benchmarks.bench_clients [calls]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The shared client must be a real one talking to the stub, not the offline fake
+os.environ["USE_FAKE_AMADEUS"] = "0"
+
+from amadeus import Client  # noqa: E402
+from planner.clients import create_amadeus_client  # noqa: E402
+
+STATS = {"connections": 0, "tokens": 0, "requests": 0}
+LOCK = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive capable
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with LOCK:
+            STATS["connections"] += 1
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amadeus+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with LOCK:
+            STATS["tokens"] += 1
+        # Simulate the auth server's work
+        time.sleep(0.002)
+        self._reply({"access_token": "stub-token", "expires_in": 1799})
+
+    def do_GET(self):
+        with LOCK:
+            STATS["requests"] += 1
+        self._reply({"data": [{"price": {"grandTotal": "100.00", "currency": "EUR"}}]})
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, get_client, calls):
+    for key in STATS:
+        STATS[key] = 0
+    start = time.perf_counter()
+    for _ in range(calls):
+        get_client().shopping.flight_offers_search.get(
+            originLocationCode="DEL", destinationLocationCode="NRT",
+            departureDate="2026-11-01", adults=1, max=3,
+        )
+    elapsed = time.perf_counter() - start
+    print(f"{label:7s}: {elapsed / calls * 1000:6.2f} ms/request, "
+          f"{STATS['connections']} connections, {STATS['tokens']} token fetches for {STATS['requests']} requests")
+    if STATS["requests"] != calls:
+        # The calls did not reach the stub, so the timing above measures nothing
+        sys.exit(f"{label}: the stub served {STATS['requests']} of {calls} requests")
+    return elapsed
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = {"host": "127.0.0.1", "port": server.server_address[1], "ssl": False,
+                "client_id": "bench", "client_secret": "bench"}
+
+    fresh = run("fresh", lambda: Client(**endpoint), calls)
+    shared_client = create_amadeus_client(**endpoint)
+    shared = run("shared", lambda: shared_client, calls)
+    print(f"shared registry is {fresh / shared:.1f}x faster per request")
+    server.shutdown()
@@ -0,0 +1,46 @@
+"""
+Fan-out timing with fake slow upstream clients.
+
+Shows the flight and hotel lookups overlapping (wall-clock time against the
+slowest call and the sum of both), and the time taken when one lookup hangs
+past its deadline. The behaviour itself is covered by tests/test_orchestrator.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_fanout
+"""
+import time
+
+from planner.orchestrator import gather_trip_data
+
+FLIGHT_DELAY = 0.30
+HOTEL_DELAY = 0.50
+
+
+def fake_flights(origin, destination, departure_date, adults=1, max_results=3, delay=FLIGHT_DELAY):
+    time.sleep(delay)
+    return [{"id": "1", "price": 100.0, "price_text": "100.00", "currency": "EUR", "duration_minutes": 120,
+             "stops": 0, "route": [origin, destination], "carriers": ["AI"]}]
+
+
+def fake_hotels(city_code, delay=HOTEL_DELAY):
+    time.sleep(delay)
+    return [{"name": f"Hotel {city_code}", "address": {"lines": ["Main St"]}}]
+
+
+def timed(**kwargs):
+    start = time.perf_counter()
+    flights, hotels = gather_trip_data("DEL", "NRT", "2026-11-01", **kwargs)
+    return time.perf_counter() - start, flights, hotels
+
+
+if __name__ == "__main__":
+    elapsed, flights, hotels = timed(flight_search=fake_flights, hotel_search=fake_hotels)
+    print(f"parallel : {elapsed:.3f}s (max={max(FLIGHT_DELAY, HOTEL_DELAY):.2f}s, "
+          f"sum={FLIGHT_DELAY + HOTEL_DELAY:.2f}s)")
+
+    def stuck_hotels(city_code):
+        return fake_hotels(city_code, delay=3.0)
+
+    elapsed, flights, hotels = timed(flight_search=fake_flights, hotel_search=stuck_hotels, deadline=0.6)
+    print(f"deadline : {elapsed:.3f}s with a stuck hotel lookup (deadline=0.60s) -> "
+          f"{len(flights)} flights, {len(hotels)} hotels")
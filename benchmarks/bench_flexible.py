@@ -0,0 +1,51 @@
+"""
+Flexible-date search vs. submitting one search per day.
+
+Runs offline against the recorded Amadeus fixtures (see benchmarks/fixtures/)
+with a fixed fake latency. Shows the bounded fan-out, the effect of the
+client-side rate limit, and the cache making an overlapping window cheap.
+
+Run from the repository root:
+    python -m benchmarks.bench_flexible
+"""
+import os
+import time
+
+os.environ["USE_FAKE_AMADEUS"] = "1"
+os.environ["FAKE_AMADEUS_LATENCY"] = "fixed:0.2"
+os.environ.setdefault("AMADEUS_RATE_LIMIT", "10")
+os.environ.setdefault("AMADEUS_RATE_BURST", "2")
+
+from planner.clients import get_amadeus_client  # noqa: E402
+from planner.flexible_search import date_window, flexible_search  # noqa: E402
+from planner.flight_api import search_flights  # noqa: E402
+
+DAYS = 7
+
+
+def one_by_one(start):
+    t = time.perf_counter()
+    for day in date_window(start, DAYS):
+        search_flights("DEL", "NRT", day, max_results=5)
+    return time.perf_counter() - t
+
+
+def flexible(start, origin, destinations):
+    t = time.perf_counter()
+    result = flexible_search([origin], destinations, start, days=DAYS)
+    return time.perf_counter() - t, result
+
+
+if __name__ == "__main__":
+    client = get_amadeus_client()
+    sequential = one_by_one("2026-11-01")
+    print(f"sequential   : {sequential:.2f}s for {DAYS} searches")
+
+    calls = client.calls
+    cold, result = flexible("2026-12-01", "DEL", ["NRT", "HND"])
+    print(f"flexible cold: {cold:.2f}s for {client.calls - calls} searches "
+          f"(2 airports x {DAYS} days), cheapest {result['cheapest_date']}")
+
+    calls = client.calls
+    warm, result = flexible("2026-12-04", "DEL", ["NRT", "HND"])
+    print(f"flexible warm: {warm:.2f}s for {client.calls - calls} new searches (window shifted by 3 days)")
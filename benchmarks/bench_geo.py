@@ -0,0 +1,54 @@
+"""
+Nearest-airport and radius queries: k-d tree in the IATA artifact vs. a
+brute-force haversine scan over every airport.
+
+Reports queries per second for nearest-5 and 150 km radius lookups around
+random points (tests/test_location_api.py checks both give the same airports).
+
+Run from the repository root:
+    python -m benchmarks.bench_geo
+"""
+import random
+import time
+
+from planner.geo import AirportIndex, haversine_km
+from planner.iata_store import load_dataset
+
+QUERIES = 2000
+K = 5
+RADIUS_KM = 150.0
+
+
+def brute_force(points, lat, lon):
+    return sorted((haversine_km(lat, lon, p_lat, p_lon), row) for row, p_lat, p_lon in points)
+
+
+def rate(fn, queries):
+    start = time.perf_counter()
+    for lat, lon in queries:
+        fn(lat, lon)
+    return len(queries) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    dataset = load_dataset()
+    points = [(row, *dataset.coordinates(row)) for row in range(len(dataset.column("iata")))
+              if dataset.coordinates(row) is not None]
+    index = AirportIndex(dataset)
+    rng = random.Random(11)
+    # Half around airports (dense regions), half anywhere on the globe
+    queries = []
+    for i in range(QUERIES):
+        if i % 2:
+            _, lat, lon = rng.choice(points)
+            queries.append((lat + rng.uniform(-1, 1), lon + rng.uniform(-1, 1)))
+        else:
+            queries.append((rng.uniform(-90, 90), rng.uniform(-180, 180)))
+
+    scan = rate(lambda lat, lon: brute_force(points, lat, lon)[:K], queries[:100])
+    nearest = rate(lambda lat, lon: index.nearest(lat, lon, k=K), queries)
+    within = rate(lambda lat, lon: index.within(lat, lon, RADIUS_KM), queries)
+    print(f"{len(points)} airports with coordinates")
+    print(f"brute-force nearest-{K} : {scan:9.0f} queries/s")
+    print(f"k-d tree nearest-{K}    : {nearest:9.0f} queries/s")
+    print(f"k-d tree {RADIUS_KM:.0f} km radius : {within:9.0f} queries/s")
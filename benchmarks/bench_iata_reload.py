@@ -0,0 +1,136 @@
+"""
+IATA dataset refresh: incremental diff and publish, then a hot swap in a
+running process vs. restarting it.
+
+Writes a local airports.dat snapshot from the current dataset with one
+airport added, one renamed and one removed, and times refreshing copies of
+the dataset files from it. Then, while THREADS threads keep resolving cities
+and autocompleting, the app swaps the published version in; request latency
+during the swap is compared with steady state and with the time a worker
+takes to start. tests/test_iata_refresh.py covers the diff and the swap.
+
+Run from the repository root:
+    python -m benchmarks.bench_iata_reload
+"""
+import csv
+import io
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["IATA_RELOAD_INTERVAL"] = "0"  # swaps are triggered by hand below
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from planner import iata_store, location_api  # noqa: E402
+from planner.autocomplete import suggest_cities  # noqa: E402
+from planner.script_to_get_iata import refresh  # noqa: E402
+
+THREADS = 4
+WINDOW = 1.0
+NEW_AIRPORT = {"city": "Benchville", "country": "Iceland", "iata": "QQB", "name": "Benchville Airport",
+               "lat": 64.5, "lon": -18.5}
+
+
+def write_snapshot(airports, path):
+    # OpenFlights airports.dat columns: id, name, city, country, IATA, ICAO, lat, lon, then unused ones
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for i, airport in enumerate(airports, 1):
+        lat = "\\N" if airport.get("lat") is None else airport["lat"]
+        lon = "\\N" if airport.get("lon") is None else airport["lon"]
+        writer.writerow([i, airport["name"], airport["city"], airport["country"], airport["iata"], "\\N",
+                         lat, lon, 0, 0, "U", "\\N", "airport", "OurAirports"])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+
+def hammer(queries, stop, latencies):
+    i = 0
+    while not stop.is_set():
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        location_api.get_iata_code(query)
+        suggest_cities(query[:4])
+        latencies.append((time.perf_counter(), time.perf_counter() - start))
+        i += 1
+
+
+def under_load(action, queries):
+    stop = threading.Event()
+    latencies = []
+    threads = [threading.Thread(target=hammer, args=(queries, stop, latencies)) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(WINDOW / 2)
+    start = time.perf_counter()
+    action()
+    end = time.perf_counter()
+    time.sleep(WINDOW / 2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    during = [latency for at, latency in latencies if start <= at <= end + 0.05] or [0.0]
+    steady = [latency for at, latency in latencies if at < start]
+    return end - start, steady, during
+
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix="bench_iata_")
+    json_path, places_path = os.path.join(workdir, "iata_codes_full.json"), os.path.join(workdir, "iata_places.json")
+    shutil.copy(iata_store.JSON_PATH, json_path)
+    shutil.copy(iata_store.PLACES_PATH, places_path)
+    versions_dir = os.path.join(workdir, "iata_versions")
+    paths = dict(json_path=json_path, places_path=places_path, versions_dir=versions_dir, bin_path=None)
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        airports = json.load(f)
+    renamed = dict(airports[1], name=airports[1]["name"] + " International")
+    snapshot = [renamed] + airports[2:] + [NEW_AIRPORT]
+    base_source, source = os.path.join(workdir, "base.dat"), os.path.join(workdir, "airports.dat")
+    write_snapshot(airports, base_source)
+    write_snapshot(snapshot, source)
+
+    # Baseline version of the unchanged files, then the snapshot on top of it
+    start = time.perf_counter()
+    base, _ = refresh(base_source, **paths)
+    base_wall = time.perf_counter() - start
+    start = time.perf_counter()
+    manifest, diff = refresh(source, **paths)
+    refresh_wall = time.perf_counter() - start
+    start = time.perf_counter()
+    refresh(source, **paths)
+    noop_wall = time.perf_counter() - start
+    counts = {kind: len(entries) for kind, entries in diff.items()}
+    print(f"first publish {base['version']} in {base_wall:.2f} s; refresh {manifest['version']} "
+          f"in {refresh_wall:.2f} s: {counts}; unchanged refresh in {noop_wall:.2f} s")
+
+    # Hot swap in this process while requests keep coming
+    queries = [airport["city"] for airport in airports[::50] if airport["city"]]
+    old_version = iata_store.load_dataset().version
+    manifest_path = os.path.join(versions_dir, "manifest.json")
+    swap_wall, steady, during = under_load(
+        lambda: iata_store.reload_dataset(app._swap_iata_dataset, manifest_path, json_path, places_path), queries)
+    print(f"hot swap {old_version} -> {iata_store.load_dataset().version} in {swap_wall * 1000:.0f} ms "
+          f"under {THREADS} threads of lookups")
+    print(f"  steady state : p50 {percentile(steady, 50) * 1000:6.2f} ms, p99 {percentile(steady, 99) * 1000:6.2f} ms")
+    print(f"  during swap  : p50 {percentile(during, 50) * 1000:6.2f} ms, p99 {percentile(during, 99) * 1000:6.2f} ms, "
+          f"max {max(during) * 1000:6.2f} ms over {len(during)} requests")
+
+    # What a dataset update costs without the swap: starting a fresh worker
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, check=True,
+                   env=dict(os.environ, IATA_RELOAD_INTERVAL="0"))
+    print(f"restart instead: a fresh worker takes {time.perf_counter() - start:.2f} s to import the app")
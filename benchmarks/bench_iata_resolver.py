@@ -0,0 +1,59 @@
+"""
+Microbenchmark: indexed IATA resolver vs. the original linear-scan lookup.
+
+tests/test_location_api.py checks that both give the same answers.
+
+Run from the repository root:
+    python -m benchmarks.bench_iata_resolver
+"""
+import json
+import timeit
+
+from planner.iata_store import JSON_PATH
+from planner.location_api import get_iata_code
+
+with open(JSON_PATH, "r", encoding="utf-8") as f:
+    IATA_DATA = json.load(f)
+
+
+def legacy_get_iata_code(city_or_code):
+    # The pre-index implementation, kept verbatim for comparison
+    city_or_code = city_or_code.strip()
+    if len(city_or_code) == 3 and city_or_code.isalpha():
+        return city_or_code.upper()
+    city_lower = city_or_code.lower()
+    for entry in IATA_DATA:
+        city = entry.get("city", "").lower()
+        if city == city_lower:
+            return entry.get("iata")
+    for entry in IATA_DATA:
+        city = entry.get("city", "").lower()
+        if city.startswith(city_lower):
+            return entry.get("iata")
+    for entry in IATA_DATA:
+        airport_name = entry.get("name", "").lower()
+        if city_lower in airport_name:
+            return entry.get("iata")
+    return None
+
+
+QUERIES = [
+    "Delhi", "tokyo", "New York", "paris", "Bangalore", "Mumbai", "san fr",
+    "los ang", "Heathrow", "international", "Charles de Gaulle", "zzzz-unknown",
+    "a", "ba", "  London  ", "DEL", "Rio", "Kagamuga", "", "São Paulo",
+]
+
+
+def bench(fn, number):
+    def run():
+        for q in QUERIES:
+            fn(q)
+    seconds = min(timeit.repeat(run, number=number, repeat=3))
+    return seconds / (number * len(QUERIES)) * 1e6
+
+
+if __name__ == "__main__":
+    legacy_us = bench(legacy_get_iata_code, 5)
+    indexed_us = bench(get_iata_code, 500)
+    print(f"legacy : {legacy_us:10.2f} us/lookup")
+    print(f"indexed: {indexed_us:10.2f} us/lookup  ({legacy_us / indexed_us:.0f}x faster)")
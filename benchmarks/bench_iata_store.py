@@ -0,0 +1,115 @@
+"""
+Startup cost and per-worker memory: JSON dataset vs. the mapped binary artifact.
+
+Each mode runs in a fresh interpreter that loads the IATA data the way both
+consumers (app.load_iata_index and planner.location_api) need it, then
+forks WORKERS children which each resolve every city once, like warmed-up
+gunicorn workers. Reported per worker: RSS, and PSS / private memory from
+/proc/self/smaps_rollup (Linux only), which show how many pages are
+actually shared with the parent.
+
+Run from the repository root:
+    python -m benchmarks.bench_iata_store
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS = 4
+
+
+def memory_kb():
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        import resource
+        fields["Rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fields["Private"] = fields.pop("Private_Clean", 0) + fields.pop("Private_Dirty", 0)
+    return fields
+
+
+def country_index(pairs):
+    # What app.load_iata_index builds from either source
+    country_to_cities, freq = {}, {}
+    for country, city in pairs:
+        if country and city:
+            country_to_cities.setdefault(country, set()).add(city)
+            freq[(country, city)] = freq.get((country, city), 0) + 1
+    return country_to_cities, freq
+
+
+def load_json():
+    # The previous startup: each consumer parsed the JSON itself and the
+    # resolver kept dict/list indexes in the worker's private heap
+    from planner.iata_store import JSON_PATH, ngrams
+    with open(JSON_PATH, "r", encoding="utf-8") as f:
+        app_copy = json.load(f)
+    countries = country_index((e["country"], e["city"]) for e in app_copy)
+    with open(JSON_PATH, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    by_city, name_index = {}, {}
+    names = [e["name"].lower() for e in records]
+    for idx, entry in enumerate(records):
+        by_city.setdefault(entry["city"].lower(), idx)
+    for idx, name in enumerate(names):
+        for gram in ngrams(name):
+            name_index.setdefault(gram, []).append(idx)
+
+    def work():
+        return sum(1 for e in records if e["city"].lower() in by_city)
+    return (app_copy, countries, records, by_city, name_index, names), work
+
+
+def load_artifact():
+    from planner.location_api import IATA_DATA, get_iata_code
+    countries = country_index(zip(IATA_DATA.column("country"), IATA_DATA.column("city")))
+
+    def work():
+        return sum(1 for city in IATA_DATA.column("city") if get_iata_code(city))
+    return (IATA_DATA, countries), work
+
+
+def child(mode):
+    base = memory_kb()["Rss"]
+    start = time.perf_counter()
+    data, work = (load_json if mode == "json" else load_artifact)()
+    load_ms = (time.perf_counter() - start) * 1000
+    loaded = memory_kb()["Rss"] - base
+    print(f"{mode:8s}: load {load_ms:7.1f} ms, +{loaded / 1024:6.1f} MiB RSS in the parent")
+
+    pids = []
+    for _ in range(WORKERS):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            work()
+            os.write(write_fd, json.dumps(memory_kb()).encode())
+            os._exit(0)
+        os.close(write_fd)
+        pids.append((pid, read_fd))
+    stats = []
+    for pid, read_fd in pids:
+        with os.fdopen(read_fd) as f:
+            stats.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    for key in ("Rss", "Pss", "Private"):
+        if all(key in s for s in stats):
+            avg = sum(s[key] for s in stats) / len(stats)
+            print(f"          worker avg {key:7s}: {avg / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        child(sys.argv[1])
+    else:
+        for mode in ("json", "artifact"):
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_iata_store", mode], cwd=ROOT, check=True)
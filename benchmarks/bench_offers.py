@@ -0,0 +1,90 @@
+"""
+Normalized FlightOffer objects and heap top-K vs. re-walking raw Amadeus dicts.
+
+Builds 250 offers (the Amadeus maximum per search) from the recorded
+fixtures, then compares picking the 3 cheapest by sorting the raw payloads
+against parsing once and ranking with top_offers(). Also reports the cached
+size and resident memory of both representations. Parsing costs more than a
+single raw sort, but it runs once per search, before the result is cached;
+the win is in what every later cache hit and consumer has to carry.
+
+Run from the repository root:
+    python -m benchmarks.bench_offers
+"""
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from planner.offers import parse_offers, top_offers
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "flight_offers.json")
+OFFERS = 250
+K = 3
+ROUNDS = 200
+
+
+def load_raw():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        recorded = json.load(f)
+    rng = random.Random(7)
+    raw = []
+    for i in range(OFFERS):
+        offer = json.loads(json.dumps(recorded[i % len(recorded)]))
+        offer["id"] = str(i + 1)
+        offer["price"]["grandTotal"] = f"{float(offer['price']['grandTotal']) * rng.uniform(0.7, 1.6):.2f}"
+        raw.append(offer)
+    return raw
+
+
+def raw_top(raw):
+    # What each consumer used to do: parse price strings and sort the whole list
+    ranked = sorted(raw, key=lambda f: float(f["price"]["grandTotal"]))[:K]
+    results = []
+    for f in ranked:
+        segments = f["itineraries"][0]["segments"]
+        route = " -> ".join(s["departure"]["iataCode"] for s in segments) + " -> " + segments[-1]["arrival"]["iataCode"]
+        results.append((route, f["price"]["grandTotal"]))
+    return results
+
+
+def normalized_top(raw):
+    return [(f.route_text(), f.price_text) for f in top_offers(parse_offers(raw), K, by="price")]
+
+
+def per_round(fn, raw):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(raw)
+    return (time.perf_counter() - start) / ROUNDS, result
+
+
+def retained(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    value = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, value
+
+
+if __name__ == "__main__":
+    raw = load_raw()
+    raw_time, _ = per_round(raw_top, raw)
+    norm_time, _ = per_round(normalized_top, raw)
+    offers = parse_offers(raw)
+    rank_time, _ = per_round(lambda _: top_offers(offers, K), raw)
+
+    raw_bytes = len(json.dumps(raw))
+    compact_bytes = len(json.dumps([f.to_dict() for f in offers]))
+    raw_mem, _ = retained(lambda: json.loads(json.dumps(raw)))
+    slot_mem, _ = retained(lambda: parse_offers(raw))
+
+    print(f"{OFFERS} offers, top {K}")
+    print(f"raw sort + reformat : {raw_time * 1000:7.3f} ms")
+    print(f"parse + heap top-K  : {norm_time * 1000:7.3f} ms (parse once per search)")
+    print(f"heap top-K (scored) : {rank_time * 1000:7.3f} ms on already parsed offers")
+    print(f"cached JSON         : raw {raw_bytes / 1024:7.1f} KiB, compact {compact_bytes / 1024:7.1f} KiB")
+    print(f"in memory           : raw {raw_mem / 1024:7.1f} KiB, FlightOffer {slot_mem / 1024:7.1f} KiB")
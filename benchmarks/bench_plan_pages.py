@@ -0,0 +1,105 @@
+"""
+Repeat views of a generated plan: the full-page POST vs. its /plan/<id>
+permalink, plain and conditional (If-None-Match).
+
+Runs offline like bench_stream.py: the fake LLM with a fixed delay and
+canned flights and hotels behind a counter. Reports bytes on the wire and
+latency per request and the upstream calls made while serving the
+permalink; tests/test_app.py covers the responses themselves.
+
+Run from the repository root:
+    python -m benchmarks.bench_plan_pages
+"""
+import gzip
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("AMADUES_CLIENT_ID", "offline")
+os.environ.setdefault("AMADUES_CLIENT_SECRET", "offline")
+os.environ["LLM_CACHE_ENABLED"] = "0"
+os.environ["PLAN_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_plans_"), "plans.sqlite3")
+
+import app as web  # noqa: E402
+import planner.itinerary as itinerary  # noqa: E402
+from planner.fakes import FakeLLMClient  # noqa: E402
+from planner.offers import FlightOffer  # noqa: E402
+
+LLM_DELAY = 0.3
+VIEWS = 50
+
+FLIGHTS = [FlightOffer(id=str(i), price=412.5 + i * 30, price_text=f"{412.5 + i * 30:.2f}", currency="EUR",
+                       duration_minutes=475 + i * 40, stops=i % 2, route=["DEL", "NRT"], carriers=["AI"])
+           for i in range(3)]
+HOTELS = [{"name": f"Shinjuku Stay {i}", "address": {"lines": [f"{i}-1 Shinjuku", "Tokyo"]}} for i in range(5)]
+
+FORM = {
+    "destination": "Tokyo", "days": "5", "budget": "80000", "currency": "",
+    "interests": "culture, food", "origin": "Delhi", "departure_date": "2026-11-01",
+}
+
+upstream_calls = 0
+
+
+def gather(*args, **kwargs):
+    global upstream_calls
+    upstream_calls += 1
+    return [FlightOffer.from_dict(f.to_dict()) for f in FLIGHTS], list(HOTELS)
+
+
+class CountingLLM(FakeLLMClient):
+    def __init__(self):
+        super().__init__(first_token_delay=LLM_DELAY)
+        generate, stream = self.models.generate_content, self.models.generate_content_stream
+
+        def counted(fn):
+            def call(*args, **kwargs):
+                global upstream_calls
+                upstream_calls += 1
+                return fn(*args, **kwargs)
+            return call
+
+        self.models.generate_content = counted(generate)
+        self.models.generate_content_stream = counted(stream)
+
+
+web.gather_trip_data = gather
+itinerary._client = CountingLLM
+
+
+def timed_request(fn, *args, **kwargs):
+    start = time.perf_counter()
+    response = fn(*args, **kwargs)
+    return response, time.perf_counter() - start
+
+
+def views(client, url, headers):
+    samples = []
+    for _ in range(VIEWS):
+        response, elapsed = timed_request(client.get, url, headers=headers)
+        samples.append(elapsed)
+    return response, statistics.median(samples)
+
+
+if __name__ == "__main__":
+    client = web.app.test_client()
+    gzip_only = {"Accept-Encoding": "gzip"}
+
+    post, post_time = timed_request(client.post, "/", data=FORM, headers=gzip_only)
+    url = post.headers["Content-Location"]
+    page = gzip.decompress(post.data)
+    calls = upstream_calls
+
+    plain, plain_time = views(client, url, {})
+    packed, packed_time = views(client, url, gzip_only)
+    etag = packed.headers["ETag"]
+    revalidated, revalidate_time = views(client, url, dict(gzip_only, **{"If-None-Match": etag}))
+    missing = client.get("/plan/00000000000000000000000000000000")
+
+    print(f"plan {url}: {len(page):,} byte page, stored gzip {len(post.data):,} bytes")
+    print(f"POST /            : {post_time * 1000:8.1f} ms, {len(post.data):7,} bytes ({post.headers.get('Content-Encoding')})")
+    print(f"GET  permalink    : {plain_time * 1000:8.2f} ms, {len(plain.data):7,} bytes (identity)")
+    print(f"GET  permalink gz : {packed_time * 1000:8.2f} ms, {len(packed.data):7,} bytes (gzip)")
+    print(f"GET  If-None-Match: {revalidate_time * 1000:8.2f} ms, {len(revalidated.data):7,} bytes ({revalidated.status_code})")
+    print(f"upstream calls during {VIEWS * 3} permalink views: {upstream_calls - calls}; unknown plan -> {missing.status_code}")
@@ -0,0 +1,100 @@
+"""
+Prompt size and generation latency: budgeted prompt builder vs. the previous
+f-string builder that listed every flight and the first five hotels.
+
+Offers and hotels come from the recorded fixtures, multiplied to the given
+result-set sizes. Generation runs against the fake LLM with a per-prompt-token
+delay, so the latency column models prompt processing only; real models also
+bill the extra input tokens.
+
+Run from the repository root:
+    python -m benchmarks.bench_prompts
+"""
+import json
+import os
+import time
+
+from planner.fakes import FakeLLMClient
+from planner.offers import parse_offers
+from planner.prompts import build_itinerary_prompt, estimate_tokens
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SIZES = [(3, 8), (20, 20), (50, 50)]  # (flights, hotels)
+FIRST_TOKEN_DELAY = 0.25
+PROMPT_TOKEN_DELAY = 0.0004  # seconds per prompt token
+ROUNDS = 200
+
+
+def legacy_prompt(destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels):
+    # The builder as it was before planner/prompts.py: every flight, five hotels, instructions last
+    flights_info = ""
+    if flights:
+        flights_info = "Flight Options Retrieved:\n"
+        for f in flights:
+            flights_info += f"- Route: {f.route_text()}, Price: {f.price_text} {f.currency}\n"
+    else:
+        flights_info = "No flight options found.\n"
+    hotels_info = ""
+    if hotels:
+        hotels_info = "Hotel Options Retrieved:\n"
+        for h in hotels[:5]:
+            name = h.get('name', 'N/A')
+            address = ", ".join(h.get('address', {}).get('lines', []))
+            hotels_info += f"- {name}, Address: {address}\n"
+    else:
+        hotels_info = "No hotel options found.\n"
+    return f"""
+You are a travel planner assistant.
+
+User Input:
+- Destination: {destination_input}
+- Origin IATA: {origin_iata}
+- Destination IATA: {destination_iata}
+- Departure Date: [Use the provided app date if available]
+- Days: {days}
+- Budget: {budget}
+- Interests: {interests}
+
+{flights_info}
+{hotels_info}
+
+TASK: Produce a beautifully structured HTML itinerary. Use semantic headings and sections.
+REQUIREMENTS:
+- Answer with the currency given in the budget.
+- Start with <section class="itinerary-header"> including an <h2> title and a short summary.
+- Add a <section class="trip-facts"> with a small definition list (<dl>) for key facts (days, budget, interests, best flight pick, suggested hotel area).
+- Add <section class="daily-plan"> with one <article class="day"> per day: include <h3> Day N and an unordered list of activities with brief descriptions and timing hints.
+- Add <section class="tips"> with 5-7 bullet tips (local transport, safety, money, connectivity, cultural etiquette).
+- Keep it concise, practical, and specific for the chosen destination.
+- Do NOT include <html>, <head>, or <body> tags. Only the inner content sections.
+"""
+
+
+def load(flight_count, hotel_count):
+    with open(os.path.join(FIXTURES, "flight_offers.json"), "r", encoding="utf-8") as f:
+        offers = parse_offers(json.load(f))
+    with open(os.path.join(FIXTURES, "hotels.json"), "r", encoding="utf-8") as f:
+        hotels = json.load(f)
+    return [offers[i % len(offers)] for i in range(flight_count)], [hotels[i % len(hotels)] for i in range(hotel_count)]
+
+
+def measure(builder, flights, hotels, client):
+    args = ("Tokyo", 5, "₹ 80,000", "culture, food", "DEL", "NRT", flights, hotels)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        prompt = builder(*args)
+    build = (time.perf_counter() - start) / ROUNDS
+    start = time.perf_counter()
+    client.models.generate_content(model="fake", contents=prompt)
+    return prompt, build, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    client = FakeLLMClient(first_token_delay=FIRST_TOKEN_DELAY, prompt_token_delay=PROMPT_TOKEN_DELAY)
+    print(f"{'flights/hotels':>14} {'builder':>8} {'chars':>7} {'~tokens':>8} {'build':>9} {'generate':>9}")
+    for flight_count, hotel_count in SIZES:
+        flights, hotels = load(flight_count, hotel_count)
+        for name, builder in (("legacy", legacy_prompt), ("budgeted", build_itinerary_prompt)):
+            prompt, build, generate = measure(builder, flights, hotels, client)
+            print(f"{flight_count:>6}/{hotel_count:<7} {name:>8} {len(prompt):>7} {estimate_tokens(prompt):>8}"
+                  f" {build * 1e6:>7.1f}us {generate * 1000:>7.1f}ms")
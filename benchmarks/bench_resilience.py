@@ -0,0 +1,112 @@
+"""
+Tail latency during an upstream incident: bare calls vs. the resilience layer
+(deadline, retries with jittered backoff, circuit breaker, stale responses).
+
+A simulated upstream answers in ~20 ms, then for the incident either hangs
+for HANG seconds per call or fails fast with a transient error. Requests are
+spread over a few keys that were fetched once before the incident, and run
+from CONCURRENCY threads. After the incident the breaker must let a probe
+through and go back to fresh answers (tests/test_resilience.py covers the
+breaker, retries and stale fallbacks on their own).
+
+Run from the repository root:
+    python -m benchmarks.bench_resilience
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from planner.resilience import CircuitBreaker, Upstream
+
+KEYS = [f"route-{i}" for i in range(8)]
+REQUESTS = 120
+CONCURRENCY = 8
+HEALTHY = 0.02
+HANG = 2.0
+DEADLINE = 0.3
+RESET = 0.5
+
+
+class TransientError(Exception):
+    pass
+
+
+class Service:
+    """Upstream stand-in whose behaviour can be switched mid-run."""
+
+    def __init__(self):
+        self.mode = "healthy"
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            self.calls += 1
+        if self.mode == "hang":
+            time.sleep(HANG)
+        elif self.mode == "error":
+            time.sleep(0.05)
+            raise TransientError("503 Service Unavailable")
+        else:
+            time.sleep(HEALTHY)
+        return {"key": key, "mode": self.mode, "at": time.time()}
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+
+def run(request, count=REQUESTS):
+    latencies, answered = [], []
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            result = request(KEYS[i % len(KEYS)])
+        except Exception:
+            result = None
+        latencies.append(time.perf_counter() - start)
+        answered.append(result is not None)
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(one, range(count)))
+    return latencies, sum(answered) / len(answered)
+
+
+def report(label, latencies, answered, calls):
+    print(f"  {label:<10} p50 {percentile(latencies, 50) * 1000:7.1f} ms   p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+          f"   answered {answered:6.1%}   upstream calls {calls}")
+
+
+if __name__ == "__main__":
+    for mode in ("hang", "error"):
+        service = Service()
+        upstream = Upstream(f"bench_{mode}", deadline=DEADLINE, retries=2, retryable=lambda e: isinstance(e, TransientError),
+                            breaker=CircuitBreaker(failures=3, reset_timeout=RESET))
+
+        def resilient(key):
+            return upstream.serve(key, upstream.call, service, key)
+
+        # Warm: one good answer per key to fall back on
+        run(resilient, len(KEYS))
+
+        print(f"incident: upstream {'hangs ' + str(HANG) + 's per call' if mode == 'hang' else 'fails every call'}")
+        service.mode = mode
+        calls = service.calls
+        bare_latencies, bare_answered = run(service, REQUESTS // 4 if mode == "hang" else REQUESTS)
+        report("bare", bare_latencies, bare_answered, service.calls - calls)
+
+        calls = service.calls
+        latencies, answered = run(resilient)
+        report("resilient", latencies, answered, service.calls - calls)
+        print(f"  breaker opened {upstream.breaker.opened} time(s), state now {upstream.breaker.state}")
+
+        # Recovery: after the reset timeout a probe goes through and fresh answers come back
+        service.mode = "healthy"
+        time.sleep(max(RESET, HANG if mode == "hang" else 0) + 0.1)
+        run(resilient, len(KEYS))
+        fresh = resilient(KEYS[0])
+        recovered = upstream.breaker.state == CircuitBreaker.CLOSED and fresh["mode"] == "healthy"
+        print(f"  recovery: breaker {upstream.breaker.state}, serving {'fresh' if recovered else 'stale'} responses")
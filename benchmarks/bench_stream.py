@@ -0,0 +1,70 @@
+"""
+Time-to-first-byte of the streaming plan endpoint vs. the full-page POST.
+
+Runs offline: the LLM is the fake streaming client from planner/fakes.py and
+the Amadeus lookups are replaced with canned results.
+
+Run from the repository root:
+    python -m benchmarks.bench_stream
+"""
+import os
+import time
+
+os.environ.setdefault("AMADUES_CLIENT_ID", "offline")
+os.environ.setdefault("AMADUES_CLIENT_SECRET", "offline")
+# Measure generation, not the itinerary cache
+os.environ["LLM_CACHE_ENABLED"] = "0"
+
+import app as web  # noqa: E402
+import planner.itinerary as itinerary  # noqa: E402
+from planner.fakes import FakeLLMClient  # noqa: E402
+from planner.offers import FlightOffer  # noqa: E402
+
+FIRST_TOKEN_DELAY = 0.40
+CHUNK_DELAY = 0.02
+
+FLIGHTS = [FlightOffer(id="1", price=412.5, price_text="412.50", currency="EUR", duration_minutes=475,
+                       stops=0, route=["DEL", "NRT"], carriers=["AI"])]
+HOTELS = [{"name": "Shinjuku Stay", "address": {"lines": ["1-1 Shinjuku"]}}]
+
+FORM = {
+    "destination": "Tokyo", "days": "3", "budget": "80000", "currency": "",
+    "interests": "culture", "origin": "Delhi", "departure_date": "2026-11-01",
+}
+
+web.gather_trip_data = lambda *args, **kwargs: ([FlightOffer.from_dict(f.to_dict()) for f in FLIGHTS], list(HOTELS))
+itinerary._client = lambda: FakeLLMClient(first_token_delay=FIRST_TOKEN_DELAY, chunk_delay=CHUNK_DELAY)
+
+
+def full_page(client):
+    start = time.perf_counter()
+    response = client.post("/", data=FORM)
+    response.get_data()
+    total = time.perf_counter() - start
+    return total, total
+
+
+def streamed(client):
+    start = time.perf_counter()
+    response = client.post("/plan/stream", data=FORM, buffered=False)
+    first_byte = first_section = None
+    sections = 0
+    for chunk in response.response:
+        now = time.perf_counter() - start
+        if first_byte is None:
+            first_byte = now
+        if b"event: section" in (chunk if isinstance(chunk, bytes) else chunk.encode()):
+            sections += 1
+            if first_section is None:
+                first_section = now
+    response.close()
+    return first_byte, first_section, time.perf_counter() - start, sections
+
+
+if __name__ == "__main__":
+    client = web.app.test_client()
+    ttfb, total = full_page(client)
+    print(f"POST /           : first byte {ttfb * 1000:7.1f} ms, complete {total * 1000:7.1f} ms")
+    first_byte, first_section, total, sections = streamed(client)
+    print(f"POST /plan/stream: first byte {first_byte * 1000:7.1f} ms, first section {first_section * 1000:7.1f} ms, "
+          f"complete {total * 1000:7.1f} ms ({sections} sections)")
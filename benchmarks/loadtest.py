@@ -0,0 +1,337 @@
+"""
+Offline load test: throughput, latency percentiles and memory of the planner
+flows, with Amadeus and Gemini replaced by fakes that replay the recorded
+responses in benchmarks/fixtures/ after a configurable delay.
+
+Scenarios:
+    home      GET /  (the search page)
+    plan      POST / (home() planning a trip from fixtures/trips.json)
+    famous    GET /api/famous-cities for a rotating set of countries
+    cli       main.plan_trip() in-process, as `python main.py` runs it
+    mixed     home, plan and famous interleaved
+
+Targets: the Flask test client in this process, or a real gunicorn server
+started on a free local port (not available for the cli scenario).
+
+Response caches are disabled so every request does the full work; pass
+--cached to measure warm-cache behaviour instead. Save a run with --save and
+gate a later one with --compare to catch regressions.
+
+Run from the repository root, e.g.:
+    python -m benchmarks.loadtest --scenario plan --concurrency 16 --requests 400 \\
+        --amadeus-latency lognormal:0.25:0.4 --llm-latency lognormal:1.2:0.3
+    python -m benchmarks.loadtest --scenario mixed --target gunicorn --workers 2 --threads 8
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+COUNTRIES = ["France", "India", "Japan", "United States", "United Kingdom"]
+SCENARIOS = ("home", "plan", "famous", "cli", "mixed")
+# Compared by --compare: metric -> True when higher is better
+GATED = {"rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--target", choices=("testclient", "gunicorn"), default="testclient")
+    parser.add_argument("--concurrency", type=int, default=8, help="simultaneous clients")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests sent first")
+    parser.add_argument("--amadeus-latency", default="lognormal:0.2:0.4",
+                        help="fake Amadeus response time, e.g. fixed:0.2, uniform:0.1:0.5, lognormal:0.2:0.4")
+    parser.add_argument("--llm-latency", default="lognormal:0.8:0.3", help="fake Gemini response time")
+    parser.add_argument("--amadeus-rate", default="0",
+                        help="client-side Amadeus requests/second per process (0, the default here, disables the limit)")
+    parser.add_argument("--cached", action="store_true", help="keep the response and itinerary caches enabled")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--save", metavar="FILE", help="write the report to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="fail if worse than the report in FILE")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression for --compare")
+    args = parser.parse_args(argv)
+    if args.scenario == "cli" and args.target != "testclient":
+        parser.error("the cli scenario runs in-process; use --target testclient")
+    return args
+
+
+def configure_fakes(args):
+    """Point the app at the recorded fixtures; must run before the app is imported."""
+    os.environ.update({
+        "USE_FAKE_AMADEUS": "1",
+        "USE_FAKE_LLM": "1",
+        "FAKE_FIXTURES_DIR": FIXTURES_DIR,
+        "FAKE_AMADEUS_LATENCY": args.amadeus_latency,
+        "FAKE_LLM_LATENCY": args.llm_latency,
+        "AMADEUS_RATE_LIMIT": args.amadeus_rate,
+    })
+    if not args.cached:
+        os.environ.update({"LLM_CACHE_ENABLED": "0", "FLIGHT_CACHE_TTL": "0", "HOTEL_CACHE_TTL": "0"})
+
+
+def build_requests(scenario, count):
+    """(method, path, form) tuples; the cli scenario uses the trip dicts directly."""
+    with open(os.path.join(FIXTURES_DIR, "trips.json"), "r", encoding="utf-8") as f:
+        trips = json.load(f)
+    plans = [("POST", "/", trip) for trip in trips]
+    famous = [("GET", "/api/famous-cities?" + urlencode({"country": c}), None) for c in COUNTRIES]
+    pools = {
+        "home": [("GET", "/", None)],
+        "plan": plans,
+        "famous": famous,
+        "cli": [("CLI", None, trip) for trip in trips],
+        "mixed": [("GET", "/", None), *plans[:2], *famous[:3]],
+    }
+    pool = pools[scenario]
+    return [pool[i % len(pool)] for i in range(count)]
+
+
+def rss_kib(pid="self"):
+    """(current, peak) resident set size of a process in KiB, from /proc."""
+    current = peak = 0
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1])
+    except OSError:
+        pass
+    return current, peak
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+class InProcessTarget:
+    """Flask test client (one per thread) plus direct main.plan_trip() calls."""
+
+    name = "testclient"
+
+    def __init__(self):
+        import app as web
+        import main
+        self._app = web.app
+        self._plan_trip = main.plan_trip
+        self._local = threading.local()
+
+    def send(self, method, path, form):
+        if method == "CLI":
+            itinerary = self._plan_trip(
+                form["destination"], int(form["days"]), form["budget"], form["interests"],
+                form["origin"], form["departure_date"], out=lambda *a: None,
+            )
+            return 200 if itinerary else 500
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        response = client.open(path, method=method, data=form)
+        response.get_data()
+        return response.status_code
+
+    def memory(self):
+        current, peak = rss_kib()
+        return {"processes": 1, "rss_kib": current, "peak_rss_kib": peak}
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """A real gunicorn server (gthread workers) on a free local port, with keep-alive clients."""
+
+    name = "gunicorn"
+
+    def __init__(self, workers, threads):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{self.port}",
+             "--workers", str(workers), "--worker-class", "gthread", "--threads", str(threads),
+             "--keep-alive", "30", "--log-level", "warning"],
+            cwd=ROOT, env=os.environ.copy(),
+        )
+        self._local = threading.local()
+        self._wait_ready(workers)
+
+    def _wait_ready(self, workers, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self._process.returncode}")
+            try:
+                if self.send("GET", "/metrics", None) == 200 and len(_children(self._process.pid)) >= workers:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.1)
+        self.close()
+        raise RuntimeError("gunicorn did not start in time")
+
+    def send(self, method, path, form):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        body = urlencode(form) if form else None
+        headers = {"Content-Type": "application/x-www-form-urlencoded"} if form else {}
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the broken keep-alive connection; the next request reconnects
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status
+
+    def memory(self):
+        pids = [self._process.pid, *_children(self._process.pid)]
+        current = peak = 0
+        for pid in pids:
+            rss, hwm = rss_kib(pid)
+            current += rss
+            peak += hwm
+        return {"processes": len(pids), "rss_kib": current, "peak_rss_kib": peak}
+
+    def close(self):
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run(target, plan, concurrency):
+    """Send every request in `plan` from `concurrency` threads; return (latencies, errors, wall seconds)."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(request):
+        start = time.perf_counter()
+        try:
+            status = target.send(*request)
+            failed = status >= 400 and f"HTTP {status}"
+        except Exception as e:
+            failed = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if failed:
+                errors.append(failed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, plan))
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(args, target, latencies, errors, wall):
+    ordered = sorted(latencies)
+    return {
+        "scenario": args.scenario,
+        "target": target.name,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "cached": args.cached,
+        "amadeus_latency": args.amadeus_latency,
+        "llm_latency": args.llm_latency,
+        "wall_s": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        **{f"p{int(q * 100)}_ms": round(percentile(ordered, q) * 1000, 2) for q in (0.5, 0.95, 0.99)},
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        "memory": target.memory(),
+        "sample_errors": sorted(set(errors))[:5],
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Messages for every gated metric that regressed beyond `tolerance`."""
+    problems = []
+    for metric, higher_is_better in GATED.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            problems.append(f"{metric}: {old} -> {new} ({change:+.0%})")
+    return problems
+
+
+def print_report(result):
+    memory = result["memory"]
+    print(f"{result['scenario']} via {result['target']}, concurrency {result['concurrency']}"
+          f"{' (cached)' if result['cached'] else ''}")
+    print(f"  upstream latency: amadeus {result['amadeus_latency']}, llm {result['llm_latency']}")
+    print(f"  requests {result['requests']:>6}   errors {result['errors']}   wall {result['wall_s']:.2f} s"
+          f"   {result['rps']:.1f} req/s")
+    print(f"  latency  mean {result['mean_ms']:8.1f} ms   p50 {result['p50_ms']:8.1f}   p95 {result['p95_ms']:8.1f}"
+          f"   p99 {result['p99_ms']:8.1f}   max {result['max_ms']:8.1f}")
+    print(f"  memory   {memory['processes']} process(es), RSS {memory['rss_kib'] / 1024:.1f} MiB,"
+          f" peak {memory['peak_rss_kib'] / 1024:.1f} MiB")
+    for error in result["sample_errors"]:
+        print(f"  error: {error}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_fakes(args)
+    target = GunicornTarget(args.workers, args.threads) if args.target == "gunicorn" else InProcessTarget()
+    try:
+        if args.warmup:
+            run(target, build_requests(args.scenario, args.warmup), args.concurrency)
+        latencies, errors, wall = run(target, build_requests(args.scenario, args.requests), args.concurrency)
+        result = report(args, target, latencies, errors, wall)
+    finally:
+        target.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    problems = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+    return 1 if errors or problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file automatically
@@ -12,3 +13,146 @@ DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gemini-2.5-flash")
 
 AMADUES_CLIENT_ID = os.getenv("AMADUES_CLIENT_ID")
 AMADUES_CLIENT_SECRET = os.getenv("AMADUES_CLIENT_SECRET")
+
+# Upstream fan-out: worker threads shared by all requests, per-call timeouts and
+# an overall deadline (seconds) after which the itinerary is built from whatever arrived
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "8"))
+FLIGHT_SEARCH_TIMEOUT = float(os.getenv("FLIGHT_SEARCH_TIMEOUT", "10"))
+HOTEL_SEARCH_TIMEOUT = float(os.getenv("HOTEL_SEARCH_TIMEOUT", "10"))
+UPSTREAM_DEADLINE = float(os.getenv("UPSTREAM_DEADLINE", "12"))
+
+# Serve LLM calls from the canned offline client in planner/fakes.py (no API key needed)
+USE_FAKE_LLM = os.getenv("USE_FAKE_LLM", "").lower() in ("1", "true", "yes")
+# Replay recorded Amadeus responses instead of calling the API (benchmarks and load tests)
+USE_FAKE_AMADEUS = os.getenv("USE_FAKE_AMADEUS", "").lower() in ("1", "true", "yes")
+# Recorded responses for the fakes; when set, the fake LLM replays llm.json from here too
+FAKE_FIXTURES_DIR = os.getenv("FAKE_FIXTURES_DIR", "")
+# Fake response times, e.g. "fixed:0.2", "uniform:0.1:0.5" or "lognormal:0.3:0.5" (median seconds, sigma)
+FAKE_AMADEUS_LATENCY = os.getenv("FAKE_AMADEUS_LATENCY", "fixed:0")
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "fixed:0")
+
+# Upstream response cache: "memory" (per process) or "sqlite" (file shared by all workers on the host)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(tempfile.gettempdir(), "ai_travel_planner_cache.sqlite3"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# SQLite caches keep LRU order approximately: a read moves an entry up at most once per
+# CACHE_TOUCH_INTERVAL seconds, and size bounds are enforced every CACHE_EVICT_EVERY writes
+CACHE_TOUCH_INTERVAL = float(os.getenv("CACHE_TOUCH_INTERVAL", "60"))
+CACHE_EVICT_EVERY = int(os.getenv("CACHE_EVICT_EVERY", "64"))
+# Flight offers go stale quickly; hotel lists barely change (seconds)
+FLIGHT_CACHE_TTL = int(os.getenv("FLIGHT_CACHE_TTL", "300"))
+HOTEL_CACHE_TTL = int(os.getenv("HOTEL_CACHE_TTL", "86400"))
+
+# Persistent cache of generated itineraries, keyed on the canonicalized prompt
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ai_travel_planner_llm.sqlite3"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+# Budgets within the same ratio band (e.g. 1.1 = ~10%) share a cached itinerary
+BUDGET_BUCKET_RATIO = float(os.getenv("BUDGET_BUCKET_RATIO", "1.1"))
+
+# Rendered plan pages, kept precompressed under a random plan id for /plan/<id>
+# permalinks and repeat views (shared by every worker on the host)
+PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ai_travel_planner_plans.sqlite3"))
+PLAN_CACHE_TTL = int(os.getenv("PLAN_CACHE_TTL", str(7 * 24 * 3600)))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "5000"))
+PLAN_CACHE_MAX_BYTES = int(os.getenv("PLAN_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Exchange rates: provider name, its rates table (quoted against FX_BASE_CURRENCY) and cache TTL (seconds)
+FX_PROVIDER = os.getenv("FX_PROVIDER", "json")
+FX_RATES_PATH = os.getenv(
+    "FX_RATES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "planner", "fx_rates.json"),
+)
+FX_CACHE_TTL = int(os.getenv("FX_CACHE_TTL", "3600"))
+
+# Shared upstream clients: Amadeus environment ("test" or "production"), keep-alive
+# pool size, per-request HTTP timeout and how early (seconds) to refresh the OAuth token
+AMADEUS_HOSTNAME = os.getenv("AMADEUS_HOSTNAME", "test")
+AMADEUS_POOL_SIZE = int(os.getenv("AMADEUS_POOL_SIZE", "10"))
+AMADEUS_HTTP_TIMEOUT = float(os.getenv("AMADEUS_HTTP_TIMEOUT", "15"))
+AMADEUS_TOKEN_REFRESH_MARGIN = int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "60"))
+# Client-side Amadeus rate limit per worker process: sustained requests/second and burst (0 disables)
+AMADEUS_RATE_LIMIT = float(os.getenv("AMADEUS_RATE_LIMIT", "10"))
+AMADEUS_RATE_BURST = int(os.getenv("AMADEUS_RATE_BURST", "2"))
+
+# Upstream resilience (planner/resilience.py): per-upstream deadline (seconds, retries
+# included) and retries of transient errors, with exponential backoff and full jitter.
+# Keep AMADEUS_DEADLINE below the search timeouts so a stale answer beats the fan-out deadline.
+AMADEUS_DEADLINE = float(os.getenv("AMADEUS_DEADLINE", "8"))
+AMADEUS_RETRIES = int(os.getenv("AMADEUS_RETRIES", "2"))
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", "60"))
+GEMINI_RETRIES = int(os.getenv("GEMINI_RETRIES", "1"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.25"))
+RETRY_BACKOFF_CAP = float(os.getenv("RETRY_BACKOFF_CAP", "2"))
+# Circuit breaker: consecutive failures before failing fast, and seconds until a probe is let through
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+# Concurrent fetches per upstream; each has its own pool so a slow one cannot starve the other
+AMADEUS_WORKERS = int(os.getenv("AMADEUS_WORKERS", "8"))
+GEMINI_WORKERS = int(os.getenv("GEMINI_WORKERS", "8"))
+# How long the last good response per request is kept to serve while an upstream is down (seconds)
+STALE_TTL = int(os.getenv("STALE_TTL", str(24 * 3600)))
+
+# Flight offers: how many to request from Amadeus per search, and how to pick the few shown.
+# FLIGHT_RANK_BY is "price", "duration", "stops" or "score", a mix weighted by FLIGHT_WEIGHT_*
+# (price and duration relative to the best offer found, stops per stop)
+FLIGHT_FETCH_SIZE = int(os.getenv("FLIGHT_FETCH_SIZE", "20"))
+FLIGHT_RANK_BY = os.getenv("FLIGHT_RANK_BY", "score").lower()
+FLIGHT_WEIGHT_PRICE = float(os.getenv("FLIGHT_WEIGHT_PRICE", "1.0"))
+FLIGHT_WEIGHT_DURATION = float(os.getenv("FLIGHT_WEIGHT_DURATION", "0.5"))
+FLIGHT_WEIGHT_STOPS = float(os.getenv("FLIGHT_WEIGHT_STOPS", "0.25"))
+
+# Itinerary prompt size: estimated token budget (PROMPT_CHARS_PER_TOKEN characters per token)
+# and how many flights / hotels may be summarized in it, most relevant first
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "700"))
+PROMPT_CHARS_PER_TOKEN = int(os.getenv("PROMPT_CHARS_PER_TOKEN", "4"))
+PROMPT_MAX_FLIGHTS = int(os.getenv("PROMPT_MAX_FLIGHTS", "3"))
+PROMPT_MAX_HOTELS = int(os.getenv("PROMPT_MAX_HOTELS", "5"))
+
+# Flexible-date search: widest date window, airports per side with nearby=1,
+# concurrent flight searches per worker process and overall deadline (seconds)
+FLEX_MAX_DAYS = int(os.getenv("FLEX_MAX_DAYS", "14"))
+FLEX_MAX_AIRPORTS = int(os.getenv("FLEX_MAX_AIRPORTS", "2"))
+FLEX_CONCURRENCY = int(os.getenv("FLEX_CONCURRENCY", "4"))
+FLEX_DEADLINE = float(os.getenv("FLEX_DEADLINE", "20"))
+
+# Airport coordinates: how far (km) a town without an airport may be from the one
+# get_iata_code falls back to, and the widest radius /api/nearby-airports accepts
+GEO_FALLBACK_MAX_KM = float(os.getenv("GEO_FALLBACK_MAX_KM", "150"))
+GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "1000"))
+
+# City autocomplete: suggestions per request by default, and the most typos tolerated
+# in a query (long queries; 4-6 characters allow one, shorter ones none)
+AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "8"))
+AUTOCOMPLETE_MAX_EDITS = int(os.getenv("AUTOCOMPLETE_MAX_EDITS", "2"))
+
+# IATA dataset refresh (planner/script_to_get_iata.py): how often (seconds) running workers
+# check for a newly published version and swap it in (0 disables), and how many versions to keep
+IATA_RELOAD_INTERVAL = float(os.getenv("IATA_RELOAD_INTERVAL", "60"))
+IATA_KEEP_VERSIONS = int(os.getenv("IATA_KEEP_VERSIONS", "3"))
+
+# Batch planning (python main.py --batch): concurrent itinerary generations, and how many
+# requests are read, resolved and looked up together (bounds memory on large files)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "50"))
+
+# /api/famous-cities: "table" answers from the precomputed popularity table (or the
+# cached LLM list) and refreshes the LLM list in the background; "llm" asks the LLM inline
+FAMOUS_CITIES_MODE = os.getenv("FAMOUS_CITIES_MODE", "table").lower()
+FAMOUS_CITIES_TTL = int(os.getenv("FAMOUS_CITIES_TTL", str(7 * 24 * 3600)))
+FAMOUS_CITIES_RETRY_TTL = int(os.getenv("FAMOUS_CITIES_RETRY_TTL", "300"))
+
+# Background planning jobs: worker threads, max unfinished jobs before answering 429,
+# how long finished results stay pollable (seconds), and hosts allowed as webhook targets.
+# Job status lives in a SQLite file shared by every worker process on the host.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "32"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "900"))
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(tempfile.gettempdir(), "ai_travel_planner_jobs.sqlite3"))
+JOB_WEBHOOK_HOSTS = {host.strip() for host in os.getenv("JOB_WEBHOOK_HOSTS", "").split(",") if host.strip()}
+
+# Add a Server-Timing header (per-stage durations) to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
@@ -1,60 +1,88 @@
+import argparse
+
+from config.settings import BATCH_CONCURRENCY
 from planner.itinerary import generate_itinerary
-from planner.flight_api import search_flights
-from planner.hotel_api import get_hotels_by_city
 from planner.location_api import get_iata_code
+from planner.orchestrator import gather_trip_data
 
 
-def main():
-    print("🌍 Welcome to AI Travel Planner v1!")
-
-    destination = input("Enter destination city (name or IATA code): ").strip()
-    days = int(input("Enter number of days: ").strip())
-    budget = input("Enter budget (e.g., ₹50,000): ").strip()
-    interests = input("Enter interests (e.g., beaches, nightlife, culture): ").strip()
-
-    # For flights, ask origin and departure date
-    origin = input("Enter your origin city (name or IATA code, e.g., DEL): ").strip()
-    departure_date = input("Enter departure date (YYYY-MM-DD): ").strip()
-
+def plan_trip(destination, days, budget, interests, origin, departure_date, out=print):
+    """Resolve, fetch and generate one trip, reporting progress through `out`."""
     # Resolve IATA codes if not already codes
     origin_code = origin if len(origin) == 3 else get_iata_code(origin)
     destination_code = destination if len(destination) == 3 else get_iata_code(destination)
 
     if not origin_code or not destination_code:
-        print("Invalid origin/destination name or code. Please try again.")
-        return
+        out("Invalid origin/destination name or code. Please try again.")
+        return None
+
+    # Flights and hotels are fetched concurrently - use resolved IATA codes
+    out("\nSearching flights and hotels...\n")
+    flights, hotels_by_city = gather_trip_data(origin_code, destination_code, departure_date, adults=1, max_results=5)
 
-    # Generate itinerary (without live flight/hotel data for now)
-    print("\nGenerating your itinerary with preferences... Please wait ⏳\n")
-    itinerary = generate_itinerary(destination, days, budget, interests)
-    print("✅ Trip Itinerary:\n")
-    print(itinerary)
+    out("Generating your itinerary with preferences... Please wait ⏳\n")
+    itinerary = generate_itinerary(
+        destination, days, budget, interests,
+        origin_code, destination_code, flights, hotels_by_city
+    )
+    out("✅ Trip Itinerary:\n")
+    out(itinerary)
 
-    # Flights Search - use resolved IATA codes
-    print("\nSearching flights...\n")
-    flights = search_flights(origin_code, destination_code, departure_date, adults=1)
     if flights:
-        print(f"Found {len(flights)} flight offers.")
+        out(f"Found {len(flights)} flight offers.")
         for flight in flights:
-            price = flight['price']['grandTotal']
-            currency = flight['price']['currency']
-            route = " -> ".join(segment['departure']['iataCode'] for segment in flight['itineraries'][0]['segments']) + " -> " + \
-                    flight['itineraries'][0]['segments'][-1]['arrival']['iataCode']
-            print(f"Price: {price} {currency}, Route: {route}")
+            out(f"Price: {flight.price_text} {flight.currency}, Route: {flight.route_text()}")
     else:
-        print("No flights found.")
+        out("No flights found.")
 
-    # Hotel Search - use resolved city code
-    print("\nLooking up hotels in the city...\n")
-    hotels_by_city = get_hotels_by_city(destination_code)
+    # Hotels in the destination city
     if hotels_by_city:
-        print(f"Found {len(hotels_by_city)} hotels in {destination_code}. Sample:")
+        out(f"Found {len(hotels_by_city)} hotels in {destination_code}. Sample:")
         for hotel in hotels_by_city[:5]:
             address_lines = hotel['address'].get('lines') if hotel['address'] else None
             address_str = ", ".join(address_lines) if address_lines else 'N/A'
-            print(f" - {hotel['name']}, Address: {address_str}")
+            out(f" - {hotel['name']}, Address: {address_str}")
     else:
-        print("No hotel details found for the city.")
+        out("No hotel details found for the city.")
+
+    return itinerary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI Travel Planner. Without arguments, plans one trip interactively.")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="plan every trip in a .jsonl or .csv file (fields: destination, days, budget, "
+                             "currency, interests, origin, departure_date and an optional id)")
+    parser.add_argument("--output", metavar="OUTPUT",
+                        help="JSON lines output, also the checkpoint for resuming; trips retried on a rerun get "
+                             "a new line, and the last line for an id wins (default: INPUT.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="itineraries generated at once (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch:
+        from planner.batch import run_batch
+        output = args.output or f"{args.batch}.results.jsonl"
+        counts = run_batch(args.batch, output, concurrency=max(1, args.concurrency))
+        print(f"Done: {counts['ok']} planned, {counts['partial']} partial (rerun to retry), {counts['failed']} failed, "
+              f"{counts['skipped']} skipped (duplicates or already done). Results in {output}")
+        return
+
+    print("🌍 Welcome to AI Travel Planner v1!")
+
+    destination = input("Enter destination city (name or IATA code): ").strip()
+    days = int(input("Enter number of days: ").strip())
+    budget = input("Enter budget (e.g., ₹50,000): ").strip()
+    interests = input("Enter interests (e.g., beaches, nightlife, culture): ").strip()
+
+    # For flights, ask origin and departure date
+    origin = input("Enter your origin city (name or IATA code, e.g., DEL): ").strip()
+    departure_date = input("Enter departure date (YYYY-MM-DD): ").strip()
+
+    plan_trip(destination, days, budget, interests, origin, departure_date)
 
 
 if __name__ == "__main__":
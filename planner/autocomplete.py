@@ -0,0 +1,241 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+
+from config.settings import AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_EDITS
+from planner.iata_store import load_dataset
+from planner.metrics import timed
+
+# Letters that NFKD does not split into a base letter plus accent
+_SPECIAL_LETTERS = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i",
+})
+_SEPARATORS_RE = re.compile(r"[\W_]+")
+# Candidates verified with edit distance per fuzzy query, best trigram overlap first
+_FUZZY_CANDIDATES = 64
+
+
+def fold(text):
+    """Lowercase ASCII-ish form for matching: "Zürich" -> "zurich", "St-François" -> "st francois"."""
+    text = unicodedata.normalize("NFKD", (text or "").casefold().translate(_SPECIAL_LETTERS))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _SEPARATORS_RE.sub(" ", text).strip()
+
+
+def _grams(text):
+    # Trigrams of the text with a start marker; queries are prefixes, so no end marker
+    padded = "^" + text
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+def max_edits(length):
+    """Typos tolerated in a query of `length` characters."""
+    if length < 4:
+        return 0
+    if length < 7:
+        return min(1, AUTOCOMPLETE_MAX_EDITS)
+    return AUTOCOMPLETE_MAX_EDITS
+
+
+def whole_name_edits(length):
+    """Typos tolerated when a complete name has to match: one per seven characters."""
+    return min(length // 7, AUTOCOMPLETE_MAX_EDITS)
+
+
+def edit_distance(a, b, bound, prefix=False):
+    """
+    Optimal string alignment distance (a transposition counts as one edit)
+    between `a` and `b`, or with `prefix` between `a` and the closest prefix
+    of `b`. Returns bound + 1 as soon as it is certain to exceed `bound`.
+    """
+    if prefix:
+        b = b[:len(a) + bound]
+    elif abs(len(a) - len(b)) > bound:
+        return bound + 1
+    over = bound + 1
+    # Only cells within `bound` of the diagonal can stay within bound
+    previous2 = None
+    previous = [j if j <= bound else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= bound:
+            current[0] = i
+        row_best = current[0]
+        for j in range(max(1, i - bound), min(len(b), i + bound) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = previous[j - 1] + cost
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if cost and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_best:
+                row_best = value
+        if row_best > bound:
+            return over
+        previous2, previous = previous, current
+    return min(min(previous), over) if prefix else min(previous[-1], over)
+
+
+class CityIndex:
+    """
+    Prefix and typo-tolerant lookups over every (country, city) with an
+    airport, most popular (most airports) first.
+
+    Names are folded (see fold()) when the index is built, so queries match
+    with or without accents. Every word of a name is a prefix key, so
+    "paulo" finds "Sao Paulo".
+    """
+
+    def __init__(self, dataset, freq=None):
+        cities = {}
+        codes_by_key = {}
+        for iata, city, country in zip(dataset.column("iata"), dataset.column("city"), dataset.column("country")):
+            city, country = city.strip(), country.strip()
+            if not city:
+                continue
+            codes_by_key.setdefault((country, city), []).append(iata)
+        for key, codes in codes_by_key.items():
+            cities[key] = (freq or {}).get(key, len(codes))
+
+        self._entries = []  # (city, country, codes, popularity, folded name)
+        self._by_code = {}
+        words = []
+        self._postings = {}
+        for (country, city), popularity in cities.items():
+            entry_id = len(self._entries)
+            folded = fold(city)
+            codes = codes_by_key[(country, city)]
+            self._entries.append((city, country, codes, popularity, folded))
+            for code in codes:
+                self._by_code.setdefault(code, entry_id)
+            start = 0
+            for word in folded.split(" "):
+                words.append((folded[start:], entry_id))
+                start += len(word) + 1
+            for gram in _grams(folded):
+                self._postings.setdefault(gram, []).append(entry_id)
+        words.sort()
+        self._word_keys = [key for key, _ in words]
+        self._word_entries = [entry_id for _, entry_id in words]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _rank(self, entry_id):
+        # Most airports first, then the shorter (more likely complete) name
+        _, _, _, popularity, folded = self._entries[entry_id]
+        return -popularity, len(folded), folded
+
+    def prefix(self, query, limit):
+        """Entry ids whose name, or any word in it, starts with `query`."""
+        lo = bisect_left(self._word_keys, query)
+        hi = bisect_left(self._word_keys, query + "\uffff")
+        matches = {}
+        for position in range(lo, hi):
+            entry_id = self._word_entries[position]
+            starts_name = self._entries[entry_id][4].startswith(query)
+            matches[entry_id] = matches.get(entry_id, False) or starts_name
+        return heapq.nsmallest(limit, matches, key=lambda e: (not matches[e],) + self._rank(e))
+
+    def fuzzy(self, query, limit, exclude=(), bound=None, prefix=True):
+        """
+        (distance, entry id) for names within `bound` (default max_edits())
+        typos of `query`, or with `prefix` of the start of a name.
+        """
+        bound = max_edits(len(query)) if bound is None else bound
+        if bound == 0:
+            return []
+        grams = _grams(query)
+        overlap = {}
+        for gram in grams:
+            for entry_id in self._postings.get(gram, ()):
+                overlap[entry_id] = overlap.get(entry_id, 0) + 1
+        # Each edit breaks at most three trigrams (four for a transposition), so closer
+        # names share at least this many
+        needed = len(grams) - 4 * bound
+        candidates = heapq.nlargest(_FUZZY_CANDIDATES, overlap, key=lambda e: (overlap[e], self._entries[e][3]))
+        found = []
+        for entry_id in candidates:
+            if entry_id in exclude or overlap[entry_id] < needed:
+                continue
+            # While typing, the name may be longer than the query so far
+            distance = edit_distance(query, self._entries[entry_id][4], bound, prefix=prefix)
+            if distance <= bound:
+                found.append((distance, entry_id))
+        return heapq.nsmallest(limit, found, key=lambda pair: (pair[0],) + self._rank(pair[1]))
+
+    def suggest(self, text, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Up to `limit` suggestions for a partly typed city: an exact airport
+        code, then name prefixes, then near misses, each most popular first.
+        """
+        query = fold(text)
+        if not query or limit <= 0:
+            return []
+        ranked = []
+        if len(query) == 3 and query.isalpha() and query.upper() in self._by_code:
+            ranked.append((self._by_code[query.upper()], "code", 0))
+        seen = {entry_id for entry_id, _, _ in ranked}
+        for entry_id in self.prefix(query, limit):
+            if entry_id not in seen:
+                seen.add(entry_id)
+                ranked.append((entry_id, "prefix", 0))
+        if len(ranked) < limit:
+            for distance, entry_id in self.fuzzy(query, limit - len(ranked), exclude=seen):
+                ranked.append((entry_id, "fuzzy", distance))
+        suggestions = []
+        for entry_id, match, distance in ranked[:limit]:
+            city, country, codes, popularity, _ = self._entries[entry_id]
+            suggestions.append({
+                "city": city, "country": country, "iata": codes,
+                "airports": popularity, "match": match, "distance": distance,
+            })
+        return suggestions
+
+    def closest_code(self, text):
+        """
+        Airport code of the one city whose whole name is within
+        whole_name_edits() typos of `text`, or None if no name, or more than
+        one, is that close. Unlike suggest() this never completes a prefix:
+        the answer is used without the user picking from a list.
+        """
+        query = fold(text)
+        if not query:
+            return None
+        found = self.fuzzy(query, _FUZZY_CANDIDATES, bound=whole_name_edits(len(query)), prefix=False)
+        if not found:
+            return None
+        best = [entry_id for distance, entry_id in found if distance == found[0][0]]
+        # The same name in several countries counts once (the most popular, as ranked)
+        if len({self._entries[entry_id][4] for entry_id in best}) > 1:
+            return None
+        return self._entries[best[0]][2][0]
+
+
+_INDEX = None
+
+
+def load_city_index(dataset=None, freq=None):
+    """(Re)build the shared index; `freq` maps (country, city) to its airport count."""
+    global _INDEX
+    _INDEX = CityIndex(dataset if dataset is not None else load_dataset(), freq)
+    return _INDEX
+
+
+def use_city_index(index):
+    """Swap in an index built beforehand (see app._swap_iata_dataset)."""
+    global _INDEX
+    _INDEX = index
+
+
+def get_city_index():
+    return _INDEX if _INDEX is not None else load_city_index()
+
+
+@timed("autocomplete")
+def suggest_cities(text, limit=AUTOCOMPLETE_LIMIT):
+    return get_city_index().suggest(text, limit)
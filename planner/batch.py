@@ -0,0 +1,278 @@
+"""
+Batch planning: many trips from a .jsonl or .csv file, one JSON result line
+each, with the output file doubling as the checkpoint (see run_batch()).
+
+A rerun appends new lines for the trips it plans again (partial or failed
+ones), so an id can appear more than once; the last record for an id wins.
+"""
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from itertools import islice
+
+from config.settings import (
+    BATCH_CHUNK_SIZE,
+    BATCH_CONCURRENCY,
+    FLIGHT_FETCH_SIZE,
+    FLIGHT_SEARCH_TIMEOUT,
+    HOTEL_SEARCH_TIMEOUT,
+    UPSTREAM_POOL_SIZE,
+)
+from planner.flight_api import search_flights
+from planner.hotel_api import get_hotels_by_city
+from planner.itinerary import generate_itinerary
+from planner.location_api import get_iata_code
+from planner.metrics import count_error, count_timeout
+from planner.offers import FlightOffer, top_offers
+from planner.prompts import pick_hotels
+
+# Same fields as the web form; `id` is optional and defaults to a hash of the others
+FIELDS = ("destination", "days", "budget", "currency", "interests", "origin", "departure_date")
+# Fields that may also be given as JSON numbers; the rest must be strings
+NUMBER_FIELDS = ("days", "budget")
+MAX_FLIGHTS = 5
+
+# Flight and hotel lookups, each started once and shared by every trip that needs it
+_LOOKUPS = ThreadPoolExecutor(max_workers=UPSTREAM_POOL_SIZE, thread_name_prefix="batch-lookup")
+
+
+def read_requests(path):
+    """Yield trip requests (dicts) from a .jsonl or .csv file, one at a time."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield row
+            return
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield {"_error": f"line {line_no}: invalid JSON ({e})", "_line": line_no}
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                yield {"_error": f"line {line_no}: expected a JSON object, got {type(record).__name__}",
+                       "_line": line_no}
+
+
+def request_id(trip):
+    """The request's own `id`, or a stable hash of its fields so reruns recognise it."""
+    if "_line" in trip:
+        # Unreadable line: nothing else identifies it
+        return f"line-{trip['_line']}"
+    if trip.get("id"):
+        return str(trip["id"])
+    canonical = json.dumps([str(trip.get(name) or "").strip().lower() for name in FIELDS], ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def completed_ids(output_path):
+    """
+    Ids with an "ok" result in an existing output file: the checkpoint a
+    resumed run skips. The file is read a line at a time; a trailing partial
+    line from a crash is cut off.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                f.truncate(end)
+                break
+            end += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record.get("id"))
+    return done
+
+
+def _budget(trip):
+    amount = str(trip.get("budget") or "").strip()
+    currency = str(trip.get("currency") or "").strip()
+    return f"{currency} {amount}".strip() if currency else amount
+
+
+class _Resolver:
+    # Each distinct place name is resolved once per run, however many trips share it
+    def __init__(self):
+        self.codes = {}
+
+    def __call__(self, names):
+        for name in {name.strip().lower() for name in names if name and name.strip()} - self.codes.keys():
+            self.codes[name] = get_iata_code(name)
+
+    def get(self, name):
+        return self.codes.get((name or "").strip().lower())
+
+
+def _start_lookups(trips, lookups):
+    # One flight search per (origin, destination, date) and one hotel list per destination
+    for trip in trips:
+        flight_key = ("flights", trip["origin_iata"], trip["destination_iata"], trip["departure_date"])
+        if flight_key not in lookups:
+            lookups[flight_key] = _LOOKUPS.submit(search_flights, *flight_key[1:], adults=1, max_results=FLIGHT_FETCH_SIZE)
+        hotel_key = ("hotels", trip["destination_iata"])
+        if hotel_key not in lookups:
+            lookups[hotel_key] = _LOOKUPS.submit(get_hotels_by_city, trip["destination_iata"])
+
+
+def _result(lookups, key, timeout, missing):
+    # A failed or slow lookup leaves the trip without that data, like the web flow, and
+    # is noted in `missing` so the trip is retried on the next run
+    try:
+        value = lookups[key].result(timeout=timeout)
+    except FutureTimeoutError:
+        count_timeout("upstream.batch")
+        value = None
+    except Exception as e:
+        print(f"Batch lookup {key} failed: {e}")
+        count_error("upstream.batch")
+        value = None
+    if value is None:
+        missing.append(key[0])
+        return []
+    return value
+
+
+def _plan(trip, lookups):
+    missing = []
+    flight_key = ("flights", trip["origin_iata"], trip["destination_iata"], trip["departure_date"])
+    flights = top_offers(
+        (FlightOffer.from_dict(offer) for offer in _result(lookups, flight_key, FLIGHT_SEARCH_TIMEOUT, missing)),
+        MAX_FLIGHTS,
+    )
+    hotels = _result(lookups, ("hotels", trip["destination_iata"]), HOTEL_SEARCH_TIMEOUT, missing)
+    itinerary = generate_itinerary(
+        trip["destination"], trip["days"], trip["budget"], trip["interests"],
+        trip["origin_iata"], trip["destination_iata"], flights, hotels
+    )
+    return {
+        "itinerary": itinerary,
+        "flights": [flight.to_dict() for flight in flights],
+        "hotels": pick_hotels(hotels),
+        "missing": missing,
+    }
+
+
+def _invalid(raw):
+    # Why a decoded request cannot even be looked at, or None
+    if "_error" in raw:
+        return raw["_error"]
+    wrong = [name for name in FIELDS if raw.get(name) is not None and not (
+        isinstance(raw[name], str)
+        or name in NUMBER_FIELDS and isinstance(raw[name], (int, float)) and not isinstance(raw[name], bool)
+    )]
+    return f"invalid {', '.join(wrong)}" if wrong else None
+
+
+def _prepare(raw, resolve):
+    # Normalized trip, or an error message for a request that cannot be planned
+    missing = [name for name in ("destination", "origin", "departure_date") if not str(raw.get(name) or "").strip()]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    try:
+        days = int(raw.get("days") or 3)
+    except (TypeError, ValueError):
+        return None, "invalid days"
+    origin_iata, destination_iata = resolve.get(raw["origin"]), resolve.get(raw["destination"])
+    if not origin_iata or not destination_iata:
+        return None, "Invalid origin or destination city"
+    return {
+        "destination": str(raw["destination"]).strip(),
+        "days": days,
+        "budget": _budget(raw),
+        "interests": str(raw.get("interests") or "").strip(),
+        "departure_date": str(raw["departure_date"]).strip(),
+        "origin_iata": origin_iata,
+        "destination_iata": destination_iata,
+    }, None
+
+
+def run_batch(input_path, output_path, concurrency=BATCH_CONCURRENCY, chunk_size=BATCH_CHUNK_SIZE, out=print):
+    """
+    Plan every trip in `input_path` (.jsonl or .csv), appending one JSON line
+    per trip to `output_path` as soon as it is done.
+
+    Input is read `chunk_size` requests at a time. Within a chunk, place names
+    are resolved once each and identical flight/hotel lookups are started once
+    and shared; each itinerary is generated, on `concurrency` threads, as soon
+    as its own lookups are in. The output doubles as the checkpoint: rerunning
+    with the same files skips trips that already have an "ok" result, so a
+    crashed run resumes where it stopped. Trips planned without their flights
+    or hotels (the lookup failed or timed out) are written as "partial" and
+    planned again on the next run, which appends a second record for them;
+    the last record for an id is the one that counts.
+    Returns counts of ok, partial, failed and skipped requests.
+    """
+    done = completed_ids(output_path)
+    seen = set(done)
+    counts = {"ok": 0, "partial": 0, "failed": 0, "skipped": 0}
+    resolve = _Resolver()
+    requests = read_requests(input_path)
+
+    with open(output_path, "a", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+
+        def write(record):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            counts["failed" if record["status"] == "error" else record["status"]] += 1
+
+        while True:
+            chunk = list(islice(requests, chunk_size))
+            if not chunk:
+                break
+            pending = []
+            for raw in chunk:
+                rid = request_id(raw)
+                if rid in seen:
+                    counts["skipped"] += 1
+                    continue
+                seen.add(rid)
+                error = _invalid(raw)
+                if error:
+                    write({"id": rid, "status": "error", "error": error, "request": raw})
+                else:
+                    pending.append((rid, raw))
+            resolve([name for _, raw in pending for name in (raw.get("origin"), raw.get("destination"))])
+
+            trips = []
+            for rid, raw in pending:
+                trip, error = _prepare(raw, resolve)
+                if error:
+                    write({"id": rid, "status": "error", "error": error, "request": raw})
+                else:
+                    trips.append((rid, raw, trip))
+            if not trips:
+                continue
+
+            lookups = {}
+            _start_lookups([trip for _, _, trip in trips], lookups)
+            futures = {pool.submit(_plan, trip, lookups): (rid, raw, trip) for rid, raw, trip in trips}
+            for future in as_completed(futures):
+                rid, raw, trip = futures[future]
+                record = {"id": rid, "request": raw,
+                          "origin_iata": trip["origin_iata"], "destination_iata": trip["destination_iata"]}
+                try:
+                    result = future.result()
+                    missing = result.pop("missing")
+                    record.update(status="partial" if missing else "ok", **result)
+                    if missing:
+                        record["missing"] = missing
+                except Exception as e:
+                    record.update(status="error", error=str(e))
+                write(record)
+            out(f"[batch] {counts['ok']} ok, {counts['partial']} partial, {counts['failed']} failed, "
+                f"{counts['skipped']} skipped")
+    return counts
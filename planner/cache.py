@@ -0,0 +1,331 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from config.settings import (
+    CACHE_BACKEND,
+    CACHE_EVICT_EVERY,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TOUCH_INTERVAL,
+)
+
+# Sentinel for "not in cache" so that falsy values can still be cached
+MISSING = object()
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(blob):
+    return json.loads(blob)
+
+
+class MemoryBackend:
+    """
+    In-process LRU store bounded by entry count and encoded bytes.
+
+    Values are kept JSON-encoded so callers always get a private copy and
+    can mutate results (e.g. add converted prices) without touching the cache.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires_at, blob)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, blob = item
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return blob
+
+    def set(self, key, blob, ttl):
+        with self._lock:
+            self._store(key, blob, ttl)
+
+    def add(self, key, blob, ttl):
+        """Store `blob` only if `key` is absent or expired; True if it was stored."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.time():
+                return False
+            self._store(key, blob, ttl)
+            return True
+
+    def _store(self, key, blob, ttl):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.time() + ttl, blob)
+        self._bytes += len(blob)
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, blob = self._data.pop(key)
+        self._bytes -= len(blob)
+
+    def size(self):
+        with self._lock:
+            return len(self._data), self._bytes
+
+
+class SQLiteFile:
+    """Connections to a local SQLite file, one per thread and process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def connect(self):
+        # sqlite3 connections must not cross threads (or a fork), so keep one per thread and pid
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Owner-only: the file may hold OAuth tokens
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """A write transaction on this thread's connection, committed when the block exits cleanly."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SQLiteBackend:
+    """
+    LRU store in a local SQLite file, shared by every worker process on the host.
+
+    Same bounds and TTL semantics as MemoryBackend, kept with fewer writes:
+    a read only records its access when the last one is more than
+    `touch_interval` seconds old, and expired and least recently used
+    entries are removed every `evict_every` writes, or sooner once
+    1/evict_every of max_bytes has been written. In between, the bounds may
+    be exceeded by that much.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 touch_interval=CACHE_TOUCH_INTERVAL, evict_every=CACHE_EVICT_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.evict_every = max(1, evict_every)
+        self.evictions = 0
+        self._file = SQLiteFile(path)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._written = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def _connect(self):
+        return self._file.connect()
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at, last_access FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        if now - row[2] >= self.touch_interval:
+            conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+        return bytes(row[0])
+
+    def set(self, key, blob, ttl):
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now + ttl, now),
+        )
+        self._count_write(len(blob))
+
+    def add(self, key, blob, ttl):
+        """Store `blob` only if `key` is absent or expired, in one statement; True if it was stored."""
+        now = time.time()
+        stored = self._connect().execute(
+            "INSERT INTO cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+            " expires_at = excluded.expires_at, last_access = excluded.last_access"
+            " WHERE cache.expires_at <= ?",
+            (key, blob, len(blob), now + ttl, now, now),
+        ).rowcount
+        if stored:
+            self._count_write(len(blob))
+        return bool(stored)
+
+    def _count_write(self, size):
+        with self._lock:
+            self._writes += 1
+            self._written += size
+            due = self._writes >= self.evict_every or self._written * self.evict_every >= self.max_bytes
+            if due:
+                self._writes = self._written = 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Remove expired entries, then least recently used ones until within bounds."""
+        with self._file.transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM cache ORDER BY last_access").fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                count -= 1
+                total -= size
+            conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        with self._lock:
+            self.evictions += len(victims)
+
+    def size(self):
+        return tuple(self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone())
+
+
+class ResponseCache:
+    """A named view onto a backend with its own TTL and hit/miss counters."""
+
+    def __init__(self, name, ttl, backend):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    def get(self, key):
+        blob = self.backend.get(self._key(key))
+        if blob is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self.bytes_saved += len(blob)
+        return _decode(blob)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(self._key(key), _encode(value), self.ttl if ttl is None else ttl)
+
+    def memoize(self, key_fn):
+        """
+        Decorator caching a function's result under key_fn(*args, **kwargs).
+
+        Nothing is stored when the function raises, and None results are not
+        cached either.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = key_fn(*args, **kwargs)
+                value = self.get(key)
+                if value is not MISSING:
+                    return value
+                value = fn(*args, **kwargs)
+                if value is not None:
+                    self.set(key, value)
+                return value
+            wrapper.cache = self
+            return wrapper
+        return decorator
+
+    def stats(self):
+        total = self.hits + self.misses
+        entries, size = self.backend.size()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "ttl": self.ttl,
+            # Backend totals (shared by every cache on the same backend)
+            "backend": type(self.backend).__name__,
+            "backend_entries": entries,
+            "backend_bytes": size,
+            "backend_evictions": self.backend.evictions,
+        }
+
+
+_BACKEND = None
+_CACHES = {}
+_LOCK = threading.Lock()
+
+
+def get_backend():
+    global _BACKEND
+    with _LOCK:
+        if _BACKEND is None:
+            _BACKEND = SQLiteBackend() if CACHE_BACKEND == "sqlite" else MemoryBackend()
+        return _BACKEND
+
+
+def get_cache(name, ttl, backend=None):
+    """
+    Return the process-wide cache called `name`, creating it on first use.
+
+    Caches share the configured default backend unless one is passed in.
+    """
+    backend = backend or get_backend()
+    with _LOCK:
+        if name not in _CACHES:
+            _CACHES[name] = ResponseCache(name, ttl, backend)
+        return _CACHES[name]
+
+
+def make_key(*parts):
+    """Normalize arguments into a stable cache key (codes uppercased, whitespace trimmed)."""
+    normalized = []
+    for part in parts:
+        if isinstance(part, str):
+            part = part.strip().upper()
+        normalized.append("" if part is None else str(part))
+    return "|".join(normalized)
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in _CACHES.items()}
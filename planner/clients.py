@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from urllib.error import URLError
+
+import requests
+from amadeus import Client, NetworkError, ResponseError, ServerError
+from amadeus.client.access_token import AccessToken
+from google import genai
+from google.genai import errors as genai_errors
+
+from config.settings import (
+    GEMINI_API_KEY,
+    USE_FAKE_LLM,
+    USE_FAKE_AMADEUS,
+    FAKE_FIXTURES_DIR,
+    FAKE_AMADEUS_LATENCY,
+    FAKE_LLM_LATENCY,
+    AMADUES_CLIENT_ID,
+    AMADUES_CLIENT_SECRET,
+    AMADEUS_HOSTNAME,
+    AMADEUS_HTTP_TIMEOUT,
+    AMADEUS_POOL_SIZE,
+    AMADEUS_WORKERS,
+    AMADEUS_TOKEN_REFRESH_MARGIN,
+    AMADEUS_RATE_LIMIT,
+    AMADEUS_RATE_BURST,
+    AMADEUS_DEADLINE,
+    AMADEUS_RETRIES,
+    GEMINI_DEADLINE,
+    GEMINI_RETRIES,
+    GEMINI_WORKERS,
+)
+from planner.cache import MISSING, get_cache
+from planner.ratelimit import TokenBucket
+from planner.metrics import count_timeout
+from planner.resilience import Upstream, UpstreamUnavailable
+
+# Tokens are shared through the response cache, so with CACHE_BACKEND=sqlite
+# every worker on the host reuses the same OAuth token.
+_token_cache = get_cache("amadeus_token", ttl=60)
+
+# Recordings used by the fake Amadeus client when FAKE_FIXTURES_DIR is unset
+_DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+class _PooledResponse:
+    """Adapts a requests.Response to the urlopen()-style object the Amadeus SDK parses."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status = self.code = response.status_code
+
+    def getheaders(self):
+        return list(self._response.headers.items())
+
+    def read(self):
+        return self._response.content
+
+
+class PooledHTTP:
+    """
+    Drop-in for urlopen() backed by a keep-alive requests.Session.
+
+    The Amadeus SDK accepts any urlopen-compatible callable through its
+    `http` option; this one reuses pooled connections instead of opening
+    (and TLS-handshaking) a new one per call.
+    """
+
+    def __init__(self, pool_size=AMADEUS_POOL_SIZE, timeout=AMADEUS_HTTP_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __call__(self, http_request):
+        try:
+            response = self.session.request(
+                http_request.get_method(),
+                http_request.full_url,
+                data=http_request.data,
+                headers=dict(http_request.header_items()),
+                timeout=self.timeout,
+            )
+        except requests.RequestException as error:
+            # The SDK reports URLError as a NetworkError
+            raise URLError(error)
+        return _PooledResponse(response)
+
+
+class SharedAccessToken(AccessToken):
+    """
+    Amadeus OAuth token that refreshes AMADEUS_TOKEN_REFRESH_MARGIN seconds
+    before expiry, never refreshes twice concurrently, and is shared with
+    other workers through the token cache.
+    """
+
+    TOKEN_BUFFER = AMADEUS_TOKEN_REFRESH_MARGIN
+
+    def __init__(self, client):
+        super().__init__(client)
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _bearer_token(self):
+        with self._lock:
+            now = time.time()
+            if self.access_token is None or now + self.TOKEN_BUFFER >= self.expires_at:
+                shared = _token_cache.get(self.client.client_id)
+                if shared is not MISSING and now + self.TOKEN_BUFFER < shared["expires_at"]:
+                    self.access_token, self.expires_at = shared["access_token"], shared["expires_at"]
+                else:
+                    self._refresh(now)
+            return 'Bearer {0}'.format(self.access_token)
+
+    def _refresh(self, now):
+        response = self.client._unauthenticated_request(
+            'POST',
+            '/v1/security/oauth2/token',
+            {
+                'grant_type': 'client_credentials',
+                'client_id': self.client.client_id,
+                'client_secret': self.client.client_secret
+            }
+        )
+        self.fetches += 1
+        expires_in = response.result.get('expires_in', 0)
+        self.access_token = response.result.get('access_token', None)
+        self.expires_at = now + expires_in
+        ttl = expires_in - self.TOKEN_BUFFER
+        if self.access_token and ttl > 0:
+            _token_cache.set(self.client.client_id, {
+                "access_token": self.access_token,
+                "expires_at": self.expires_at,
+            }, ttl=ttl)
+
+
+def create_amadeus_client(**options):
+    """Build an Amadeus client with pooled HTTP and the shared, early-refreshing token."""
+    if USE_FAKE_AMADEUS:
+        from planner.fakes import FakeAmadeusClient, Latency
+        return FakeAmadeusClient(FAKE_FIXTURES_DIR or _DEFAULT_FIXTURES_DIR, latency=Latency.parse(FAKE_AMADEUS_LATENCY))
+    options.setdefault("client_id", AMADUES_CLIENT_ID)
+    options.setdefault("client_secret", AMADUES_CLIENT_SECRET)
+    options.setdefault("hostname", AMADEUS_HOSTNAME)
+    options.setdefault("http", PooledHTTP())
+    client = Client(**options)
+    # The SDK creates its token lazily under this attribute; pre-seed ours
+    client.access_token = SharedAccessToken(client)
+    return client
+
+
+def create_genai_client():
+    if USE_FAKE_LLM:
+        from planner.fakes import FakeLLMClient, Latency
+        latency = Latency.parse(FAKE_LLM_LATENCY)
+        if FAKE_FIXTURES_DIR:
+            return FakeLLMClient.from_fixtures(FAKE_FIXTURES_DIR, first_token_delay=latency)
+        return FakeLLMClient(first_token_delay=latency)
+    # Per-request timeout in milliseconds, so a hung call cannot outlive the Gemini deadline
+    return genai.Client(api_key=GEMINI_API_KEY, http_options={"timeout": int(GEMINI_DEADLINE * 1000)})
+
+
+_instances = {}
+_lock = threading.Lock()
+
+
+def _singleton(name, factory):
+    # One instance per worker process: a client inherited across fork() would
+    # share sockets with the parent, so rebuild when the pid changes.
+    pid = os.getpid()
+    entry = _instances.get(name)
+    if entry is None or entry[0] != pid:
+        with _lock:
+            entry = _instances.get(name)
+            if entry is None or entry[0] != pid:
+                entry = (pid, factory())
+                _instances[name] = entry
+    return entry[1]
+
+
+def get_amadeus_client():
+    return _singleton("amadeus", create_amadeus_client)
+
+
+def get_genai_client():
+    return _singleton("genai", create_genai_client)
+
+
+# Shared by every Amadeus call in this process, so wide fan-outs cannot trip the API's quota
+_amadeus_limiter = TokenBucket(AMADEUS_RATE_LIMIT, AMADEUS_RATE_BURST)
+
+
+def acquire_amadeus_slot(timeout=AMADEUS_HTTP_TIMEOUT):
+    """Wait for the Amadeus rate limit; False if no slot opened within `timeout` seconds."""
+    return _amadeus_limiter.acquire(timeout)
+
+
+def _amadeus_transient(error):
+    # Network failures, 5xx and 429 are worth retrying; other 4xx are the request's fault
+    if isinstance(error, (NetworkError, ServerError)):
+        return True
+    return isinstance(error, ResponseError) and getattr(error.response, "status_code", None) == 429
+
+
+def _gemini_transient(error):
+    if isinstance(error, genai_errors.ServerError):
+        return True
+    if isinstance(error, genai_errors.APIError):
+        return error.code == 429
+    # Transport failures (timeouts, dropped connections) come from the HTTP library
+    return isinstance(error, (OSError, TimeoutError)) or type(error).__module__.startswith(("httpx", "requests"))
+
+
+# Breaker, retries and last good responses, shared by every call to each service in this process
+AMADEUS_UPSTREAM = Upstream("amadeus", deadline=AMADEUS_DEADLINE, retries=AMADEUS_RETRIES, retryable=_amadeus_transient,
+                            workers=AMADEUS_WORKERS)
+GEMINI_UPSTREAM = Upstream("gemini", deadline=GEMINI_DEADLINE, retries=GEMINI_RETRIES, retryable=_gemini_transient,
+                           workers=GEMINI_WORKERS)
+
+
+def amadeus_request(method, stage, **params):
+    """
+    One Amadeus API call through the breaker and retries, each attempt
+    waiting for a rate-limit slot. Raises on failure.
+    """
+    def attempt():
+        if not acquire_amadeus_slot():
+            count_timeout(stage)
+            raise UpstreamUnavailable("Amadeus rate limit: no request slot available")
+        return method(**params)
+    return AMADEUS_UPSTREAM.call(attempt)
+
+
+def reset_clients():
+    """Drop every cached client (e.g. after changing credentials)."""
+    with _lock:
+        _instances.clear()
@@ -0,0 +1,213 @@
+import json
+import os
+import random
+import time
+from datetime import date, datetime
+
+# Offline stand-ins for upstream clients, used for local development and benchmarks.
+
+CANNED_ITINERARY = """```html
+<section class="itinerary-header">
+  <h2>Your Offline Sample Trip</h2>
+  <p>A canned itinerary produced by the fake LLM client, useful for testing without an API key.</p>
+</section>
+<section class="trip-facts">
+  <dl>
+    <dt>Days</dt><dd>3</dd>
+    <dt>Budget</dt><dd>As provided</dd>
+    <dt>Best flight pick</dt><dd>Cheapest direct option</dd>
+    <dt>Suggested hotel area</dt><dd>City centre</dd>
+  </dl>
+</section>
+<section class="daily-plan">
+  <article class="day"><h3>Day 1</h3><ul><li>Morning: arrive and check in.</li><li>Evening: old town walk.</li></ul></article>
+  <article class="day"><h3>Day 2</h3><ul><li>Morning: museum district.</li><li>Afternoon: local market lunch.</li></ul></article>
+  <article class="day"><h3>Day 3</h3><ul><li>Morning: viewpoint hike.</li><li>Evening: farewell dinner.</li></ul></article>
+</section>
+<section class="tips">
+  <ul>
+    <li>Buy a transit day pass.</li>
+    <li>Keep a copy of your passport.</li>
+    <li>Carry some local cash.</li>
+    <li>Get a local eSIM on arrival.</li>
+    <li>Greet shopkeepers when entering.</li>
+  </ul>
+</section>
+```"""
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModels:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate_content(self, model=None, contents=None, config=None):
+        owner = self._owner
+        text = owner._reply(contents)
+        time.sleep(owner._prefill(contents) + owner.chunk_delay * len(owner._chunks(text)))
+        return _FakeResponse(text)
+
+    def generate_content_stream(self, model=None, contents=None, config=None):
+        owner = self._owner
+        text = owner._reply(contents)
+        time.sleep(owner._prefill(contents))
+        for piece in owner._chunks(text):
+            yield _FakeResponse(piece)
+            time.sleep(owner.chunk_delay)
+
+
+class FakeLLMClient:
+    """
+    Mimics the parts of genai.Client used by the planner.
+
+    Returns `text` (a canned HTML itinerary by default) after
+    `first_token_delay` seconds (a number or a Latency), streamed in
+    `chunk_size`-character pieces with `chunk_delay` seconds between them.
+    `replies` is a list of (substring, text) pairs: the first whose substring
+    occurs in the prompt answers instead of `text`. `prompt_token_delay` adds
+    that many seconds per prompt token (4 characters) before the first
+    chunk, modelling prompt processing time.
+    """
+
+    def __init__(self, text=CANNED_ITINERARY, first_token_delay=0.0, chunk_delay=0.0, chunk_size=64, replies=(),
+                 prompt_token_delay=0.0):
+        self.text = text
+        self.first_token_delay = first_token_delay
+        self.prompt_token_delay = prompt_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.replies = list(replies)
+        self.models = _FakeModels(self)
+
+    @classmethod
+    def from_fixtures(cls, fixtures_dir, first_token_delay=0.0, **kwargs):
+        """Replay recorded answers from `llm.json`: {"default": text, "replies": [{"match", "text"}]}."""
+        recorded = _load_fixture(fixtures_dir, "llm.json")
+        replies = [(reply["match"], reply["text"]) for reply in recorded.get("replies", [])]
+        return cls(recorded.get("default", CANNED_ITINERARY), first_token_delay=first_token_delay,
+                   replies=replies, **kwargs)
+
+    def _prefill(self, contents):
+        prompt = contents if isinstance(contents, str) else str(contents or "")
+        return _seconds(self.first_token_delay) + self.prompt_token_delay * len(prompt) / 4
+
+    def _reply(self, contents):
+        prompt = contents if isinstance(contents, str) else str(contents or "")
+        for match, text in self.replies:
+            if match in prompt:
+                return text
+        return self.text
+
+    def _chunks(self, text=None):
+        text = self.text if text is None else text
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+
+class Latency:
+    """
+    A response-time distribution, parsed from specs like:
+
+        fixed:0.2             always 0.2 s
+        uniform:0.1:0.5       uniform between 0.1 and 0.5 s
+        lognormal:0.3:0.5     median 0.3 s, sigma 0.5 (long right tail, like real APIs)
+
+    Calling the instance draws one sample in seconds.
+    """
+
+    def __init__(self, kind="fixed", a=0.0, b=0.0, seed=None):
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind, self.a, self.b = kind, a, b
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec, seed=None):
+        kind, *params = (spec or "fixed:0").strip().split(":")
+        values = [float(p) for p in params] + [0.0, 0.0]
+        return cls(kind.lower(), values[0], values[1], seed=seed)
+
+    def __call__(self):
+        if self.kind == "uniform":
+            return self._random.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return self.a * self._random.lognormvariate(0.0, self.b) if self.a > 0 else 0.0
+        return self.a
+
+    def __repr__(self):
+        return f"Latency({self.kind}:{self.a:g}:{self.b:g})"
+
+
+def _seconds(delay):
+    return delay() if callable(delay) else delay
+
+
+def _load_fixture(fixtures_dir, name):
+    with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _FakeAmadeusResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Endpoint:
+    def __init__(self, handler):
+        self.get = handler
+
+
+class _Namespace:
+    def __init__(self, **children):
+        self.__dict__.update(children)
+
+
+class FakeAmadeusClient:
+    """
+    Mimics the two Amadeus SDK endpoints the planner calls, replaying recorded
+    responses from `flight_offers.json` and `hotels.json` in `fixtures_dir`.
+
+    Recorded offers are re-targeted to the requested route and date so every
+    search returns plausible data; each call sleeps one `latency` sample.
+    """
+
+    def __init__(self, fixtures_dir, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        # Keep the recordings as JSON text: decoding per call hands out fresh copies
+        self._flights = json.dumps(_load_fixture(fixtures_dir, "flight_offers.json"))
+        self._hotels = json.dumps(_load_fixture(fixtures_dir, "hotels.json"))
+        self.shopping = _Namespace(flight_offers_search=_Endpoint(self._search_flights))
+        self.reference_data = _Namespace(locations=_Namespace(
+            hotels=_Namespace(by_city=_Endpoint(self._hotels_by_city))
+        ))
+
+    def _wait(self):
+        self.calls += 1
+        time.sleep(_seconds(self.latency))
+
+    def _search_flights(self, originLocationCode, destinationLocationCode, departureDate, adults=1, max=250, **params):
+        self._wait()
+        offers = json.loads(self._flights)[:int(max)]
+        for offer in offers:
+            segments = offer["itineraries"][0]["segments"]
+            segments[0]["departure"]["iataCode"] = originLocationCode
+            segments[-1]["arrival"]["iataCode"] = destinationLocationCode
+            try:
+                shift = date.fromisoformat(departureDate) - date.fromisoformat(segments[0]["departure"]["at"][:10])
+            except ValueError:
+                continue
+            for segment in segments:
+                for side in ("departure", "arrival"):
+                    segment[side]["at"] = (datetime.fromisoformat(segment[side]["at"]) + shift).isoformat()
+        return _FakeAmadeusResponse(offers)
+
+    def _hotels_by_city(self, cityCode, **params):
+        self._wait()
+        hotels = json.loads(self._hotels)
+        for hotel in hotels:
+            hotel["iataCode"] = cityCode
+        return _FakeAmadeusResponse(hotels)
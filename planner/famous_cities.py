@@ -0,0 +1,121 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import DEFAULT_MODEL, FAMOUS_CITIES_TTL, FAMOUS_CITIES_RETRY_TTL
+from planner.cache import MISSING, get_cache
+from planner.clients import GEMINI_UPSTREAM, get_genai_client
+from planner.metrics import timed
+
+TOP_K = 12
+
+# LLM-curated lists per country; an empty list marks a failed refresh until it is retried
+_cache = get_cache("famous_cities", ttl=FAMOUS_CITIES_TTL)
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="famous-cities")
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def rank_top_cities(country_to_cities, freq, k=TOP_K):
+    """Per country, the k cities with the most airports (ties alphabetical), ready to serve."""
+    top = {}
+    for country, cities in country_to_cities.items():
+        ranked = sorted(cities, key=lambda city: (-freq.get((country, city), 0), city))
+        top[country] = ranked[:k]
+    return top
+
+
+def parse_city_list(text):
+    """Best-effort parse of an LLM answer into a clean, deduplicated list of names."""
+    text = (text or "").strip()
+
+    # Normalize common code-fence formats from LLM output
+    if text.startswith("```"):
+        # Strip the first fence line and any trailing fence
+        lines = text.splitlines()
+        # drop first line like ```json
+        if lines:
+            lines = lines[1:]
+        # remove trailing ``` if present
+        if lines and lines[-1].strip().startswith("```"):
+            lines = lines[:-1]
+        text = "\n".join(lines).strip()
+
+    # Best-effort: ensure we return a JSON array
+    cities = []
+    try:
+        # Try to parse direct JSON or extract array by brackets
+        if not (text.startswith("[") and text.endswith("]")):
+            # Find first '[' and last ']'
+            start = text.find("[")
+            end = text.rfind("]")
+            if start != -1 and end != -1 and end > start:
+                text_candidate = text[start:end+1]
+            else:
+                text_candidate = text
+        else:
+            text_candidate = text
+
+        cities = json.loads(text_candidate)
+        if not isinstance(cities, list):
+            cities = []
+    except Exception:
+        # Fallback: try to extract lines
+        for line in text.splitlines():
+            line = line.strip("- •* \t\n\r ")
+            if line and not line.startswith("[") and not line.startswith("`") and line.lower() != "json":
+                cities.append(line)
+
+    # Clean and dedupe
+    cleaned = []
+    seen = set()
+    for c in cities:
+        name = str(c).strip()
+        if name and name not in seen:
+            seen.add(name)
+            cleaned.append(name)
+    return cleaned
+
+
+@timed("gemini.famous_cities")
+def ask_llm(country, valid):
+    """Ask the LLM for famous cities, keeping only exact city names from the IATA dataset."""
+    prompt = f"""
+You are a travel data assistant. List the most famous cities in the country: {country}.
+Return ONLY a JSON array of city names, no explanations. Limit to 8-12 items, diverse across regions.
+Examples: ["Paris", "Lyon", "Nice"]
+"""
+    response = GEMINI_UPSTREAM.call(
+        get_genai_client().models.generate_content,
+        model=DEFAULT_MODEL,
+        contents=prompt
+    )
+    curated = [name for name in parse_city_list(response.text) if name in valid][:TOP_K]
+    _cache.set(country, curated, ttl=None if curated else FAMOUS_CITIES_RETRY_TTL)
+    return curated
+
+
+def cached_curated(country):
+    """The cached LLM list for a country ([] after a failed refresh), or None if absent/expired."""
+    curated = _cache.get(country)
+    return None if curated is MISSING else curated
+
+
+def _refresh(country, valid):
+    try:
+        ask_llm(country, valid)
+    except Exception as e:
+        print(f"Famous cities refresh failed for {country}: {e}")
+        _cache.set(country, [], ttl=FAMOUS_CITIES_RETRY_TTL)
+    finally:
+        with _pending_lock:
+            _pending.discard(country)
+
+
+def schedule_refresh(country, valid):
+    """Refresh a country's curated list in the background; at most one refresh per country at a time."""
+    with _pending_lock:
+        if country in _pending:
+            return
+        _pending.add(country)
+    _refresh_pool.submit(_refresh, country, valid)
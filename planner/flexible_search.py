@@ -0,0 +1,122 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from config.settings import FLEX_CONCURRENCY, FLEX_DEADLINE, FLEX_MAX_DAYS, FLIGHT_FETCH_SIZE
+from planner.flight_api import search_flights
+from planner.fx import cross_rate, get_rate_table
+from planner.metrics import timed
+from planner.offers import FlightOffer, top_offers
+from planner.orchestrator import Call, fan_out
+
+# Bounds how many flexible-search lookups run at once in this process, across all requests;
+# the Amadeus rate limit in planner/clients.py still applies to each of them
+_EXECUTOR = ThreadPoolExecutor(max_workers=FLEX_CONCURRENCY, thread_name_prefix="flex-search")
+
+
+def date_window(start_date, days):
+    """ISO dates from `start_date` for `days` days (1..FLEX_MAX_DAYS); ValueError on a bad date."""
+    first = date.fromisoformat(start_date)
+    days = max(1, min(int(days), FLEX_MAX_DAYS))
+    return [(first + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+
+def summarize_offer(offer, price, currency):
+    """The fields a price calendar shows for one FlightOffer."""
+    return {
+        "id": offer.id,
+        "price": round(price, 2),
+        "currency": currency,
+        "origin": offer.origin,
+        "destination": offer.destination,
+        "departure": offer.departure_at,
+        "arrival": offer.arrival_at,
+        "stops": offer.stops,
+        "carriers": offer.carriers,
+        "duration_minutes": offer.duration_minutes,
+    }
+
+
+def _priced(offers, rates, currency):
+    # (price in `currency`, FlightOffer) for every offer that converts; None picks the first offer's currency
+    priced = []
+    for offer in offers:
+        currency = currency or offer.currency
+        rate = cross_rate(rates, offer.currency, currency) if offer.currency else None
+        if rate is not None:
+            priced.append((offer.price * rate, offer))
+    return priced, currency
+
+
+def price_calendar(results, dates, currency=None, per_day=3):
+    """
+    Merge per-(route, date) offer lists into one calendar.
+
+    `results` maps (origin, destination, date) to a list of FlightOffers (or None
+    for a failed lookup). Each day lists its `per_day` cheapest offers across
+    every route, with prices converted to `currency`.
+    """
+    _, rates = get_rate_table()
+    by_day = {day: [] for day in dates}
+    failed = {day: 0 for day in dates}
+    for (_, _, day), offers in results.items():
+        if offers is None:
+            failed[day] += 1
+            continue
+        priced, currency = _priced(offers, rates, currency)
+        by_day[day].extend(priced)
+
+    calendar = []
+    for day in dates:
+        cheapest = heapq.nsmallest(per_day, by_day[day], key=lambda pair: pair[0])
+        calendar.append({
+            "date": day,
+            "cheapest": round(cheapest[0][0], 2) if cheapest else None,
+            "offers": [summarize_offer(offer, price, currency) for price, offer in cheapest],
+            "complete": not failed[day],
+        })
+    return calendar, currency
+
+
+@timed("upstream.flexible")
+def flexible_search(origins, destinations, start_date, days=7, adults=1, max_results=5,
+                    per_day=3, currency=None, flight_search=None, deadline=FLEX_DEADLINE):
+    """
+    Cheapest flights per day over a date window, across every origin/destination pair.
+
+    Each (route, date) search goes through the cached `search_flights` with
+    the same FLIGHT_FETCH_SIZE as the plan page, so repeated or overlapping
+    windows, and routes already planned, only hit Amadeus for dates not yet
+    seen; the `max_results` best offers of each search are kept.
+    Searches that miss the deadline are reported in `missed` as
+    "ORIGIN-DESTINATION-DATE" and leave their day marked incomplete.
+    """
+    flight_search = flight_search or search_flights
+    dates = date_window(start_date, days)
+    routes = [(origin, destination) for origin in origins for destination in destinations if origin != destination]
+
+    searches = {
+        f"{origin}-{destination}-{day}": (origin, destination, day)
+        for origin, destination in routes for day in dates
+    }
+    calls = {
+        name: Call(flight_search, origin, destination, day, adults=adults,
+                   max_results=max(max_results, FLIGHT_FETCH_SIZE))
+        for name, (origin, destination, day) in searches.items()
+    }
+    results, missed = fan_out(calls, deadline=deadline, executor=_EXECUTOR, stage="flexible")
+    offers = {
+        searches[name]: None if found is None else top_offers(map(FlightOffer.from_dict, found), max_results)
+        for name, found in results.items()
+    }
+    calendar, currency = price_calendar(offers, dates, currency=currency, per_day=per_day)
+
+    priced_days = [entry for entry in calendar if entry["cheapest"] is not None]
+    return {
+        "origins": list(origins),
+        "destinations": list(destinations),
+        "currency": currency,
+        "calendar": calendar,
+        "cheapest_date": min(priced_days, key=lambda entry: entry["cheapest"])["date"] if priced_days else None,
+        "missed": missed,
+    }
@@ -1,21 +1,39 @@
-from amadeus import Client, ResponseError
-from config.settings import AMADUES_CLIENT_ID, AMADUES_CLIENT_SECRET
+from config.settings import FLIGHT_CACHE_TTL
+from planner.cache import get_cache, make_key
+from planner.clients import AMADEUS_UPSTREAM, amadeus_request, get_amadeus_client
+from planner.metrics import timed
+from planner.offers import parse_offers
+
+_cache = get_cache("flights", ttl=FLIGHT_CACHE_TTL)
+
+
+def _flight_key(origin, destination, departure_date, adults=1, max_results=5):
+    return make_key(origin, destination, departure_date, int(adults), int(max_results))
+
+
+@_cache.memoize(_flight_key)
+@timed("amadeus.flights")
+def _fetch_flights(origin, destination, departure_date, adults=1, max_results=5):
+    response = amadeus_request(
+        get_amadeus_client().shopping.flight_offers_search.get, "amadeus.flights",
+        originLocationCode=origin,
+        destinationLocationCode=destination,
+        departureDate=departure_date,
+        adults=adults,
+        max=max_results
+    )
+    # Normalize once here, so the cache holds compact offers rather than raw payloads
+    return [offer.to_dict() for offer in parse_offers(response.data)]
 
-amadeus = Client(
-    client_id=AMADUES_CLIENT_ID,
-    client_secret=AMADUES_CLIENT_SECRET,
-)
 
 def search_flights(origin, destination, departure_date, adults=1, max_results=5):
-    try:
-        response = amadeus.shopping.flight_offers_search.get(
-            originLocationCode=origin,
-            destinationLocationCode=destination,
-            departureDate=departure_date,
-            adults=adults,
-            max=max_results
-        )
-        return response.data
-    except ResponseError as error:
-        print(f"Flight API error: {error}")
-        return None
+    """
+    Flight offers as FlightOffer dicts (see planner/offers.py). While Amadeus
+    is failing or slow, the last good offers for the same search are served
+    instead; None if there are none.
+    """
+    key = "flights|" + _flight_key(origin, destination, departure_date, adults, max_results)
+    return AMADEUS_UPSTREAM.serve(
+        key, _fetch_flights, origin, destination, departure_date, adults=adults, max_results=max_results,
+        stage="amadeus.flights",
+    )
@@ -0,0 +1,104 @@
+import json
+
+from config.settings import FX_PROVIDER, FX_RATES_PATH, FX_CACHE_TTL
+from planner.cache import MISSING, get_cache
+from planner.metrics import count_error, timed
+
+_cache = get_cache("fx", ttl=FX_CACHE_TTL)
+
+
+class JsonRatesProvider:
+    """
+    Rates from a local JSON table: {"base": "USD", "rates": {"EUR": 0.86, ...}}.
+
+    Each rate is the amount of that currency per one unit of the base, so
+    N currencies need only N entries.
+    """
+
+    name = "json"
+
+    def __init__(self, path=FX_RATES_PATH):
+        self.path = path
+
+    def fetch_rates(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        base = table["base"].upper()
+        rates = {code.upper(): float(rate) for code, rate in table["rates"].items() if float(rate) > 0}
+        rates[base] = 1.0
+        return base, rates
+
+
+_PROVIDERS = {
+    JsonRatesProvider.name: JsonRatesProvider,
+}
+
+
+def register_provider(cls):
+    """Make a provider class selectable through the FX_PROVIDER setting."""
+    _PROVIDERS[cls.name] = cls
+    return cls
+
+
+def get_provider():
+    return _PROVIDERS[FX_PROVIDER]()
+
+
+def get_rate_table():
+    """Return (base, rates) from the shared cache, refreshing from the provider after FX_CACHE_TTL."""
+    provider = get_provider()
+    cached = _cache.get(provider.name)
+    if cached is not MISSING:
+        return cached["base"], cached["rates"]
+    base, rates = provider.fetch_rates()
+    _cache.set(provider.name, {"base": base, "rates": rates})
+    return base, rates
+
+
+def cross_rate(rates, from_code, to_code):
+    """Triangulate through the base currency; None if either side is unknown."""
+    from_code, to_code = from_code.upper(), to_code.upper()
+    if from_code == to_code:
+        return 1.0
+    if from_code not in rates or to_code not in rates:
+        return None
+    return rates[to_code] / rates[from_code]
+
+
+def get_rate(from_code, to_code):
+    if not from_code or not to_code or from_code.upper() == to_code.upper():
+        return 1.0
+    _, rates = get_rate_table()
+    return cross_rate(rates, from_code, to_code)
+
+
+@timed("fx")
+def convert_flight_prices(flights, target_code, label):
+    """
+    Set converted_price / converted_currency on every FlightOffer in one pass.
+
+    The rate table is read once for the whole batch. Offers in an unknown
+    currency, or that cannot be converted, are left with only their original
+    price; a conversion problem never fails the plan.
+    """
+    if not flights:
+        return flights
+    try:
+        _, rates = get_rate_table()
+    except Exception as e:
+        print(f"Exchange rates unavailable, showing original prices: {e}")
+        count_error("fx")
+        return flights
+    for f in flights:
+        try:
+            if not f.currency:
+                continue
+            rate = cross_rate(rates, f.currency, target_code)
+            if rate is None:
+                continue
+            f.converted_price = f"{f.price * rate:.2f}"
+            f.converted_currency = label
+        except Exception as e:
+            print(f"Could not convert the price of flight offer {getattr(f, 'id', '?')}: {e}")
+            count_error("fx")
+    return flights
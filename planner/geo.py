@@ -0,0 +1,119 @@
+import heapq
+import math
+from array import array
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def to_xyz(lat, lon):
+    """Point on the unit sphere; straight-line (chord) distance orders points like great-circle distance."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+def _chord_to_km(chord_sq):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_sq) / 2))
+
+
+def _km_to_chord_sq(km):
+    return (2 * math.sin(min(km, math.pi * EARTH_RADIUS_KM) / (2 * EARTH_RADIUS_KM))) ** 2
+
+
+def build_kdtree(points):
+    """
+    Lay out `points` ((row, lat, lon) tuples) as an implicit k-d tree over
+    their unit-sphere coordinates.
+
+    The node for range [lo, hi) sits at its midpoint, split on the axis
+    stored there; the left half holds smaller values on that axis. Returns
+    (rows, xyz, axes) arrays ready to store in the IATA artifact.
+    """
+    nodes = [(row, to_xyz(lat, lon)) for row, lat, lon in points]
+
+    axes = array("B", bytes(len(nodes)))
+    stack = [(0, len(nodes))]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo <= 0:
+            continue
+        part = nodes[lo:hi]
+        spreads = [max(p[1][a] for p in part) - min(p[1][a] for p in part) for a in range(3)]
+        axis = spreads.index(max(spreads))
+        part.sort(key=lambda p: p[1][axis])
+        nodes[lo:hi] = part
+        mid = (lo + hi) // 2
+        axes[mid] = axis
+        stack.append((lo, mid))
+        stack.append((mid + 1, hi))
+
+    rows = array("I", (row for row, _ in nodes))
+    xyz = array("f", (c for _, point in nodes for c in point))
+    return rows, xyz, axes
+
+
+class AirportIndex:
+    """Nearest-K and radius queries over the k-d tree stored in the IATA artifact."""
+
+    def __init__(self, dataset):
+        self._data = dataset
+        self._rows, self._xyz, self._axes = dataset.kdtree()
+
+    def _search(self, lat, lon, limit_sq, k=None):
+        # (chord², row) pairs within limit_sq; with k, only the k closest
+        qx, qy, qz = q = to_xyz(lat, lon)
+        xyz, axes, rows = self._xyz, self._axes, self._rows
+        best = []  # max-heap of (-chord², row) when k is set
+        found = []
+        bound = limit_sq
+        # (lo, hi, squared distance from the query to the splitting plane that separates the range)
+        stack = [(0, len(rows), 0.0)]
+        while stack:
+            lo, hi, plane_sq = stack.pop()
+            if lo >= hi or plane_sq > bound:
+                continue
+            mid = (lo + hi) // 2
+            base = mid * 3
+            dx, dy, dz = qx - xyz[base], qy - xyz[base + 1], qz - xyz[base + 2]
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq <= bound:
+                if k is None:
+                    found.append((dist_sq, rows[mid]))
+                else:
+                    heapq.heappush(best, (-dist_sq, rows[mid]))
+                    if len(best) > k:
+                        heapq.heappop(best)
+                    if len(best) == k:
+                        bound = -best[0][0]
+            axis = axes[mid]
+            diff = q[axis] - xyz[base + axis]
+            if diff < 0:
+                stack.append((mid + 1, hi, diff * diff))
+                stack.append((lo, mid, 0.0))
+            else:
+                stack.append((lo, mid, diff * diff))
+                stack.append((mid + 1, hi, 0.0))
+        if k is not None:
+            found = [(-neg, row) for neg, row in best]
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k=1, max_km=None):
+        """The k airports closest to (lat, lon) as (distance_km, row), nearest first."""
+        limit_sq = 4.0 if max_km is None else _km_to_chord_sq(max_km)
+        return [(_chord_to_km(dist_sq), row) for dist_sq, row in self._search(lat, lon, limit_sq, k=k)]
+
+    def within(self, lat, lon, radius_km, limit=None):
+        """Airports within `radius_km` of (lat, lon) as (distance_km, row), nearest first."""
+        found = self._search(lat, lon, _km_to_chord_sq(radius_km))
+        if limit is not None:
+            found = found[:limit]
+        return [(_chord_to_km(dist_sq), row) for dist_sq, row in found]
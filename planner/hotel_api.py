@@ -1,16 +1,20 @@
-from amadeus import Client, ResponseError
-from config.settings import AMADUES_CLIENT_ID, AMADUES_CLIENT_SECRET
+from config.settings import HOTEL_CACHE_TTL
+from planner.cache import get_cache, make_key
+from planner.clients import AMADEUS_UPSTREAM, amadeus_request, get_amadeus_client
+from planner.metrics import timed
 
-amadeus = Client(
-    client_id=AMADUES_CLIENT_ID,
-    client_secret=AMADUES_CLIENT_SECRET,
-)
+_cache = get_cache("hotels", ttl=HOTEL_CACHE_TTL)
 
-def get_hotels_by_city(city_code):
-    try:
-        response = amadeus.reference_data.locations.hotels.by_city.get(cityCode=city_code)
-        return response.data
-    except ResponseError as error:
-        print(f"Error fetching hotels by city: {error}")
-        return None
 
+@_cache.memoize(lambda city_code: make_key(city_code))
+@timed("amadeus.hotels")
+def _fetch_hotels(city_code):
+    response = amadeus_request(
+        get_amadeus_client().reference_data.locations.hotels.by_city.get, "amadeus.hotels", cityCode=city_code
+    )
+    return response.data
+
+
+def get_hotels_by_city(city_code):
+    """Hotels in a city; the last good list while Amadeus is failing or slow, or None if there is none."""
+    return AMADEUS_UPSTREAM.serve("hotels|" + make_key(city_code), _fetch_hotels, city_code, stage="amadeus.hotels")
@@ -0,0 +1,521 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+import sys
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+
+from config.settings import IATA_KEEP_VERSIONS, IATA_RELOAD_INTERVAL
+from planner.geo import build_kdtree
+
+# Compact, memory-mappable form of iata_codes_full.json.
+#
+# Layout: MAGIC | u32 header length | JSON header | 8-byte aligned sections.
+# Every string (values, lowercased keys, name trigrams) is stored once in a
+# string table; columns and indexes are native uint32 arrays of string ids
+# or row numbers, read straight out of the mapping without copying, so
+# forked workers share the pages. Coordinates are float32 columns (NaN when
+# unknown) plus a k-d tree over the airports that have them; "places" are
+# towns without an airport of their own, kept only for their coordinates.
+#
+# Refreshes publish each build as an immutable file named after its content
+# hash in iata_versions/, then point manifest.json at it. Running processes
+# poll the manifest and swap the new version in (watch_dataset); a file that
+# is still mapped by an old process is never rewritten.
+#
+# The header records a hash of the JSON files an artifact was built from;
+# open_dataset rebuilds an artifact whose source files have changed since.
+
+MAGIC = b"IATABIN1"
+FORMAT_VERSION = 2
+COLUMNS = ("city", "country", "iata", "name")
+NGRAM_SIZE = 3
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(base_dir, "iata_codes_full.json")
+PLACES_PATH = os.path.join(base_dir, "iata_places.json")
+BIN_PATH = os.path.join(base_dir, "iata_codes.bin")
+VERSIONS_DIR = os.path.join(base_dir, "iata_versions")
+MANIFEST_PATH = os.path.join(VERSIONS_DIR, "manifest.json")
+
+
+def ngrams(text, n=NGRAM_SIZE):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _hash(key):
+    # Stable across processes and Python versions, unlike hash()
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def _hash_table(keys):
+    """Open-addressing table: slot -> 1 + position in `keys`, 0 when empty."""
+    size = 1
+    while size < len(keys) * 2:
+        size *= 2
+    table = array("I", bytes(4 * size))
+    for position, key in enumerate(keys):
+        slot = _hash(key) & (size - 1)
+        while table[slot]:
+            slot = (slot + 1) & (size - 1)
+        table[slot] = position + 1
+    return table
+
+
+def _coordinate(entry, key):
+    value = entry.get(key)
+    return math.nan if value is None else float(value)
+
+
+def source_digest(json_path=JSON_PATH, places_path=PLACES_PATH):
+    """sha256 over the dataset's JSON files, as recorded in the artifacts built from them."""
+    digest = hashlib.sha256()
+    for path in (json_path, places_path):
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_artifact(records, places=(), source=None):
+    """
+    Serialize airport dicts (and optional place dicts) into the binary artifact
+    format; `source` is the source_digest() of the files they were read from.
+    """
+    strings = {}
+
+    def intern(value):
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    columns = {name: array("I", (intern(entry.get(name, "")) for entry in records)) for name in COLUMNS}
+    city_lower = [entry.get("city", "").lower() for entry in records]
+    name_lower = [entry.get("name", "").lower() for entry in records]
+    columns["name_lower"] = array("I", (intern(value) for value in name_lower))
+
+    # Exact/prefix city index: sorted distinct lowercased cities with their first row,
+    # plus a sparse table of range minimums over those rows
+    first_row = {}
+    for row, key in enumerate(city_lower):
+        first_row.setdefault(key, row)
+    city_keys = sorted(first_row)
+    levels = [[first_row[key] for key in city_keys]]
+    width = 1
+    while width * 2 <= len(levels[0]):
+        prev = levels[-1]
+        levels.append([min(prev[i], prev[i + width]) for i in range(len(prev) - width)])
+        width *= 2
+
+    # Airport name trigram -> ascending rows, stored CSR-style
+    postings = {}
+    for row, name in enumerate(name_lower):
+        for gram in ngrams(name):
+            postings.setdefault(gram, []).append(row)
+    gram_keys = sorted(postings)
+    gram_offsets = array("I", [0])
+    gram_rows = array("I")
+    for gram in gram_keys:
+        gram_rows.extend(postings[gram])
+        gram_offsets.append(len(gram_rows))
+
+    # Coordinates, and a k-d tree over the airports that have them
+    lat = array("f", (_coordinate(entry, "lat") for entry in records))
+    lon = array("f", (_coordinate(entry, "lon") for entry in records))
+    kd_rows, kd_xyz, kd_axes = build_kdtree(
+        (row, entry["lat"], entry["lon"]) for row, entry in enumerate(records)
+        if entry.get("lat") is not None and entry.get("lon") is not None
+    )
+
+    # Places: first entry per lowercased town name not already an airport city
+    place_first = {}
+    for place in places:
+        key = place.get("city", "").strip().lower()
+        if key and key not in first_row and key not in place_first:
+            place_first[key] = place
+    place_keys = list(place_first)
+
+    sections = dict(columns)
+    sections["lat"] = lat
+    sections["lon"] = lon
+    sections["kd_rows"] = kd_rows
+    sections["kd_xyz"] = kd_xyz
+    sections["kd_axes"] = kd_axes
+    sections["place_keys"] = array("I", (intern(key) for key in place_keys))
+    sections["place_hash"] = _hash_table(place_keys)
+    sections["place_lat"] = array("f", (float(place_first[key]["lat"]) for key in place_keys))
+    sections["place_lon"] = array("f", (float(place_first[key]["lon"]) for key in place_keys))
+    sections["city_keys"] = array("I", (intern(key) for key in city_keys))
+    sections["city_hash"] = _hash_table(city_keys)
+    sections["city_min"] = array("I", (value for level in levels for value in level))
+    sections["gram_keys"] = array("I", (intern(gram) for gram in gram_keys))
+    sections["gram_hash"] = _hash_table(gram_keys)
+    sections["gram_offsets"] = gram_offsets
+    sections["gram_rows"] = gram_rows
+
+    # String table last, once every string is interned
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = array("I", [0])
+    for blob in encoded:
+        string_offsets.append(string_offsets[-1] + len(blob))
+    sections["string_offsets"] = string_offsets
+    sections["string_blob"] = b"".join(encoded)
+
+    layout = {}
+    chunks = []
+    offset = 0
+    for name, data in sections.items():
+        raw = data.tobytes() if isinstance(data, array) else data
+        layout[name] = [offset, len(raw)]
+        padding = -len(raw) % 8
+        chunks.append(raw + b"\0" * padding)
+        offset += len(raw) + padding
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": len(records),
+        "source": source,
+        "strings": len(encoded),
+        "city_min_levels": [len(level) for level in levels],
+        "sections": layout,
+    }).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+    return MAGIC + len(header).to_bytes(4, "little") + header + b"".join(chunks)
+
+
+def _write_atomic(path, data):
+    # Write-then-rename so readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_artifact(records, path=BIN_PATH, places=(), source=None):
+    _write_atomic(path, build_artifact(records, places, source))
+    return path
+
+
+def read_manifest(path=MANIFEST_PATH):
+    """The currently published version (a dict), or None before the first publish."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def publish_artifact(records, places=(), summary=None, versions_dir=VERSIONS_DIR, bin_path=BIN_PATH,
+                     keep=IATA_KEEP_VERSIONS, source=None):
+    """
+    Publish `records` as a new dataset version and return its manifest.
+
+    The artifact is written under a name derived from its content, then the
+    manifest is switched to it; that rename is the commit point running
+    processes watch for. `bin_path` (the artifact new processes map) gets the
+    same bytes. Publishing unchanged data returns the current manifest. Only
+    the `keep` newest versions' files are kept. `source` is as for
+    build_artifact().
+    """
+    blob = build_artifact(records, places, source)
+    digest = hashlib.sha256(blob).hexdigest()
+    manifest_path = os.path.join(versions_dir, "manifest.json")
+    current = read_manifest(manifest_path)
+    if current and current["sha256"] == digest:
+        return current
+
+    version = digest[:12]
+    os.makedirs(versions_dir, exist_ok=True)
+    _write_atomic(os.path.join(versions_dir, f"iata_codes-{version}.bin"), blob)
+    if bin_path:
+        _write_atomic(bin_path, blob)
+    previous = [current["version"]] + current.get("previous", []) if current else []
+    manifest = {
+        "version": version,
+        "artifact": f"iata_codes-{version}.bin",
+        "sha256": digest,
+        "rows": len(records),
+        "published_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **(summary or {}),
+        "previous": previous[:max(keep - 1, 0)],
+    }
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    # Older versions' files (artifact and diff); processes still mapping one keep their pages
+    kept = {version, *manifest["previous"]}
+    for name in os.listdir(versions_dir):
+        if name.startswith("iata_codes-") and name.split("-", 1)[1].split(".", 1)[0] not in kept:
+            os.remove(os.path.join(versions_dir, name))
+    return manifest
+
+
+class _StringView:
+    """Sequence of strings addressed by an id array; supports len(), [] and bisect."""
+
+    def __init__(self, dataset, ids):
+        self._dataset = dataset
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        return self._dataset.string(self._ids[index])
+
+
+class IataDataset:
+    """Read-only view over an artifact held in a bytes object or an mmap."""
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not an IATA artifact")
+        header_len = int.from_bytes(view[len(MAGIC):len(MAGIC) + 4], "little")
+        body_start = len(MAGIC) + 4 + header_len
+        header = json.loads(bytes(view[len(MAGIC) + 4:body_start]))
+        if header["version"] != FORMAT_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError("incompatible IATA artifact")
+
+        self._buffer = buffer
+        self.rows = header["rows"]
+        self.source = header.get("source")
+        self.version = None  # manifest version, when opened through one
+
+        def section(name, fmt="I"):
+            offset, length = header["sections"][name]
+            raw = view[body_start + offset:body_start + offset + length]
+            return raw.cast(fmt) if fmt != "B" else raw
+
+        self._columns = {name: section(name) for name in COLUMNS + ("name_lower",)}
+        self._string_offsets = section("string_offsets")
+        self._string_blob = section("string_blob", "B")
+        self._decoded = [None] * header["strings"]
+
+        self.city_keys = _StringView(self, section("city_keys"))
+        self._city_hash = section("city_hash")
+        city_min = section("city_min")
+        self.city_min_levels = []
+        start = 0
+        for length in header["city_min_levels"]:
+            self.city_min_levels.append(city_min[start:start + length])
+            start += length
+        self.gram_keys = _StringView(self, section("gram_keys"))
+        self._gram_hash = section("gram_hash")
+        self._gram_offsets = section("gram_offsets")
+        self._gram_rows = section("gram_rows")
+
+        self._lat = section("lat", "f")
+        self._lon = section("lon", "f")
+        self._kdtree = (section("kd_rows"), section("kd_xyz", "f"), section("kd_axes", "B"))
+        self.place_keys = _StringView(self, section("place_keys"))
+        self._place_hash = section("place_hash")
+        self._place_lat = section("place_lat", "f")
+        self._place_lon = section("place_lon", "f")
+
+    def string(self, string_id):
+        value = self._decoded[string_id]
+        if value is None:
+            start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+            value = self._decoded[string_id] = str(self._string_blob[start:end], "utf-8")
+        return value
+
+    def value(self, column, row):
+        return self.string(self._columns[column][row])
+
+    def column(self, column):
+        """All values of a column, in row order."""
+        return _StringView(self, self._columns[column])
+
+    def coordinates(self, row):
+        """(lat, lon) of a row, or None when the dataset has no coordinates for it."""
+        lat, lon = self._lat[row], self._lon[row]
+        if math.isnan(lat) or math.isnan(lon):
+            return None
+        return lat, lon
+
+    def records(self):
+        """Iterate rows as dicts shaped like the iata_codes_full.json entries."""
+        for row in range(self.rows):
+            record = {name: self.value(name, row) for name in COLUMNS}
+            coordinates = self.coordinates(row)
+            record["lat"], record["lon"] = coordinates if coordinates else (None, None)
+            yield record
+
+    def kdtree(self):
+        """(rows, xyz, axes) of the implicit k-d tree built by planner.geo.build_kdtree."""
+        return self._kdtree
+
+    def find_place(self, city_lower):
+        """(lat, lon) of a town without its own airport, or None."""
+        index = self._find(self._place_hash, self.place_keys, city_lower)
+        if index < 0:
+            return None
+        return self._place_lat[index], self._place_lon[index]
+
+    @staticmethod
+    def _find(table, keys, key):
+        # Position of `key` in `keys` via its hash table, or -1
+        mask = len(table) - 1
+        slot = _hash(key) & mask
+        while table[slot]:
+            position = table[slot] - 1
+            if keys[position] == key:
+                return position
+            slot = (slot + 1) & mask
+        return -1
+
+    def find_city(self, city_lower):
+        """Position of an exact lowercased city in city_keys, or -1."""
+        return self._find(self._city_hash, self.city_keys, city_lower)
+
+    def city_first_row(self, lo, hi):
+        """Earliest row among city_keys[lo:hi] (sparse-table range minimum)."""
+        level = (hi - lo).bit_length() - 1
+        table = self.city_min_levels[level]
+        return min(table[lo], table[hi - (1 << level)])
+
+    def gram_postings(self, gram):
+        """Ascending rows whose lowercased airport name contains `gram`, or None."""
+        index = self._find(self._gram_hash, self.gram_keys, gram)
+        if index < 0:
+            return None
+        return self._gram_rows[self._gram_offsets[index]:self._gram_offsets[index + 1]]
+
+
+def _map_file(path):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_places(path=PLACES_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def open_dataset(bin_path=BIN_PATH, json_path=JSON_PATH, places_path=PLACES_PATH):
+    """
+    Map the binary artifact, or rebuild it from the JSON files when it is
+    missing, was built for another format/platform, or was built from other
+    versions of the JSON files. The rebuilt artifact is written back to
+    `bin_path` when that is possible, and used from memory when it is not.
+    """
+    source = source_digest(json_path, places_path)
+    try:
+        dataset = IataDataset(_map_file(bin_path))
+        if dataset.source == source:
+            return dataset
+    except (OSError, ValueError):
+        pass
+    with open(json_path, "r", encoding="utf-8") as f:
+        blob = build_artifact(json.load(f), load_places(places_path), source)
+    try:
+        _write_atomic(bin_path, blob)
+    except OSError as e:
+        print(f"Could not rewrite {bin_path}: {e}")
+    return IataDataset(blob)
+
+
+def open_version(manifest, versions_dir=VERSIONS_DIR):
+    """Map the artifact a manifest points to, after checking it against the manifest's hash."""
+    path = os.path.join(versions_dir, manifest["artifact"])
+    buffer = _map_file(path)
+    if hashlib.sha256(buffer).hexdigest() != manifest["sha256"]:
+        raise ValueError(f"{path} does not match the manifest")
+    dataset = IataDataset(buffer)
+    dataset.version = manifest["version"]
+    return dataset
+
+
+_DATASET = None
+
+
+def open_current(manifest_path=MANIFEST_PATH, bin_path=BIN_PATH, json_path=JSON_PATH, places_path=PLACES_PATH):
+    """
+    The published version when it was built from the current JSON files,
+    else open_dataset(): JSON files edited since the last publish win over
+    the manifest until they are published.
+    """
+    manifest = read_manifest(manifest_path)
+    try:
+        dataset = open_version(manifest, os.path.dirname(manifest_path)) if manifest else None
+    except (OSError, ValueError):
+        dataset = None
+    if dataset is not None and dataset.source != source_digest(json_path, places_path):
+        print(f"IATA dataset version {dataset.version} was not built from the current "
+              f"{os.path.basename(json_path)}; loading the JSON files instead (republish to fix)")
+        dataset = None
+    return dataset if dataset is not None else open_dataset(bin_path, json_path, places_path)
+
+
+def load_dataset():
+    """The process-wide dataset shared by every consumer (see open_current)."""
+    global _DATASET
+    if _DATASET is None:
+        _DATASET = open_current()
+    return _DATASET
+
+
+def reload_dataset(on_change=None, manifest_path=MANIFEST_PATH, json_path=JSON_PATH, places_path=PLACES_PATH):
+    """
+    Switch to the published version if it is not the one in use and was built
+    from the JSON files at `json_path` and `places_path`. The new dataset is
+    passed to on_change(dataset) to rebuild whatever is derived from it before
+    it becomes the process-wide one. Returns it, or None when already current.
+    """
+    global _DATASET
+    manifest = read_manifest(manifest_path)
+    if not manifest or manifest["version"] == load_dataset().version:
+        return None
+    dataset = open_version(manifest, os.path.dirname(manifest_path))
+    if dataset.source != source_digest(json_path, places_path):
+        # Not built from the JSON files in use (see open_current); wait for a matching publish
+        return None
+    if on_change is not None:
+        on_change(dataset)
+    _DATASET = dataset
+    return dataset
+
+
+_WATCHER = None  # (pid, thread) of the process's reload thread
+_WATCHER_LOCK = threading.Lock()
+
+
+def watch_dataset(on_change, interval=IATA_RELOAD_INTERVAL, manifest_path=MANIFEST_PATH):
+    """
+    Run reload_dataset() every `interval` seconds on a daemon thread (no thread
+    when interval <= 0). Starts one thread per process however often it is
+    called, and a new one in a forked child, which does not inherit threads.
+    """
+    global _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is not None and _WATCHER[0] == os.getpid():
+            return _WATCHER[1]
+        _WATCHER = (os.getpid(), None)
+        if interval <= 0:
+            return None
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    reload_dataset(on_change, manifest_path)
+                except Exception as e:
+                    # Keep serving the current version; the next poll tries again
+                    print(f"IATA dataset reload failed: {e}")
+
+        thread = threading.Thread(target=run, name="iata-reload", daemon=True)
+        thread.start()
+        _WATCHER = (os.getpid(), thread)
+        return thread
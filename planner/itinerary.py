@@ -1,64 +1,121 @@
-from google import genai
-from config.settings import GEMINI_API_KEY, DEFAULT_MODEL
-
-def generate_itinerary(destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels):
-    client = genai.Client(api_key=GEMINI_API_KEY)
-
-    # Format flights info for prompt
-    flights_info = ""
-    if flights:
-        flights_info = "Flight Options Retrieved:\n"
-        for f in flights:
-            price = f.get('price', {}).get('grandTotal', 'N/A')
-            currency = f.get('price', {}).get('currency', '')
-            segments = f.get('itineraries', [{}])[0].get('segments', [])
-            route = " -> ".join(segment.get('departure', {}).get('iataCode', '') for segment in segments)
-            if segments:
-                route += " -> " + segments[-1].get('arrival', {}).get('iataCode', '')
-            flights_info += f"- Route: {route}, Price: {price} {currency}\n"
-    else:
-        flights_info = "No flight options found.\n"
-
-    # Format hotels info similarly
-    hotels_info = ""
-    if hotels:
-        hotels_info = "Hotel Options Retrieved:\n"
-        for h in hotels[:5]:
-            name = h.get('name', 'N/A')
-            address = ", ".join(h.get('address', {}).get('lines', []))
-            hotels_info += f"- {name}, Address: {address}\n"
-    else:
-        hotels_info = "No hotel options found.\n"
-
-    prompt = f"""
-You are a travel planner assistant.
-
-User Input:
-- Destination: {destination_input}
-- Origin IATA: {origin_iata}
-- Destination IATA: {destination_iata}
-- Departure Date: [Use the provided app date if available]
-- Days: {days}
-- Budget: {budget}
-- Interests: {interests}
-
-{flights_info}
-{hotels_info}
-
-TASK: Produce a beautifully structured HTML itinerary. Use semantic headings and sections.
-REQUIREMENTS:
-- Answer with the currency given in the budget.
-- Start with <section class="itinerary-header"> including an <h2> title and a short summary.
-- Add a <section class="trip-facts"> with a small definition list (<dl>) for key facts (days, budget, interests, best flight pick, suggested hotel area).
-- Add <section class="daily-plan"> with one <article class="day"> per day: include <h3> Day N and an unordered list of activities with brief descriptions and timing hints.
-- Add <section class="tips"> with 5-7 bullet tips (local transport, safety, money, connectivity, cultural etiquette).
-- Keep it concise, practical, and specific for the chosen destination.
-- Do NOT include <html>, <head>, or <body> tags. Only the inner content sections.
-"""
-
-    response = client.models.generate_content(
-        model=DEFAULT_MODEL,
-        contents=prompt
+import re
+import time
+from itertools import chain
+
+from config.settings import DEFAULT_MODEL
+from planner import llm_cache
+from planner.cache import MISSING
+from planner.clients import GEMINI_UPSTREAM, get_genai_client
+from planner.metrics import count_stale, observe, timed
+from planner.prompts import build_itinerary_prompt
+
+_SECTION_RE = re.compile(r"<section\b[^>]*>.*?</section\s*>", re.S | re.I)
+_CLASS_RE = re.compile(r"""class\s*=\s*["']([^"']+)["']""", re.I)
+
+
+def _client():
+    return get_genai_client()
+
+
+def _prompts(destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels):
+    """The prompt sent to the model, and the canonical one its cache entry is filed under."""
+    prompt = build_itinerary_prompt(
+        destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels
     )
+    # Near-identical requests share a cache entry, but the model always sees the budget and
+    # interests as the user wrote them
+    canonical = build_itinerary_prompt(
+        destination_input, days, llm_cache.bucket_budget(budget), llm_cache.canonical_interests(interests),
+        origin_iata, destination_iata, flights, hotels
+    )
+    return prompt, canonical
+
+
+def generate_itinerary(destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels,
+                       client=None):
+    prompt, canonical = _prompts(
+        destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels
+    )
+    cached = llm_cache.get_cached(canonical)
+    if cached is not None:
+        return cached
+
+    client = client or _client()
+
+    def generate():
+        response = GEMINI_UPSTREAM.call(client.models.generate_content, model=DEFAULT_MODEL, contents=prompt)
+        llm_cache.store(canonical, response.text)
+        return response.text
+
+    # While Gemini is down or slow, the last itinerary generated for this prompt is served
+    with timed("gemini.itinerary"):
+        return GEMINI_UPSTREAM.serve(llm_cache.prompt_key(canonical), generate, stage="gemini.itinerary", default=MISSING)
+
+
+def _open_stream(client, prompt):
+    # The request is only sent when the first chunk is pulled, so retries cover the wait for it
+    chunks = iter(client.models.generate_content_stream(model=DEFAULT_MODEL, contents=prompt))
+    return next(chunks, None), chunks
+
+
+def stream_itinerary(destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels,
+                     client=None):
+    """Yield the itinerary HTML as text chunks while the model produces it."""
+    prompt, canonical = _prompts(
+        destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels
+    )
+    cached = llm_cache.get_cached(canonical)
+    if cached is not None:
+        yield cached
+        return
+
+    client = client or _client()
+    key = llm_cache.prompt_key(canonical)
+    parts = []
+    start = time.perf_counter()
+    try:
+        first, chunks = GEMINI_UPSTREAM.call(_open_stream, client, prompt)
+    except Exception:
+        stale = GEMINI_UPSTREAM.last_good(key)
+        if stale is None:
+            raise
+        count_stale("gemini.itinerary_stream")
+        yield stale
+        return
+    for chunk in chain([first] if first is not None else [], chunks):
+        if chunk.text:
+            if not parts:
+                observe("gemini.first_token", time.perf_counter() - start)
+            parts.append(chunk.text)
+            yield chunk.text
+    observe("gemini.itinerary_stream", time.perf_counter() - start)
+
+    # Only complete generations are cached
+    text = "".join(parts)
+    llm_cache.store(canonical, text)
+    GEMINI_UPSTREAM.remember(key, text)
+
+
+def iter_sections(chunks):
+    """
+    Group streamed itinerary text into complete top-level <section> blocks.
+
+    Yields (section_class, html) as soon as each closing tag arrives, so a
+    section can be shown before the rest of the itinerary is generated.
+    Anything left over after the last section (minus code fences) is
+    yielded under the name "extra".
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        match = _SECTION_RE.search(buffer)
+        while match:
+            html = match.group(0)
+            class_match = _CLASS_RE.search(html[:html.find(">") + 1])
+            yield (class_match.group(1).split()[0] if class_match else "section"), html
+            buffer = buffer[match.end():]
+            match = _SECTION_RE.search(buffer)
 
-    return response.text
+    rest = "\n".join(line for line in buffer.splitlines() if not line.strip().startswith("```")).strip()
+    if rest:
+        yield "extra", rest
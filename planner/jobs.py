@@ -0,0 +1,236 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from config.settings import JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL, JOB_STORE_PATH, JOB_WEBHOOK_HOSTS
+from planner.cache import SQLiteFile
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key, webhook=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.webhook = webhook
+        self.finished = threading.Event()
+
+    def snapshot(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def webhook_allowed(url):
+    """Webhooks may only target http(s) hosts listed in JOB_WEBHOOK_HOSTS."""
+    parsed = urlparse(url or "")
+    return parsed.scheme in ("http", "https") and parsed.hostname in JOB_WEBHOOK_HOSTS
+
+
+class JobStore:
+    """
+    Job snapshots in a local SQLite file, shared by every worker process on the host.
+
+    Any worker can answer a status poll for a job another one runs, and a
+    request identical to one queued or running in another worker joins that
+    job. Finished jobs are kept for `ttl` seconds; unfinished ones are
+    dropped `ttl` seconds after their last update (e.g. when their worker died).
+    """
+
+    def __init__(self, path=JOB_STORE_PATH, ttl=JOB_RESULT_TTL):
+        self.ttl = ttl
+        self._file = SQLiteFile(path)
+        with self._file.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, key TEXT NOT NULL, status TEXT NOT NULL,"
+                " snapshot TEXT NOT NULL, webhooks TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def claim(self, job):
+        """
+        Record `job` as the one running its key, unless another job with the
+        same key is unfinished: then `job.webhook` is attached to that job and
+        its snapshot is returned instead.
+        """
+        now = time.time()
+        with self._file.transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            running = self._active(conn, job.key)
+            if running is not None:
+                self._subscribe(conn, running["job_id"], job.webhook)
+                return running
+            conn.execute(
+                "INSERT INTO jobs (id, key, status, snapshot, webhooks, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.key, job.status, json.dumps(job.snapshot()),
+                 json.dumps([job.webhook] if job.webhook else []), now + self.ttl),
+            )
+        return None
+
+    def subscribe(self, job_id, webhook):
+        """Have `webhook` notified when the job finishes; False if it already has."""
+        if not webhook:
+            return True
+        with self._file.transaction() as conn:
+            return self._subscribe(conn, job_id, webhook)
+
+    def _subscribe(self, conn, job_id, webhook):
+        row = conn.execute("SELECT status, webhooks FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0] not in (QUEUED, RUNNING):
+            return False
+        webhooks = json.loads(row[1])
+        if webhook and webhook not in webhooks:
+            conn.execute("UPDATE jobs SET webhooks = ? WHERE id = ?", (json.dumps(webhooks + [webhook]), job_id))
+        return True
+
+    def active(self, key):
+        """Snapshot of the unfinished job for `key`, or None."""
+        return self._active(self._file.connect(), key)
+
+    def _active(self, conn, key):
+        row = conn.execute(
+            "SELECT snapshot FROM jobs WHERE key = ? AND status IN (?, ?) AND expires_at > ? LIMIT 1",
+            (key, QUEUED, RUNNING, time.time()),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def save(self, job, conn=None):
+        (conn or self._file.connect()).execute(
+            "UPDATE jobs SET status = ?, snapshot = ?, expires_at = ? WHERE id = ?",
+            (job.status, json.dumps(job.snapshot()), time.time() + self.ttl, job.id),
+        )
+
+    def finish(self, job):
+        """Save a finished job; returns the webhooks to notify. Nothing can subscribe after this."""
+        with self._file.transaction() as conn:
+            self.save(job, conn)
+            row = conn.execute("SELECT webhooks FROM jobs WHERE id = ?", (job.id,)).fetchone()
+        return [] if row is None else json.loads(row[0])
+
+    def get(self, job_id):
+        row = self._file.connect().execute(
+            "SELECT snapshot FROM jobs WHERE id = ? AND expires_at > ?", (job_id, time.time())
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+
+class JobQueue:
+    """
+    Bounded background pool for slow work, with in-flight de-duplication.
+
+    Jobs with the same key share one execution while queued or running, in
+    this process or (through the JobStore) in any other worker on the host.
+    Submissions beyond `max_depth` unfinished jobs in this process raise
+    QueueFull.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_depth=JOB_QUEUE_DEPTH, result_ttl=JOB_RESULT_TTL,
+                 store_path=JOB_STORE_PATH):
+        self.max_depth = max_depth
+        self.result_ttl = result_ttl
+        self.store_path = store_path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobs")
+        self._jobs = {}
+        self._inflight = {}  # key -> job
+        self._lock = threading.Lock()
+        self._store = None
+
+    def _shared(self):
+        # app.py creates the queue at import; the file is only created once jobs are used
+        if self._store is None:
+            self._store = JobStore(self.store_path, ttl=self.result_ttl)
+        return self._store
+
+    def submit(self, key, fn, *args, webhook=None, **kwargs):
+        """Return (job, created); created is False when an in-flight job was reused."""
+        with self._lock:
+            self._purge()
+            # A request joining an unfinished job gets its own webhook called as well
+            job = self._inflight.get(key)
+            if job is not None:
+                self._shared().subscribe(job.id, webhook)
+                return job, False
+            if len(self._inflight) >= self.max_depth:
+                running = self._shared().active(key)
+                if running is None or not self._shared().subscribe(running["job_id"], webhook):
+                    raise QueueFull(f"{len(self._inflight)} jobs already pending")
+                return _RemoteJob(running), False
+            job = Job(key, webhook=webhook)
+            running = self._shared().claim(job)
+            if running is not None:
+                return _RemoteJob(running), False
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job, True
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return self._shared().get(job_id) if job is None else job.snapshot()
+
+    def depth(self):
+        with self._lock:
+            return len(self._inflight)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        self._publish(job)
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        job.finished_at = time.time()
+        with self._lock:
+            self._inflight.pop(job.key, None)
+            webhooks = self._shared().finish(job)
+        job.finished.set()
+        for webhook in webhooks:
+            self._notify(job, webhook)
+
+    def _publish(self, job):
+        self._shared().save(job)
+
+    def _notify(self, job, webhook):
+        try:
+            requests.post(webhook, json=job.snapshot(), timeout=5)
+        except requests.RequestException as e:
+            print(f"Job webhook to {webhook} failed: {e}")
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class _RemoteJob:
+    """A job owned by another worker process, known only through its shared snapshot."""
+
+    def __init__(self, snapshot):
+        self.id = snapshot["job_id"]
+        self.status = snapshot["status"]
@@ -0,0 +1,75 @@
+import hashlib
+import math
+import re
+
+from config.settings import (
+    DEFAULT_MODEL,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_BYTES,
+    BUDGET_BUCKET_RATIO,
+)
+from planner.cache import MISSING, SQLiteBackend, get_cache
+
+_AMOUNT_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_INTEREST_SPLIT_RE = re.compile(r"\s*(?:,|;|/|\band\b|&)\s*", re.I)
+
+_cache = None
+
+
+def _itinerary_cache():
+    # Opened on first use, so no cache file is created while LLM_CACHE_ENABLED is off
+    global _cache
+    if _cache is None:
+        backend = SQLiteBackend(path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES)
+        _cache = get_cache("itinerary", ttl=LLM_CACHE_TTL, backend=backend)
+    return _cache
+
+
+def canonical_interests(interests):
+    """'Nightlife, culture and  Culture' -> 'culture, nightlife'"""
+    if not interests:
+        return ""
+    parts = {part.strip().lower() for part in _INTEREST_SPLIT_RE.split(interests)}
+    return ", ".join(sorted(part for part in parts if part))
+
+
+def bucket_budget(budget):
+    """
+    Snap the numeric part of a budget onto a geometric grid.
+
+    Budgets within BUDGET_BUCKET_RATIO of each other land on the same
+    value (rounded to two significant figures), e.g. "₹ 76,000" and
+    "₹ 80,000" both become "₹ 77,000". Budgets without a number are only
+    whitespace-normalized.
+    """
+    budget = " ".join((budget or "").split())
+    match = _AMOUNT_RE.search(budget)
+    if not match or BUDGET_BUCKET_RATIO <= 1:
+        return budget
+    amount = float(match.group(0).replace(",", ""))
+    if amount <= 0:
+        return budget
+    step = math.log(BUDGET_BUCKET_RATIO)
+    snapped = BUDGET_BUCKET_RATIO ** round(math.log(amount) / step)
+    digits = 1 - int(math.floor(math.log10(snapped)))
+    snapped = round(snapped, digits)
+    return f"{budget[:match.start()]}{snapped:,.0f}{budget[match.end():]}"
+
+
+def prompt_key(prompt, model=DEFAULT_MODEL):
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def get_cached(prompt):
+    if not LLM_CACHE_ENABLED:
+        return None
+    text = _itinerary_cache().get(prompt_key(prompt))
+    return None if text is MISSING else text
+
+
+def store(prompt, text):
+    if LLM_CACHE_ENABLED and text:
+        _itinerary_cache().set(prompt_key(prompt), text)
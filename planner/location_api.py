@@ -1,13 +1,177 @@
-import os
-import json
+import re
+from bisect import bisect_left
 
-# Load the full IATA codes JSON once on module load
-base_dir = os.path.dirname(os.path.abspath(__file__))
-json_path = os.path.join(base_dir, 'iata_codes_full.json')  # your full file
+from config.settings import GEO_FALLBACK_MAX_KM
+from planner.autocomplete import get_city_index
+from planner.geo import AirportIndex
+from planner.iata_store import NGRAM_SIZE, load_dataset, ngrams
+from planner.metrics import timed
 
-with open(json_path, "r", encoding="utf-8") as f:
-    IATA_DATA = json.load(f)  # List of dicts
+# "lat,lon" in decimal degrees, e.g. "48.85, 2.35"
+_COORDINATES_RE = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
 
+# Compact IATA dataset (see planner/iata_store.py), mapped once per process
+IATA_DATA = load_dataset()
+
+
+def _prefix_upper_bound(prefix):
+    # Smallest string greater than every string starting with `prefix`
+    if not prefix:
+        return None
+    last = ord(prefix[-1])
+    if last >= 0x10FFFF:
+        return _prefix_upper_bound(prefix[:-1])
+    return prefix[:-1] + chr(last + 1)
+
+
+class IataResolver:
+    """
+    Lookups over the prebuilt indexes of the IATA dataset.
+
+    Gives the same answers, in the same priority order, as scanning the
+    record list tier by tier: every tier returns the earliest matching record.
+    """
+
+    def __init__(self, dataset):
+        self._data = dataset
+        self._iata = dataset.column("iata")
+        self._names = dataset.column("name_lower")
+        self._city_keys = dataset.city_keys
+        self._city_airports = None  # built on first use: code -> codes in the same city
+        self._geo = AirportIndex(dataset)
+        self._code_rows = None  # built on first use: code -> first row with that code
+
+    @property
+    def dataset(self):
+        return self._data
+
+    def warm(self):
+        """Build the lookups otherwise built on first use, e.g. before swapping this resolver in."""
+        self.same_city("")
+        self.row_of("")
+        return self
+
+    def by_city(self, city_lower):
+        index = self._data.find_city(city_lower)
+        if index < 0:
+            return None
+        return self._iata[self._data.city_first_row(index, index + 1)]
+
+    def by_city_prefix(self, prefix):
+        lo = bisect_left(self._city_keys, prefix)
+        upper = _prefix_upper_bound(prefix)
+        hi = len(self._city_keys) if upper is None else bisect_left(self._city_keys, upper)
+        if lo >= hi:
+            return None
+        return self._iata[self._data.city_first_row(lo, hi)]
+
+    def by_name_substring(self, text):
+        if len(text) < NGRAM_SIZE:
+            candidates = range(len(self._names))
+        else:
+            postings = []
+            for gram in ngrams(text):
+                posting = self._data.gram_postings(gram)
+                if posting is None:
+                    return None
+                postings.append(posting)
+            candidates = min(postings, key=len)
+        # Candidates are ascending, so the first verified hit is the earliest record
+        for idx in candidates:
+            if text in self._names[idx]:
+                return self._iata[idx]
+        return None
+
+    def same_city(self, code):
+        """Every airport code in the same city and country as `code`, `code` first."""
+        if self._city_airports is None:
+            by_city = {}
+            for row_code, city, country in zip(self._iata, self._data.column("city"), self._data.column("country")):
+                by_city.setdefault((country, city.strip().lower()), []).append(row_code)
+            self._city_airports = {c: codes for codes in by_city.values() for c in codes}
+        codes = self._city_airports.get(code, [])
+        return [code] + [c for c in codes if c != code]
+
+    def nearest(self, lat, lon, k=1, max_km=None):
+        """The k airports closest to (lat, lon) as (distance_km, row), nearest first."""
+        return self._geo.nearest(lat, lon, k=k, max_km=max_km)
+
+    def within(self, lat, lon, radius_km, limit=None):
+        """Airports within `radius_km` of (lat, lon) as (distance_km, row), nearest first."""
+        return self._geo.within(lat, lon, radius_km, limit=limit)
+
+    def by_place(self, city_lower, max_km=GEO_FALLBACK_MAX_KM):
+        # Nearest airport to a town that has none of its own
+        point = self._data.find_place(city_lower)
+        if point is None:
+            return None
+        found = self._geo.nearest(*point, k=1, max_km=max_km)
+        return self._iata[found[0][1]] if found else None
+
+    def row_of(self, code):
+        if self._code_rows is None:
+            rows = {}
+            for row, row_code in enumerate(self._iata):
+                rows.setdefault(row_code, row)
+            self._code_rows = rows
+        return self._code_rows.get(code)
+
+    def locate(self, text):
+        """(lat, lon) for "lat,lon" input, an airport code, a city or a town; None if unknown."""
+        coordinates = parse_coordinates(text)
+        if coordinates is not None:
+            return coordinates
+        text = text.strip().lower()
+        if len(text) == 3 and text.isalpha():
+            row = self.row_of(text.upper())
+            if row is not None:
+                return self._data.coordinates(row)
+        place = self._data.find_place(text)
+        if place is not None:
+            return place
+        row = self.row_of(self.resolve(text))
+        return self._data.coordinates(row) if row is not None else None
+
+    def resolve(self, city_lower):
+        result = self.by_city(city_lower)
+        if result is None:
+            result = self.by_city_prefix(city_lower)
+        if result is None:
+            result = self.by_name_substring(city_lower)
+        if result is None:
+            result = self.by_place(city_lower)
+        if result is None:
+            result = get_city_index().closest_code(city_lower)
+        return result
+
+
+def parse_coordinates(text):
+    """(lat, lon) from "lat,lon" text, or None if it is not a valid coordinate pair."""
+    match = _COORDINATES_RE.match(text or "")
+    if not match:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+_RESOLVER = IataResolver(IATA_DATA)
+
+
+def use_dataset(dataset, resolver=None):
+    """
+    Serve lookups from a newly published dataset. Build and warm `resolver`
+    beforehand to keep that work off the request path; the swap itself is a
+    single assignment, and each lookup reads the resolver once, so it never
+    mixes two versions.
+    """
+    global IATA_DATA, _RESOLVER
+    resolver = resolver or IataResolver(dataset).warm()
+    IATA_DATA, _RESOLVER = dataset, resolver
+
+
+@timed("iata")
 def get_iata_code(city_or_code: str) -> str:
     """
     Return the IATA code for a city name or IATA code.
@@ -16,6 +180,9 @@ def get_iata_code(city_or_code: str) -> str:
     2. Exact city name (case-insensitive)
     3. City name startswith input (partial match)
     4. Airport name containing the input (case-insensitive substring match)
+    5. Nearest airport (within GEO_FALLBACK_MAX_KM) to a town without one
+    6. The one city name within a typo or two, ignoring accents ("Zürich", "Banglore")
+    Coordinates ("lat,lon") resolve to the nearest airport directly.
     """
     city_or_code = city_or_code.strip()
 
@@ -23,24 +190,48 @@ def get_iata_code(city_or_code: str) -> str:
     if len(city_or_code) == 3 and city_or_code.isalpha():
         return city_or_code.upper()
 
-    city_lower = city_or_code.lower()
+    coordinates = parse_coordinates(city_or_code)
+    if coordinates is not None:
+        resolver = _RESOLVER
+        found = resolver.nearest(*coordinates)
+        return resolver.dataset.value("iata", found[0][1]) if found else None
+
+    # 2-6. Exact city, city prefix, airport name substring, nearest to a known town, fuzzy city
+    return _RESOLVER.resolve(city_or_code.lower())
+
+
+def get_city_airports(code):
+    """IATA codes of the other airports serving the same city as `code`, after `code` itself."""
+    return _RESOLVER.same_city(code.strip().upper())
+
+
+def _airport(dataset, distance_km, row):
+    lat, lon = dataset.coordinates(row)
+    return {
+        "iata": dataset.value("iata", row),
+        "name": dataset.value("name", row),
+        "city": dataset.value("city", row),
+        "country": dataset.value("country", row),
+        "lat": round(lat, 4),
+        "lon": round(lon, 4),
+        "distance_km": round(distance_km, 1),
+    }
+
+
+def locate(text):
+    """(lat, lon) for "lat,lon", an airport code, a city or a town; None if unknown."""
+    return _RESOLVER.locate(text)
 
-    # 2. Exact city match
-    for entry in IATA_DATA:
-        city = entry.get("city", "").lower()
-        if city == city_lower:
-            return entry.get("iata")
 
-    # 3. Partial city match (startswith)
-    for entry in IATA_DATA:
-        city = entry.get("city", "").lower()
-        if city.startswith(city_lower):
-            return entry.get("iata")
+def nearest_airports(lat, lon, k=5, max_km=None):
+    """The k airports closest to (lat, lon), nearest first, as dicts with distance_km."""
+    resolver = _RESOLVER
+    return [_airport(resolver.dataset, distance, row)
+            for distance, row in resolver.nearest(lat, lon, k=k, max_km=max_km)]
 
-    # 4. Airport name contains city input as substring
-    for entry in IATA_DATA:
-        airport_name = entry.get("name", "").lower()
-        if city_lower in airport_name:
-            return entry.get("iata")
 
-    return None
+def airports_within(lat, lon, radius_km, limit=None):
+    """Airports within `radius_km` of (lat, lon), nearest first, as dicts with distance_km."""
+    resolver = _RESOLVER
+    return [_airport(resolver.dataset, distance, row)
+            for distance, row in resolver.within(lat, lon, radius_km, limit=limit)]
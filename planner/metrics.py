@@ -0,0 +1,222 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import partial, wraps
+
+# Latency buckets in seconds (upper bounds), Prometheus-style
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_histograms = {}  # stage -> Histogram
+_errors = {}  # stage -> count
+_timeouts = {}  # stage -> count
+_rejected = {}  # upstream -> calls refused by its open circuit breaker
+_busy = {}  # upstream -> calls refused because all its workers were in use
+_stale = {}  # stage -> responses served from the last good copy
+# Stage timings of the current request, for Server-Timing. A context variable rather than a
+# thread-local so that work handed to a pool through propagate() is timed into it too
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; recording is one bisect and two adds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+
+def observe(stage, seconds):
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def count_error(stage):
+    with _lock:
+        _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def count_timeout(stage):
+    with _lock:
+        _timeouts[stage] = _timeouts.get(stage, 0) + 1
+
+
+def count_rejected(upstream):
+    with _lock:
+        _rejected[upstream] = _rejected.get(upstream, 0) + 1
+
+
+def count_busy(upstream):
+    with _lock:
+        _busy[upstream] = _busy.get(upstream, 0) + 1
+
+
+def count_stale(stage):
+    with _lock:
+        _stale[stage] = _stale.get(stage, 0) + 1
+
+
+class timed:
+    """
+    Time a stage, as a context manager or a decorator:
+
+        with timed("render"): ...
+
+        @timed("amadeus.flights")
+        def search(...): ...
+
+    Exceptions are counted as errors for the stage and re-raised.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self._start)
+        if exc_type is not None:
+            count_error(self.stage)
+        return False
+
+    def __call__(self, fn):
+        stage = self.stage
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def start_request():
+    """Begin collecting this request's stage timings for a Server-Timing header."""
+    _request_timings.set([])
+
+
+def finish_request():
+    """Stop collecting and return the Server-Timing header value for this request's stages."""
+    timings = _request_timings.get() or []
+    _request_timings.set(None)
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(
+        f"{stage.replace('.', '-').replace(':', '-')};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()
+    )
+
+
+def propagate(fn):
+    """
+    `fn` bound to a copy of the caller's context, for executor.submit(): the
+    stages it times on a pool thread are reported with the caller's request.
+    """
+    return partial(contextvars.copy_context().run, fn)
+
+
+def snapshot():
+    """Per-stage count, sum and p50/p95/p99 (seconds), plus error, timeout, rejected, busy and stale counts."""
+    with _lock:
+        stages = {
+            stage: {
+                "count": h.count,
+                "sum": h.sum,
+                **{f"p{int(q * 100)}": h.quantile(q) for q in QUANTILES},
+            }
+            for stage, h in _histograms.items()
+        }
+        return {
+            "stages": stages, "errors": dict(_errors), "timeouts": dict(_timeouts),
+            "rejected": dict(_rejected), "busy": dict(_busy), "stale": dict(_stale),
+        }
+
+
+def render_prometheus(cache_series=None):
+    """
+    Text exposition format: a histogram per stage, estimated quantiles as
+    gauges, error/timeout/rejected/busy/stale counters, and optional per-cache
+    series given as {metric_name: {cache_name: value}} (counters when the name
+    ends in _total).
+
+    Every series carries a pid label: each gunicorn worker keeps its own
+    histograms and counters, so a scrape only sees the worker that served it
+    and the series must be summed over pid rather than mixed into one.
+    """
+    pid = os.getpid()
+    lines = [
+        "# HELP planner_stage_seconds Latency of each planning stage.",
+        "# TYPE planner_stage_seconds histogram",
+    ]
+    with _lock:
+        histograms = {stage: (list(h.counts), h.count, h.sum) for stage, h in _histograms.items()}
+        errors = dict(_errors)
+        timeouts = dict(_timeouts)
+        rejected = dict(_rejected)
+        busy = dict(_busy)
+        stale = dict(_stale)
+        quantiles = {stage: [(q, h.quantile(q)) for q in QUANTILES] for stage, h in _histograms.items()}
+
+    for stage, (counts, count, total) in sorted(histograms.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += bucket_count
+            lines.append(f'planner_stage_seconds_bucket{{pid="{pid}",stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'planner_stage_seconds_sum{{pid="{pid}",stage="{stage}"}} {total:.6f}')
+        lines.append(f'planner_stage_seconds_count{{pid="{pid}",stage="{stage}"}} {count}')
+
+    lines += [
+        "# HELP planner_stage_quantile_seconds Estimated latency quantiles per stage.",
+        "# TYPE planner_stage_quantile_seconds gauge",
+    ]
+    for stage, values in sorted(quantiles.items()):
+        for q, value in values:
+            lines.append(f'planner_stage_quantile_seconds{{pid="{pid}",stage="{stage}",quantile="{q}"}} {value:.6f}')
+
+    for name, help_text, counts in (
+        ("planner_stage_errors_total", "Failed calls per stage.", errors),
+        ("planner_stage_timeouts_total", "Calls per stage that missed their deadline.", timeouts),
+        ("planner_stage_rejected_total", "Calls refused by an open circuit breaker.", rejected),
+        ("planner_stage_busy_total", "Calls refused because every worker for the upstream was in use.", busy),
+        ("planner_stage_stale_total", "Responses served from the last good copy.", stale),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for stage, value in sorted(counts.items()):
+            lines.append(f'{name}{{pid="{pid}",stage="{stage}"}} {value}')
+
+    for name, values in (cache_series or {}).items():
+        lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+        for label, value in sorted(values.items()):
+            lines.append(f'{name}{{pid="{pid}",cache="{label}"}} {value}')
+
+    return "\n".join(lines) + "\n"
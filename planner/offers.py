@@ -0,0 +1,159 @@
+import heapq
+import re
+
+from config.settings import FLIGHT_RANK_BY, FLIGHT_WEIGHT_PRICE, FLIGHT_WEIGHT_DURATION, FLIGHT_WEIGHT_STOPS
+
+_DURATION_RE = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?$")
+RANKINGS = ("price", "duration", "stops", "score")
+
+
+def parse_duration(text):
+    """Minutes in an ISO 8601 duration such as "PT7H55M" or "P1DT2H"; None if unparseable."""
+    match = _DURATION_RE.match(text or "")
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes = (int(part or 0) for part in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+class FlightOffer:
+    """
+    One flight offer with the fields the planner uses, parsed once from the
+    nested Amadeus payload.
+
+    `to_dict()` gives a JSON-safe form with the same keys as the attributes,
+    so templates and caches can use either.
+    """
+
+    __slots__ = (
+        "id", "price", "price_text", "currency", "duration_minutes", "stops",
+        "route", "carriers", "departure_at", "arrival_at", "converted_price", "converted_currency",
+    )
+
+    def __init__(self, id, price, price_text, currency, duration_minutes, stops, route, carriers,
+                 departure_at=None, arrival_at=None, converted_price=None, converted_currency=None):
+        self.id = id
+        self.price = price
+        self.price_text = price_text
+        self.currency = currency
+        self.duration_minutes = duration_minutes
+        self.stops = stops
+        self.route = route
+        self.carriers = carriers
+        self.departure_at = departure_at
+        self.arrival_at = arrival_at
+        self.converted_price = converted_price
+        self.converted_currency = converted_currency
+
+    @classmethod
+    def from_amadeus(cls, offer):
+        """Normalize a raw Amadeus flight offer; None if it lacks a price or segments."""
+        try:
+            price = offer["price"]
+            price_text = str(price.get("grandTotal") or price["total"])
+            amount = float(price_text.replace(",", ""))
+            itinerary = offer["itineraries"][0]
+            segments = itinerary["segments"]
+            first, last = segments[0], segments[-1]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+        carriers = []
+        for segment in segments:
+            carrier = segment.get("carrierCode")
+            if carrier and carrier not in carriers:
+                carriers.append(carrier)
+        return cls(
+            id=offer.get("id"),
+            price=amount,
+            price_text=price_text,
+            currency=(price.get("currency") or "").upper(),
+            duration_minutes=parse_duration(itinerary.get("duration")),
+            # Technical stops inside a segment count as stops too
+            stops=len(segments) - 1 + sum(int(segment.get("numberOfStops") or 0) for segment in segments),
+            route=[segment["departure"]["iataCode"] for segment in segments] + [last["arrival"]["iataCode"]],
+            carriers=carriers,
+            departure_at=first["departure"].get("at"),
+            arrival_at=last["arrival"].get("at"),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @property
+    def origin(self):
+        return self.route[0]
+
+    @property
+    def destination(self):
+        return self.route[-1]
+
+    def route_text(self, separator=" -> "):
+        return separator.join(self.route)
+
+    def __repr__(self):
+        return f"FlightOffer({self.route_text('-')}, {self.price_text} {self.currency}, {self.stops} stops)"
+
+
+def parse_offers(raw_offers):
+    """Normalize a list of raw Amadeus offers, skipping any that cannot be parsed."""
+    offers = []
+    for raw in raw_offers or ():
+        offer = FlightOffer.from_amadeus(raw)
+        if offer is not None:
+            offers.append(offer)
+    return offers
+
+
+def _by_price(offer):
+    return offer.price
+
+
+def _by_duration(offer):
+    return offer.duration_minutes if offer.duration_minutes is not None else float("inf")
+
+
+def _by_stops(offer):
+    return offer.stops
+
+
+def _by_score(offers, weights):
+    # Each criterion relative to the best offer in the batch, so the weights are unit-free
+    w_price, w_duration, w_stops = weights
+    best_price = min((o.price for o in offers if o.price > 0), default=1.0)
+    best_duration = min((o.duration_minutes for o in offers if o.duration_minutes), default=1)
+
+    def key(offer):
+        duration = offer.duration_minutes or best_duration * 2  # unknown durations rank as slow
+        return (w_price * offer.price / best_price
+                + w_duration * duration / best_duration
+                + w_stops * offer.stops)
+    return key
+
+
+_KEYS = {"price": _by_price, "duration": _by_duration, "stops": _by_stops}
+
+
+def top_offers(offers, k, by=FLIGHT_RANK_BY, weights=None):
+    """
+    The `k` best offers, best first, without sorting the whole list.
+
+    `by` is "price", "duration", "stops" or "score" (a weighted mix of price,
+    duration and stops, see FLIGHT_WEIGHT_*). Ties go to the cheaper offer,
+    then keep the upstream order.
+    """
+    if by not in RANKINGS:
+        raise ValueError(f"Unknown ranking: {by}")
+    offers = list(offers)
+    if not offers or k <= 0:
+        return []
+    if by == "score":
+        primary = _by_score(offers, weights or (FLIGHT_WEIGHT_PRICE, FLIGHT_WEIGHT_DURATION, FLIGHT_WEIGHT_STOPS))
+    else:
+        primary = _KEYS[by]
+    ranked = heapq.nsmallest(k, enumerate(offers), key=lambda pair: (primary(pair[1]), pair[1].price, pair[0]))
+    return [offer for _, offer in ranked]
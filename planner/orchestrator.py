@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from config.settings import (
+    UPSTREAM_POOL_SIZE,
+    FLIGHT_SEARCH_TIMEOUT,
+    HOTEL_SEARCH_TIMEOUT,
+    UPSTREAM_DEADLINE,
+    FLIGHT_FETCH_SIZE,
+)
+from planner.flight_api import search_flights
+from planner.hotel_api import get_hotels_by_city
+from planner.metrics import count_error, count_timeout, propagate, timed
+from planner.offers import FlightOffer, top_offers
+
+# One pool per worker process, shared by every request
+_EXECUTOR = ThreadPoolExecutor(max_workers=UPSTREAM_POOL_SIZE, thread_name_prefix="upstream")
+
+
+class Call:
+    """A single upstream call to run in the fan-out."""
+
+    def __init__(self, fn, *args, timeout=None, default=None, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.default = default
+
+
+def fan_out(calls, deadline=None, executor=None, stage=None):
+    """
+    Run every call in `calls` (name -> Call) concurrently.
+
+    Each call is bounded by its own timeout and by the overall `deadline`
+    (seconds). Calls that fail or miss their deadline are cancelled if they
+    have not started yet and are otherwise abandoned; their `default` is
+    returned instead. Returns (results, missed) where `missed` lists the
+    names that fell back to their default. Timeouts and errors are counted
+    under `upstream.<stage>`, or `upstream.<name>` when no stage is given.
+    """
+    executor = executor or _EXECUTOR
+    start = time.monotonic()
+    overall = start + deadline if deadline is not None else None
+
+    futures = {}
+    for name, call in calls.items():
+        futures[name] = executor.submit(propagate(call.fn), *call.args, **call.kwargs)
+
+    results = {}
+    missed = []
+    for name, future in futures.items():
+        call = calls[name]
+        limits = [t for t in (overall, start + call.timeout if call.timeout is not None else None) if t is not None]
+        remaining = max(0.0, min(limits) - time.monotonic()) if limits else None
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"Upstream call '{name}' timed out after {time.monotonic() - start:.2f}s")
+            count_timeout(f"upstream.{stage or name}")
+            results[name] = call.default
+            missed.append(name)
+        except Exception as error:
+            print(f"Upstream call '{name}' failed: {error}")
+            count_error(f"upstream.{stage or name}")
+            results[name] = call.default
+            missed.append(name)
+    return results, missed
+
+
+@timed("upstream.fanout")
+def gather_trip_data(origin_iata, destination_iata, departure_date, adults=1, max_results=3,
+                     flight_search=None, hotel_search=None, deadline=UPSTREAM_DEADLINE):
+    """
+    Fetch flight offers and destination hotels at the same time.
+
+    Asks for FLIGHT_FETCH_SIZE offers and keeps the `max_results` best (see
+    planner/offers.py). Returns (flights, hotels): FlightOffer objects and
+    hotel dicts. A lookup that failed or missed the deadline comes back empty
+    so the itinerary can still be generated.
+    """
+    flight_search = flight_search or search_flights
+    hotel_search = hotel_search or get_hotels_by_city
+
+    results, _ = fan_out({
+        "flights": Call(flight_search, origin_iata, destination_iata, departure_date,
+                        adults=adults, max_results=max(max_results, FLIGHT_FETCH_SIZE),
+                        timeout=FLIGHT_SEARCH_TIMEOUT),
+        "hotels": Call(hotel_search, destination_iata, timeout=HOTEL_SEARCH_TIMEOUT),
+    }, deadline=deadline)
+    flights = top_offers((FlightOffer.from_dict(offer) for offer in results["flights"] or []), max_results)
+    return flights, results["hotels"] or []
@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+import secrets
+import time
+
+from config.settings import PLAN_CACHE_MAX_BYTES, PLAN_CACHE_MAX_ENTRIES, PLAN_CACHE_PATH, PLAN_CACHE_TTL
+from planner.cache import SQLiteBackend
+
+try:
+    import brotli  # optional: smaller bodies for clients that accept br
+except ImportError:
+    brotli = None
+
+# Preference order when a client accepts several encodings.
+ENCODINGS = ("br", "gzip")
+# Bodies are compressed while the plan request waits. Brotli above 5 costs tens of
+# milliseconds per page for a few percent; gzip 9 is still cheap on pages this size.
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 5
+
+_backend = None
+
+
+def _plans():
+    global _backend
+    if _backend is None:
+        _backend = SQLiteBackend(path=PLAN_CACHE_PATH, max_entries=PLAN_CACHE_MAX_ENTRIES,
+                                 max_bytes=PLAN_CACHE_MAX_BYTES)
+    return _backend
+
+
+def new_plan_id():
+    """
+    A fresh random id for a rendered plan. Each plan keeps its own link, even
+    when the same trip is planned again, and links cannot be guessed from a
+    trip's details.
+    """
+    return secrets.token_hex(16)
+
+
+class StoredPlan:
+    """
+    A rendered plan page with its ETag and precompressed bodies.
+
+    Stored as one record (a JSON header line followed by the bodies) so an
+    eviction can never leave the header without its bodies. The uncompressed
+    page is not stored; the few clients that want it get the gzip body
+    decompressed.
+    """
+
+    def __init__(self, plan_id, record):
+        header_end = record.index(b"\n")
+        header = json.loads(record[:header_end])
+        self.id = plan_id
+        self.etag = header["etag"]
+        self.created = header["created"]
+        self.size = header["size"]
+        self._bodies = {}
+        offset = header_end + 1
+        for encoding, length in header["bodies"].items():
+            self._bodies[encoding] = record[offset:offset + length]
+            offset += length
+
+    @staticmethod
+    def encode(html, created=None):
+        raw = html.encode("utf-8")
+        bodies = {"gzip": gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            bodies["br"] = brotli.compress(raw, quality=BROTLI_QUALITY)
+        header = {
+            "etag": hashlib.sha256(raw).hexdigest()[:20],
+            "created": time.time() if created is None else created,
+            "size": len(raw),
+            "bodies": {encoding: len(body) for encoding, body in bodies.items()},
+        }
+        return json.dumps(header).encode("utf-8") + b"\n" + b"".join(bodies.values())
+
+    def negotiate(self, accept_encodings):
+        """The stored encoding a client prefers ("br", "gzip"), or "identity"; takes request.accept_encodings."""
+        best, best_quality = "identity", 0
+        for encoding in ENCODINGS:
+            quality = accept_encodings[encoding]
+            if encoding in self._bodies and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def etag_for(self, encoding):
+        # Each representation has its own strong ETag, as the bytes differ
+        return self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+
+    def etags(self):
+        return [self.etag_for(encoding) for encoding in ("identity", *self._bodies)]
+
+    def body(self, encoding):
+        if encoding == "identity":
+            return gzip.decompress(self._bodies["gzip"])
+        return self._bodies[encoding]
+
+
+def save_plan(plan_id, html):
+    """Store a rendered plan page under a new `plan_id` (see new_plan_id()); returns it as a StoredPlan."""
+    record = StoredPlan.encode(html)
+    if not _plans().add(f"plan:{plan_id}", record, PLAN_CACHE_TTL):
+        # A shared link must keep showing the plan it was shared for
+        raise ValueError(f"plan id {plan_id} is already in use")
+    return StoredPlan(plan_id, record)
+
+
+def load_plan(plan_id):
+    """The stored plan page for `plan_id`, or None if it was never stored or has expired."""
+    record = _plans().get(f"plan:{plan_id}")
+    return None if record is None else StoredPlan(plan_id, record)
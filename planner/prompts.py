@@ -1,11 +1,130 @@
-BASE_ITINERARY_PROMPT = """
-You are an AI Travel Planner. Based on the following details, generate a detailed itinerary:
+import math
+
+from config.settings import PROMPT_TOKEN_BUDGET, PROMPT_CHARS_PER_TOKEN, PROMPT_MAX_FLIGHTS, PROMPT_MAX_HOTELS
+
+# Static instructions go first and never change between requests, so the
+# provider can reuse them as a cached prompt prefix; only the tail varies.
+ITINERARY_INSTRUCTIONS = """You are an AI Travel Planner. Based on the trip details below, generate a detailed itinerary.
 
-Destination: {destination}
-Duration: {days} days
-Budget: {budget}
-Interests: {interests}
+TASK: Produce a beautifully structured HTML itinerary. Use semantic headings and sections.
+REQUIREMENTS:
+- Answer with the currency given in the budget.
+- Start with <section class="itinerary-header"> including an <h2> title and a short summary.
+- Add a <section class="trip-facts"> with a small definition list (<dl>) for key facts (days, budget, interests, best flight pick, suggested hotel area).
+- Add <section class="daily-plan"> with one <article class="day"> per day: include <h3> Day N and an unordered list of activities with brief descriptions, food suggestions and timing hints.
+- Add <section class="tips"> with 5-7 bullet tips (local transport, safety, money, connectivity, cultural etiquette).
+- Keep it concise, practical, and specific for the chosen destination.
+- Do NOT include <html>, <head>, or <body> tags. Only the inner content sections.
+"""
 
-Provide a daily plan for the trip, including activities, food suggestions, and highlights.
-Format the plan clearly, day by day.
+# Per-request trip details, appended after the static instructions
+BASE_ITINERARY_PROMPT = """
+Trip details:
+- Destination: {destination} ({destination_iata})
+- Origin: {origin_iata}
+- Duration: {days} days
+- Budget: {budget}
+- Interests: {interests}
 """
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (PROMPT_CHARS_PER_TOKEN characters per token)."""
+    return math.ceil(len(text) / PROMPT_CHARS_PER_TOKEN)
+
+
+def _duration(minutes):
+    if minutes is None:
+        return "?"
+    return f"{minutes // 60}h{minutes % 60:02d}m"
+
+
+def flight_line(offer, tag):
+    stops = "direct" if not offer.stops else f"{offer.stops} stop{'s' if offer.stops > 1 else ''}"
+    carriers = "/".join(offer.carriers)
+    return f"- {offer.route_text('-')} | {offer.price_text} {offer.currency} | {_duration(offer.duration_minutes)} | {stops} | {carriers} ({tag})"
+
+
+def hotel_line(hotel):
+    name = (hotel.get('name') or 'N/A').title()
+    distance = hotel.get('distance') or {}
+    where = f" | {distance['value']} {distance.get('unit', 'KM').lower()} from centre" if distance.get('value') is not None else ""
+    address = ", ".join((hotel.get('address') or {}).get('lines') or [])
+    return f"- {name}{where}" + (f" | {address}" if address else "")
+
+
+def pick_flights(flights, limit=PROMPT_MAX_FLIGHTS):
+    """The cheapest, fastest and fewest-stop offers (each at most once), as (tag, offer) in that order."""
+    picks = []
+    seen = set()
+    for tag, key in (
+        ("cheapest", lambda f: (f.price,)),
+        ("fastest", lambda f: (f.duration_minutes if f.duration_minutes is not None else math.inf, f.price)),
+        ("fewest stops", lambda f: (f.stops, f.price)),
+    ):
+        if len(picks) >= limit or not flights:
+            break
+        best = min(flights, key=key)
+        if id(best) not in seen:
+            seen.add(id(best))
+            picks.append((tag, best))
+    # Fill any remaining slots with the next cheapest offers
+    for offer in sorted(flights, key=lambda f: f.price):
+        if len(picks) >= limit:
+            break
+        if id(offer) not in seen:
+            seen.add(id(offer))
+            picks.append(("alternative", offer))
+    return picks
+
+
+def pick_hotels(hotels, limit=PROMPT_MAX_HOTELS):
+    """Hotels nearest the city centre first (unknown distances last, in upstream order)."""
+    def distance(indexed):
+        value = (indexed[1].get('distance') or {}).get('value')
+        return (value is None, value if value is not None else 0, indexed[0])
+    return [hotel for _, hotel in sorted(enumerate(hotels or []), key=distance)[:limit]]
+
+
+def build_itinerary_prompt(destination_input, days, budget, interests, origin_iata, destination_iata, flights, hotels,
+                           token_budget=PROMPT_TOKEN_BUDGET):
+    """
+    Static instructions, then the trip details, then as many of the most
+    relevant flights and hotels as fit in `token_budget` (estimated).
+
+    Context lines are admitted in priority order, alternating flights and
+    hotels (cheapest flight, nearest hotel, fastest flight, ...), so a tight
+    budget keeps the best of both rather than all of one.
+    """
+    head = ITINERARY_INSTRUCTIONS + BASE_ITINERARY_PROMPT.format(
+        destination=destination_input, destination_iata=destination_iata, origin_iata=origin_iata,
+        days=days, budget=budget, interests=interests,
+    )
+    flight_lines = [flight_line(offer, tag) for tag, offer in pick_flights(flights or [])]
+    hotel_lines = [hotel_line(hotel) for hotel in pick_hotels(hotels)]
+    flights_header = "\nFlight options (route | price | duration | stops | airlines):\n"
+    hotels_header = "\nHotel options:\n"
+
+    remaining = token_budget * PROMPT_CHARS_PER_TOKEN - len(head) - len(flights_header) - len(hotels_header)
+    kept_flights, kept_hotels = [], []
+    candidates = []
+    for i in range(max(len(flight_lines), len(hotel_lines))):
+        if i < len(flight_lines):
+            candidates.append((kept_flights, flight_lines[i]))
+        if i < len(hotel_lines):
+            candidates.append((kept_hotels, hotel_lines[i]))
+    for kept, line in candidates:
+        if len(line) + 1 <= remaining:
+            kept.append(line)
+            remaining -= len(line) + 1
+
+    parts = [head]
+    if kept_flights:
+        parts += [flights_header] + [f"{line}\n" for line in kept_flights]
+    elif not flights:
+        parts.append("\nNo flight options found.\n")
+    if kept_hotels:
+        parts += [hotels_header] + [f"{line}\n" for line in kept_hotels]
+    elif not hotels:
+        parts.append("\nNo hotel options found.\n")
+    return "".join(parts)
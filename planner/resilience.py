@@ -0,0 +1,215 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from config.settings import (
+    BREAKER_FAILURES,
+    BREAKER_RESET,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_CAP,
+    STALE_TTL,
+    UPSTREAM_POOL_SIZE,
+)
+from planner.cache import MISSING, get_cache
+from planner.metrics import count_busy, count_rejected, count_stale, count_timeout, propagate
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream was not called or did not answer in time."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """The upstream's breaker is open, so it was not called."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream is down.
+
+    Opens after `failures` consecutive failures. While open every call is
+    refused; after `reset_timeout` seconds one probe call is let through
+    (half-open). A successful probe closes the breaker, a failed one opens it
+    again for another `reset_timeout`.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_timeout=BREAKER_RESET, clock=time.monotonic):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self.opened = 0  # times the breaker has tripped
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def is_open(self):
+        """True while calls are refused outright (not counting a pending half-open probe)."""
+        return self.state == self.OPEN
+
+    def allow(self):
+        """Whether a call may go ahead now; in half-open, only the first caller gets through."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._state == self.HALF_OPEN or self._consecutive >= self.failures:
+                if self._state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+def backoff_delays(retries, base=RETRY_BACKOFF_BASE, cap=RETRY_BACKOFF_CAP, rng=random):
+    """Exponential backoff with full jitter: retry n waits a random time up to min(cap, base * 2**n)."""
+    return [rng.uniform(0, min(cap, base * 2 ** n)) for n in range(retries)]
+
+
+class Upstream:
+    """
+    Call policy for one upstream service (Amadeus, Gemini, ...).
+
+    `call()` goes through a circuit breaker shared by every call to the
+    service and retries transient failures (as judged by `retryable`) with
+    jittered backoff, within `deadline` seconds. `serve()` adds
+    stale-while-revalidate on top: it remembers the last good result per key
+    for `stale_ttl` seconds and returns that when the service is down or slow.
+    Its fetches run on `workers` threads of the upstream's own, so a caller
+    can stop waiting at the deadline while the fetch finishes (and refreshes
+    the last good copy) in the background.
+    """
+
+    def __init__(self, name, deadline, retries, retryable, stale_ttl=STALE_TTL, breaker=None,
+                 workers=UPSTREAM_POOL_SIZE):
+        self.name = name
+        self.deadline = deadline
+        self.retries = retries
+        self.retryable = retryable
+        self.breaker = breaker or CircuitBreaker()
+        self._stale = get_cache(f"stale_{name}", ttl=stale_ttl)
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"upstream-{name}")
+
+    def call(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs), retried on transient errors while the deadline
+        allows. Raises UpstreamUnavailable if the breaker refuses the call,
+        otherwise re-raises the last error.
+        """
+        give_up_at = time.monotonic() + self.deadline
+        delays = backoff_delays(self.retries)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                count_rejected(self.name)
+                raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+            try:
+                result = fn(*args, **kwargs)
+            except UpstreamUnavailable:
+                # Refused locally (e.g. no rate-limit slot); says nothing about the service
+                raise
+            except Exception as error:
+                if not self.retryable(error):
+                    # The service answered; the request itself was at fault
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= len(delays) or time.monotonic() + delays[attempt] >= give_up_at:
+                    raise
+                time.sleep(delays[attempt])
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def last_good(self, key):
+        """The last good result remembered under `key`, or None."""
+        value = self._stale.get(key)
+        return None if value is MISSING else value
+
+    def remember(self, key, value):
+        if value is not None:
+            self._stale.set(key, value)
+
+    def serve(self, key, fetch, *args, stage=None, default=None, **kwargs):
+        """
+        fetch(*args, **kwargs), bounded by the deadline, remembering good
+        results under `key`.
+
+        If the breaker is open, the deadline passes or the fetch fails, the
+        last good result for `key` is returned instead; failing that,
+        `default` (or the error is raised when `default` is MISSING). A fetch
+        still running at the deadline keeps going and refreshes the
+        remembered result when it completes.
+        """
+        stage = stage or self.name
+        error = None
+        if self.breaker.is_open():
+            # Nothing can hang now: a fresh cache hit answers, anything else is refused at once
+            try:
+                return fetch(*args, **kwargs)
+            except Exception as e:
+                error = e
+        else:
+            started = threading.Event()
+            started_at = []
+
+            def run():
+                started_at.append(time.monotonic())
+                started.set()
+                return fetch(*args, **kwargs)
+
+            future = self._executor.submit(propagate(run))
+            future.add_done_callback(
+                lambda done: not done.cancelled() and done.exception() is None and self.remember(key, done.result())
+            )
+            try:
+                # The deadline runs from when the fetch starts; waiting for a free worker is
+                # bounded separately, and a fetch that never ran says nothing about the service
+                if not started.wait(self.deadline) and future.cancel():
+                    count_busy(self.name)
+                    raise UpstreamUnavailable(f"{self.name} is busy (all {self.workers} workers in use)")
+                remaining = (started_at[0] if started_at else time.monotonic()) + self.deadline - time.monotonic()
+                return future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                # A hung upstream counts against the breaker like a failing one
+                self.breaker.record_failure()
+                error = UpstreamUnavailable(f"{self.name} did not answer within {self.deadline:g}s")
+                count_timeout(stage)
+            except Exception as e:
+                error = e
+
+        # Refusals are only counted: printing each one would flood the log during an incident
+        quiet = isinstance(error, CircuitOpen)
+        stale = self.last_good(key)
+        if stale is not None:
+            if not quiet:
+                print(f"{stage}: serving the last good response ({error})")
+            count_stale(stage)
+            return stale
+        if default is MISSING:
+            raise error
+        if not quiet:
+            print(f"{stage}: {error}")
+        return default
@@ -1,32 +1,223 @@
+import argparse
 import csv
 import json
+import os
+import sys
+
 import requests
 
-# Download OpenFlights airports.dat CSV
-url = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
-response = requests.get(url)
-response.raise_for_status()
-
-airports = []
-reader = csv.reader(response.text.splitlines())
-
-for row in reader:
-    # OpenFlights columns: https://openflights.org/data.html
-    # 0 id, 1 name, 2 city, 3 country, 4 IATA, 5 ICAO, 6 lat, 7 lon, 8 alt, 9 timezone, 10 DST, 11 tz database, 12 type, 13 source
-    iata = row[4].strip()
-    city = row[2].strip()
-    country = row[3].strip()
-    name = row[1].strip()
-    if iata and iata != "\\N":  # valid IATA code
-        airports.append({
-            "city": city,
-            "country": country,
-            "iata": iata,
-            "name": name
-        })
-
-# Save to JSON
-with open("iata_codes_full.json", "w", encoding="utf-8") as f:
-    json.dump(airports, f, indent=2, ensure_ascii=False)
-
-print(f"Saved {len(airports)} airports to iata_codes_full.json")
+# Allow running both as `python planner/script_to_get_iata.py` and `python -m planner.script_to_get_iata`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner.iata_store import (  # noqa: E402
+    BIN_PATH, JSON_PATH, PLACES_PATH, VERSIONS_DIR, load_places, publish_artifact, read_manifest, source_digest,
+)
+
+OPENFLIGHTS_URL = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
+# A snapshot that would remove more than this share of the airports is refused (truncated download?)
+MAX_REMOVED_SHARE = 0.1
+
+
+def download_airports(url=OPENFLIGHTS_URL):
+    # Download OpenFlights airports.dat CSV
+    response = requests.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def load_snapshot(source):
+    # A local airports.dat-format file, or a URL to download it from
+    if os.path.exists(source):
+        with open(source, "r", encoding="utf-8") as f:
+            return f.read()
+    return download_airports(source)
+
+
+def _float(value):
+    try:
+        return round(float(value), 6)
+    except ValueError:
+        return None
+
+
+def parse_airports(text):
+    """Return (airports with an IATA code, places: the other rows' towns with coordinates)."""
+    airports = []
+    places = []
+    reader = csv.reader(text.splitlines())
+
+    for row in reader:
+        # OpenFlights columns: https://openflights.org/data.html
+        # 0 id, 1 name, 2 city, 3 country, 4 IATA, 5 ICAO, 6 lat, 7 lon, 8 alt, 9 timezone, 10 DST, 11 tz database, 12 type, 13 source
+        iata = row[4].strip()
+        city = row[2].strip()
+        country = row[3].strip()
+        name = row[1].strip()
+        lat, lon = _float(row[6]), _float(row[7])
+        if iata and iata != "\\N":  # valid IATA code
+            airports.append({
+                "city": city,
+                "country": country,
+                "iata": iata,
+                "name": name,
+                "lat": lat,
+                "lon": lon
+            })
+        elif city and city != "\\N" and lat is not None and lon is not None:
+            places.append({"city": city, "lat": lat, "lon": lon})
+    return airports, places
+
+
+def backfill_coordinates(airports, places, csv_path):
+    """
+    Fill missing airport coordinates, and add places, from a local airport CSV
+    with iata, city, lat and lon columns (e.g. the one shipped by the
+    `airportsdata` package), for when OpenFlights cannot be downloaded.
+    """
+    with open(csv_path, "r", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    by_iata = {}
+    for row in rows:
+        if row.get("iata"):
+            by_iata.setdefault(row["iata"], row)
+    filled = 0
+    for airport in airports:
+        row = by_iata.get(airport["iata"])
+        if airport.get("lat") is None and row:
+            airport["lat"], airport["lon"] = _float(row["lat"]), _float(row["lon"])
+            filled += 1
+        airport.setdefault("lat", None)
+        airport.setdefault("lon", None)
+    known = {place["city"].lower() for place in places}
+    for row in rows:
+        city = (row.get("city") or "").strip()
+        if not row.get("iata") and city and city.lower() not in known:
+            known.add(city.lower())
+            places.append({"city": city, "lat": _float(row["lat"]), "lon": _float(row["lon"])})
+    return filled
+
+
+def diff_airports(old, new):
+    """
+    Changes from `old` to `new` airport lists, matched by IATA code:
+    {"added": [...], "removed": [...], "changed": [...]} with the new entries.
+    An airport the snapshot has no coordinates for keeps its current ones.
+    """
+    old_by_code = {airport["iata"]: airport for airport in old}
+    new_by_code = {}
+    for airport in new:
+        current = old_by_code.get(airport["iata"])
+        if current and airport.get("lat") is None and current.get("lat") is not None:
+            airport = dict(airport, lat=current["lat"], lon=current["lon"])
+        new_by_code.setdefault(airport["iata"], airport)
+    return {
+        "added": [airport for code, airport in new_by_code.items() if code not in old_by_code],
+        "removed": [airport for airport in old if airport["iata"] not in new_by_code],
+        "changed": [new_by_code[airport["iata"]] for airport in old
+                    if airport["iata"] in new_by_code and new_by_code[airport["iata"]] != airport],
+    }
+
+
+def apply_diff(airports, diff):
+    # Existing airports keep their positions (lookups prefer the earliest match), new ones go last
+    removed = {airport["iata"] for airport in diff["removed"]}
+    changed = {airport["iata"]: airport for airport in diff["changed"]}
+    kept = [changed.get(airport["iata"], airport) for airport in airports if airport["iata"] not in removed]
+    return kept + diff["added"]
+
+
+def merge_places(current, new):
+    # Towns are only ever added or moved: a source without places must not wipe the backfilled ones
+    merged = {place["city"].lower(): place for place in current}
+    for place in new:
+        merged[place["city"].lower()] = place
+    return list(merged.values())
+
+
+def refresh(source=OPENFLIGHTS_URL, coordinates=None, force=False, json_path=JSON_PATH, places_path=PLACES_PATH,
+            versions_dir=VERSIONS_DIR, bin_path=BIN_PATH):
+    """
+    Diff a new snapshot against the current dataset and publish the result as
+    a new version (see iata_store.publish_artifact), with the diff saved next
+    to it. Returns (manifest, diff); the manifest is unchanged when the
+    snapshot brings nothing new.
+    """
+    airports, places = parse_airports(load_snapshot(source))
+    if coordinates:
+        filled = backfill_coordinates(airports, places, coordinates)
+        print(f"Filled coordinates for {filled} airports from {coordinates}")
+    with open(json_path, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    current_places = load_places(places_path)
+
+    diff = diff_airports(current, airports)
+    if len(diff["removed"]) > MAX_REMOVED_SHARE * len(current) and not force:
+        raise SystemExit(f"Refusing to remove {len(diff['removed'])} of {len(current)} airports "
+                         f"(more than {MAX_REMOVED_SHARE:.0%}); check the snapshot or pass --force")
+    updated = apply_diff(current, diff)
+    places = merge_places(current_places, places)
+    if updated != current or len(places) != len(current_places):
+        save_json(updated, json_path)
+        save_places(places, places_path)
+
+    previous = read_manifest(os.path.join(versions_dir, "manifest.json"))
+    summary = {"source": source, **{kind: len(entries) for kind, entries in diff.items()}}
+    manifest = publish_artifact(updated, places, summary, versions_dir=versions_dir, bin_path=bin_path,
+                                source=source_digest(json_path, places_path))
+    if manifest != previous:
+        diff_path = os.path.join(versions_dir, f"iata_codes-{manifest['version']}.diff.json")
+        with open(diff_path, "w", encoding="utf-8") as f:
+            json.dump(diff, f, indent=2, ensure_ascii=False)
+    return manifest, diff
+
+
+def save_json(airports, path=JSON_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(airports, f, indent=2, ensure_ascii=False)
+
+
+def save_places(places, path=PLACES_PATH):
+    # One place per line keeps the file small and diffable
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n" + ",\n".join(json.dumps(place, ensure_ascii=False) for place in places) + "\n]\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Refresh the IATA dataset from an OpenFlights snapshot and publish it as a new version.")
+    parser.add_argument("--source", default=OPENFLIGHTS_URL,
+                        help="airports.dat URL or local file to diff against the current dataset (default: OpenFlights)")
+    parser.add_argument("--from-json", action="store_true",
+                        help=f"skip the snapshot and publish {os.path.basename(JSON_PATH)} and "
+                             f"{os.path.basename(PLACES_PATH)} as they are")
+    parser.add_argument("--coordinates", metavar="CSV",
+                        help="fill missing coordinates and places from a local airport CSV (iata, city, lat, lon columns)")
+    parser.add_argument("--force", action="store_true",
+                        help=f"accept a snapshot that removes more than {MAX_REMOVED_SHARE:.0%} of the airports")
+    args = parser.parse_args(argv)
+    previous = read_manifest()
+
+    if args.from_json:
+        with open(JSON_PATH, "r", encoding="utf-8") as f:
+            airports = json.load(f)
+        places = load_places()
+        if args.coordinates:
+            filled = backfill_coordinates(airports, places, args.coordinates)
+            print(f"Filled coordinates for {filled} airports from {args.coordinates}")
+            save_json(airports)
+            save_places(places)
+        manifest = publish_artifact(airports, places, {"source": os.path.basename(JSON_PATH)}, source=source_digest())
+    else:
+        manifest, diff = refresh(args.source, args.coordinates, args.force)
+        print(f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed "
+              f"airports in {args.source}")
+
+    if previous and manifest["version"] == previous["version"]:
+        print(f"Already up to date: version {manifest['version']} ({manifest['rows']} airports)")
+    else:
+        print(f"Published version {manifest['version']} ({manifest['rows']} airports, "
+              f"{os.path.getsize(BIN_PATH):,} bytes); running servers switch to it within their reload interval")
+
+
+if __name__ == "__main__":
+    main()
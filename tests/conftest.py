@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+# Every test runs offline against the fakes in planner/fakes.py, with nothing persisted
+# outside a scratch directory. Settings are read at import, so this runs before any
+# planner module is imported.
+_SCRATCH = tempfile.mkdtemp(prefix="planner_tests_")
+os.environ.update({
+    "AMADUES_CLIENT_ID": "offline",
+    "AMADUES_CLIENT_SECRET": "offline",
+    "USE_FAKE_AMADEUS": "1",
+    "USE_FAKE_LLM": "1",
+    "FAKE_AMADEUS_LATENCY": "fixed:0",
+    "FAKE_LLM_LATENCY": "fixed:0",
+    "CACHE_BACKEND": "memory",
+    "LLM_CACHE_ENABLED": "0",
+    "AMADEUS_RATE_LIMIT": "0",
+    "IATA_RELOAD_INTERVAL": "0",
+    "PLAN_CACHE_PATH": os.path.join(_SCRATCH, "plans.sqlite3"),
+    "JOB_STORE_PATH": os.path.join(_SCRATCH, "jobs.sqlite3"),
+})
+
+import pytest  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+@pytest.fixture
+def fixtures_dir():
+    """Recorded Amadeus/LLM responses shared with the benchmarks."""
+    return FIXTURES
@@ -0,0 +1,77 @@
+import gzip
+import json
+
+import pytest
+
+import app as web
+from planner.offers import FlightOffer
+from planner.plan_store import load_plan, new_plan_id, save_plan
+
+FORM = {
+    "destination": "Tokyo", "days": "3", "budget": "80000", "currency": "",
+    "interests": "culture", "origin": "Delhi", "departure_date": "2026-11-01",
+}
+FLIGHTS = [FlightOffer(id="1", price=412.5, price_text="412.50", currency="EUR", duration_minutes=475,
+                       stops=0, route=["DEL", "NRT"], carriers=["AI"])]
+HOTELS = [{"name": "Shinjuku Stay", "address": {"lines": ["1-1 Shinjuku"]}}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web, "gather_trip_data",
+                        lambda *args, **kwargs: ([FlightOffer.from_dict(f.to_dict()) for f in FLIGHTS], list(HOTELS)))
+    return web.app.test_client()
+
+
+def events(response):
+    for block in response.data.decode("utf-8").split("\n\n"):
+        if block.startswith("event: "):
+            name, data = block.split("\n", 1)
+            yield name[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_full_page(client):
+    response = client.post("/", data=FORM)
+    assert response.status_code == 200
+    assert b"Shinjuku Stay" in response.data
+    assert response.headers["Content-Location"].startswith("/plan/")
+
+
+def test_stream_sends_sections_then_a_permalink(client):
+    received = list(events(client.post("/plan/stream", data=FORM)))
+    names = [name for name, _ in received]
+    assert "section" in names and names[-1] == "done"
+    assert received[-1][1]["url"].startswith("/plan/")
+
+
+def test_stream_reports_invalid_input(client):
+    received = list(events(client.post("/plan/stream", data=dict(FORM, origin="qqqqqqqq"))))
+    assert received and received[-1][0] == "error"
+
+
+def test_permalink_is_served_compressed_and_revalidated(client):
+    page = client.post("/", data=FORM)
+    url = page.headers["Content-Location"]
+    plain = client.get(url)
+    assert plain.status_code == 200 and b"Shinjuku Stay" in plain.data
+    packed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip" and gzip.decompress(packed.data) == plain.data
+    again = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["ETag"]})
+    assert again.status_code == 304 and not again.data
+    assert client.get("/plan/00000000000000000000000000000000").status_code == 404
+    assert client.get("/plan/not-a-plan").status_code == 404
+
+
+def test_each_plan_keeps_its_own_permalink(client):
+    first = client.post("/", data=FORM).headers["Content-Location"]
+    second = client.post("/", data=dict(FORM, days="4")).headers["Content-Location"]
+    again = client.post("/", data=FORM).headers["Content-Location"]
+    assert len({first, second, again}) == 3
+
+
+def test_a_stored_plan_is_never_replaced():
+    plan_id = new_plan_id()
+    save_plan(plan_id, "<p>first</p>")
+    with pytest.raises(ValueError):
+        save_plan(plan_id, "<p>second</p>")
+    assert load_plan(plan_id).body("identity") == b"<p>first</p>"
@@ -0,0 +1,26 @@
+import json
+import os
+
+from planner.autocomplete import edit_distance, fold, get_city_index
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("Zürich") == "zurich"
+    assert fold("São Paulo") == "sao paulo"
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("banglore", "bangalore", 2) == 1
+    assert edit_distance("tokyo", "kyoto", 1) > 1
+
+
+def test_misspelled_cities_are_suggested(fixtures_dir):
+    with open(os.path.join(fixtures_dir, "misspellings.json"), "r", encoding="utf-8") as f:
+        pairs = [(entry["query"], entry["expected"]) for entry in json.load(f)]
+    index = get_city_index()
+    hits = sum(expected in [s["city"] for s in index.suggest(query, 5)] for query, expected in pairs)
+    assert hits / len(pairs) >= 0.9
+
+
+def test_autocomplete_still_completes_near_prefixes():
+    assert "Atlantic City" in [s["city"] for s in get_city_index().suggest("Atlantis", 5)]
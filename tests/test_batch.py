@@ -0,0 +1,86 @@
+import json
+
+from planner import batch
+
+TRIPS = [
+    {"destination": "Tokyo", "days": "3", "budget": "80000", "currency": "₹", "interests": "culture",
+     "origin": "Delhi", "departure_date": "2026-11-01"},
+    {"destination": "Tokyo", "days": "4", "budget": "80000", "currency": "₹", "interests": "culture",
+     "origin": "Delhi", "departure_date": "2026-11-01"},
+    {"destination": "Paris", "days": "4", "budget": "2500", "currency": "€", "interests": "museums",
+     "origin": "London", "departure_date": "2026-11-08"},
+    {"destination": "Qqqqqqqq", "days": "2", "budget": "100", "currency": "$", "interests": "",
+     "origin": "London", "departure_date": "2026-11-08"},
+]
+
+
+def write_jsonl(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_run_and_resume(tmp_path):
+    source, output = tmp_path / "trips.jsonl", tmp_path / "results.jsonl"
+    write_jsonl(source, [json.dumps(trip) for trip in TRIPS] + ["{not json"])
+    counts = batch.run_batch(str(source), str(output), concurrency=2, out=lambda *_: None)
+    assert counts["ok"] == 3 and counts["failed"] == 2
+    by_id = {record["id"]: record for record in results(output)}
+    assert by_id[batch.request_id(TRIPS[0])]["status"] == "ok"
+
+    # A crash mid-write leaves a torn last line; the rerun cuts it off and plans only what is missing
+    lines = output.read_text(encoding="utf-8").splitlines(keepends=True)
+    ok_lines = [line for line in lines if json.loads(line)["status"] == "ok"]
+    output.write_text("".join(ok_lines[:2]) + ok_lines[2][:30], encoding="utf-8")
+    resumed = batch.run_batch(str(source), str(output), concurrency=2, out=lambda *_: None)
+    assert resumed["ok"] == 1 and resumed["skipped"] == 2
+    ids = [record["id"] for record in results(output) if record["status"] == "ok"]
+    assert len(ids) == len(set(ids)) == 3
+
+
+def test_completed_ids_cuts_only_the_torn_last_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    lines = [json.dumps({"id": "a", "status": "ok", "itinerary": "Café, 東京"}, ensure_ascii=False) + "\n",
+             json.dumps({"id": "b", "status": "partial"}) + "\n",
+             json.dumps({"id": "b", "status": "ok"}) + "\n"]
+    kept = "".join(lines).encode("utf-8")
+    output.write_bytes(kept + '{"id": "c", "status": "ok", "itinerary": "Zürich'.encode("utf-8"))
+    assert batch.completed_ids(str(output)) == {"a", "b"}
+    assert output.read_bytes() == kept
+
+
+def test_request_id_ignores_case_and_spacing():
+    assert batch.request_id(dict(TRIPS[0], destination=" tokyo ")) == batch.request_id(TRIPS[0])
+    assert batch.request_id(dict(TRIPS[0], id=7)) == "7"
+
+
+def test_malformed_records_get_an_error_line_each(tmp_path):
+    source, output = tmp_path / "trips.jsonl", tmp_path / "results.jsonl"
+    write_jsonl(source, ["[]", '"x"', json.dumps(dict(TRIPS[0], origin=5)), json.dumps(dict(TRIPS[0], days=[3])),
+                         "{not json", "{also not json", json.dumps(dict(TRIPS[0], days=3, budget=80000))])
+    counts = batch.run_batch(str(source), str(output), concurrency=2, out=lambda *_: None)
+    assert counts == {"ok": 1, "partial": 0, "failed": 6, "skipped": 0}
+    errors = [record["error"] for record in results(output) if record["status"] == "error"]
+    assert "line 1: expected a JSON object, got list" in errors
+    assert "line 2: expected a JSON object, got str" in errors
+    assert "invalid origin" in errors and "invalid days" in errors
+
+
+def test_trips_missing_a_lookup_are_partial_and_retried(tmp_path, monkeypatch):
+    source, output = tmp_path / "trips.jsonl", tmp_path / "results.jsonl"
+    write_jsonl(source, [json.dumps(TRIPS[0]), json.dumps(dict(TRIPS[0], departure_date="2026-11-02"))])
+    search_flights = batch.search_flights
+    # Amadeus unavailable for the first date: search_flights returns None
+    monkeypatch.setattr(batch, "search_flights",
+                        lambda origin, destination, day, **kwargs: None if day == "2026-11-01" else
+                        search_flights(origin, destination, day, **kwargs))
+    counts = batch.run_batch(str(source), str(output), concurrency=2, out=lambda *_: None)
+    assert counts["ok"] == 1 and counts["partial"] == 1
+    partial = [record for record in results(output) if record["status"] == "partial"]
+    assert partial[0]["missing"] == ["flights"] and partial[0]["itinerary"]
+
+    monkeypatch.setattr(batch, "search_flights", search_flights)
+    resumed = batch.run_batch(str(source), str(output), concurrency=2, out=lambda *_: None)
+    assert resumed["ok"] == 1 and resumed["skipped"] == 1
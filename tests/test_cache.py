@@ -0,0 +1,65 @@
+import time
+
+from planner.cache import MISSING, MemoryBackend, SQLiteBackend, get_cache, make_key
+
+
+def test_make_key():
+    assert make_key(" del ", "nrt", 2, None) == "DEL|NRT|2|"
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2, max_bytes=1024)
+    backend.set("a", b"1", 60)
+    backend.set("b", b"2", 60)
+    backend.get("a")
+    backend.set("c", b"3", 60)
+    assert backend.get("b") is None and backend.get("a") == b"1" and backend.evictions == 1
+
+
+def test_sqlite_backend_enforces_bounds_every_few_writes(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=10, max_bytes=1 << 20, evict_every=5)
+    for i in range(33):
+        backend.set(f"k{i}", b"x" * 10, 60)
+        assert backend.size()[0] <= 10 + 5
+    backend.evict()
+    assert backend.size() == (10, 100)
+    assert backend.get("k32") == b"x" * 10 and backend.get("k0") is None
+
+
+def test_sqlite_backend_keeps_recently_read_entries(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=2, max_bytes=1 << 20,
+                            touch_interval=0, evict_every=1)
+    backend.set("a", b"1", 60)
+    time.sleep(0.01)
+    backend.set("b", b"2", 60)
+    time.sleep(0.01)
+    backend.get("a")
+    backend.set("c", b"3", 60)
+    assert backend.get("a") == b"1" and backend.get("b") is None
+
+
+def test_sqlite_backend_expires_entries(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    backend.set("gone", b"1", -1)
+    assert backend.get("gone") is None
+
+
+def test_add_stores_only_absent_or_expired_keys(tmp_path):
+    for backend in (MemoryBackend(), SQLiteBackend(str(tmp_path / "cache.sqlite3"))):
+        assert backend.add("a", b"1", 60)
+        assert not backend.add("a", b"2", 60) and backend.get("a") == b"1"
+        backend.set("b", b"1", -1)
+        assert backend.add("b", b"2", 60) and backend.get("b") == b"2"
+
+
+def test_response_cache_skips_none():
+    cache = get_cache("test_memoize", ttl=60, backend=MemoryBackend())
+    calls = []
+
+    @cache.memoize(lambda code: code)
+    def lookup(code):
+        calls.append(code)
+        return None if code == "bad" else {"code": code}
+    assert lookup("DEL") == lookup("DEL") == {"code": "DEL"}
+    assert lookup("bad") is None and lookup("bad") is None
+    assert calls == ["DEL", "bad", "bad"] and cache.get("bad") is MISSING
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from planner import clients
+
+
+class StubAmadeus(BaseHTTPRequestHandler):
+    """Just enough of the Amadeus API: the OAuth token endpoint and flight offers."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive capable
+    stats = None
+
+    def setup(self):
+        super().setup()
+        self.stats["connections"] += 1
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amadeus+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.stats["tokens"] += 1
+        time.sleep(0.05)  # long enough for concurrent callers to pile up behind the first fetch
+        self._reply({"access_token": f"token-{self.stats['tokens']}", "expires_in": 1799})
+
+    def do_GET(self):
+        self.stats["requests"] += 1
+        self._reply({"data": [{"price": {"grandTotal": "100.00", "currency": "EUR"}}]})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    stats = {"connections": 0, "tokens": 0, "requests": 0}
+    handler = type("Handler", (StubAmadeus,), {"stats": stats})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1], stats
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def real_client(stub, monkeypatch, request):
+    # conftest points every client at the fakes; these tests need the real one against the stub
+    monkeypatch.setattr(clients, "USE_FAKE_AMADEUS", False)
+    port, stats = stub
+    # A client id of its own, so no token from another test is found in the shared token cache
+    client = clients.create_amadeus_client(host="127.0.0.1", port=port, ssl=False,
+                                           client_id=request.node.name, client_secret="secret")
+    return client, stats
+
+
+def search(client):
+    return client.shopping.flight_offers_search.get(
+        originLocationCode="DEL", destinationLocationCode="NRT", departureDate="2026-11-01", adults=1, max=3)
+
+
+def test_one_token_fetch_is_shared_by_concurrent_calls(real_client):
+    client, stats = real_client
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: search(client), range(16)))
+    assert all(response.data for response in responses)
+    assert stats["tokens"] == 1 and stats["requests"] == 16
+
+
+def test_token_is_refreshed_once_it_is_about_to_expire(real_client, monkeypatch):
+    client, stats = real_client
+    search(client)
+    later = time.time() + 1799 - clients.SharedAccessToken.TOKEN_BUFFER
+    monkeypatch.setattr(clients.time, "time", lambda: later)
+    search(client)
+    search(client)
+    assert stats["tokens"] == 2
+    assert client.access_token.access_token == "token-2"
+
+
+def test_calls_reuse_one_pooled_connection(real_client):
+    client, stats = real_client
+    for _ in range(10):
+        search(client)
+    # The token request and every API call share a keep-alive connection
+    assert stats["requests"] == 10 and stats["connections"] == 1
+
+
+def test_a_forked_worker_gets_its_own_client(monkeypatch):
+    monkeypatch.setattr(clients, "_instances", {})
+    client = clients.get_amadeus_client()
+    assert clients.get_amadeus_client() is client
+    monkeypatch.setattr(clients.os, "getpid", lambda: -1)
+    assert clients.get_amadeus_client() is not client
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+import app as web
+from config.settings import FAMOUS_CITIES_RETRY_TTL
+from planner import cache, famous_cities as famous
+
+
+class Answer:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeLLM:
+    """Stands in for the Gemini client: answers every prompt with `answer` (or raises it)."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+        self.models = self
+
+    def generate_content(self, model, contents):
+        self.calls += 1
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return Answer(self.answer)
+
+
+class Pool:
+    """Records background refreshes instead of running them, so a test decides when they run."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run(self):
+        tasks, self.tasks = self.tasks, []
+        for fn, args in tasks:
+            fn(*args)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM('["Osaka", "Kyoto-ish", "Sapporo"]')
+    monkeypatch.setattr(famous, "get_genai_client", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    recorder = Pool()
+    monkeypatch.setattr(famous, "_refresh_pool", recorder)
+    monkeypatch.setattr(famous, "_pending", set())
+    return recorder
+
+
+def famous_cities(country):
+    response = web.app.test_client().get("/api/famous-cities", query_string={"country": country})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_table_is_served_without_waiting_for_the_llm(llm, pool):
+    body = famous_cities("Brazil")
+    assert body["source"] == "table" and body["cities"] == web.COUNTRY_TOP_CITIES["Brazil"]
+    assert llm.calls == 0
+    # The LLM list is fetched off the request path, once however many requests ask for it
+    famous_cities("Brazil")
+    assert [args[0] for _, args in pool.tasks] == ["Brazil"]
+
+
+def test_refresh_replaces_the_served_list(llm, pool):
+    assert famous_cities("Japan")["source"] == "table"
+    pool.run()
+    # Names not in the IATA dataset are dropped
+    assert famous_cities("Japan") == {"country": "Japan", "cities": ["Osaka", "Sapporo"], "source": "llm"}
+
+    llm.answer = '["Tokyo"]'
+    famous.schedule_refresh("Japan", web.COUNTRY_TO_CITY_SET["Japan"])
+    pool.run()
+    assert famous_cities("Japan")["cities"] == ["Tokyo"]
+
+
+def test_failed_refresh_is_retried_after_the_retry_ttl(llm, pool, monkeypatch):
+    llm.answer = ValueError("quota")
+    famous_cities("Italy")
+    pool.run()
+    assert famous.cached_curated("Italy") == []
+    # The failure is remembered: the table is served and no new refresh is queued
+    assert famous_cities("Italy")["source"] == "table" and not pool.tasks
+
+    later = time.time() + FAMOUS_CITIES_RETRY_TTL + 1
+    monkeypatch.setattr(cache.time, "time", lambda: later)
+    assert famous.cached_curated("Italy") is None
+    famous_cities("Italy")
+    assert [args[0] for _, args in pool.tasks] == ["Italy"]
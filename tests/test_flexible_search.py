@@ -0,0 +1,29 @@
+from config.settings import FLIGHT_FETCH_SIZE
+from planner.flexible_search import date_window, flexible_search
+
+
+def test_date_window():
+    assert date_window("2026-12-30", 3) == ["2026-12-30", "2026-12-31", "2027-01-01"]
+
+
+def test_calendar_covers_every_day_and_airport():
+    result = flexible_search(["DEL"], ["NRT", "HND"], "2026-12-01", days=5)
+    assert [entry["date"] for entry in result["calendar"]] == date_window("2026-12-01", 5)
+    assert all(entry["complete"] for entry in result["calendar"])
+    assert result["cheapest_date"] in date_window("2026-12-01", 5)
+
+
+def test_searches_share_the_plan_pages_fetch_size_and_keep_the_best(monkeypatch):
+    asked = []
+
+    def fake_search(origin, destination, day, adults=1, max_results=5):
+        asked.append(max_results)
+        return [{"id": str(i), "price": 500.0 - i, "price_text": f"{500.0 - i:.2f}", "currency": "EUR",
+                 "duration_minutes": 120, "stops": 0, "route": [origin, destination], "carriers": ["AI"]}
+                for i in range(max_results)]
+
+    result = flexible_search(["DEL"], ["NRT"], "2026-12-01", days=2, max_results=2, per_day=5,
+                             currency="EUR", flight_search=fake_search)
+    assert asked == [FLIGHT_FETCH_SIZE] * 2
+    assert [offer["price"] for offer in result["calendar"][0]["offers"]] == [
+        500.0 - FLIGHT_FETCH_SIZE + 1, 500.0 - FLIGHT_FETCH_SIZE + 2]
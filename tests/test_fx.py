@@ -0,0 +1,33 @@
+import pytest
+
+from planner import fx
+from planner.offers import FlightOffer
+
+
+def offer(price=100.0, currency="EUR", id="1"):
+    return FlightOffer(id=id, price=price, price_text=f"{price}", currency=currency, duration_minutes=60,
+                       stops=0, route=["DEL", "NRT"], carriers=["AI"])
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    monkeypatch.setattr(fx, "get_rate_table", lambda: ("USD", {"USD": 1.0, "EUR": 0.5, "INR": 80.0}))
+
+
+def test_converts_through_the_base_currency(rates):
+    flights = fx.convert_flight_prices([offer(), offer(currency="XYZ", id="2")], "INR", "₹")
+    assert (flights[0].converted_price, flights[0].converted_currency) == ("16000.00", "₹")
+    assert flights[1].converted_price is None
+
+
+def test_a_bad_offer_keeps_its_original_price(rates):
+    flights = fx.convert_flight_prices([offer(price=None, id="bad"), offer(id="good")], "INR", "₹")
+    assert flights[0].converted_price is None and flights[1].converted_price == "16000.00"
+
+
+def test_missing_rates_leave_prices_unconverted(monkeypatch):
+    def broken():
+        raise ValueError("rates table is not valid JSON")
+    monkeypatch.setattr(fx, "get_rate_table", broken)
+    flights = fx.convert_flight_prices([offer()], "INR", "₹")
+    assert flights[0].converted_price is None and flights[0].price == 100.0
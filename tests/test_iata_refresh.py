@@ -0,0 +1,97 @@
+import csv
+import json
+import os
+import shutil
+
+import pytest
+
+import app
+from planner import iata_store, location_api
+from planner.autocomplete import suggest_cities
+from planner.script_to_get_iata import refresh
+
+NEW_AIRPORT = {"city": "Testville", "country": "Iceland", "iata": "QQB", "name": "Testville Airport",
+               "lat": 64.5, "lon": -18.5}
+
+
+def write_snapshot(airports, path):
+    # OpenFlights airports.dat columns: id, name, city, country, IATA, ICAO, lat, lon, then unused ones
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for i, airport in enumerate(airports, 1):
+            lat = "\\N" if airport.get("lat") is None else airport["lat"]
+            lon = "\\N" if airport.get("lon") is None else airport["lon"]
+            writer.writerow([i, airport["name"], airport["city"], airport["country"], airport["iata"], "\\N",
+                             lat, lon, 0, 0, "U", "\\N", "airport", "OurAirports"])
+
+
+@pytest.fixture
+def published(tmp_path):
+    json_path, places_path = tmp_path / "iata_codes_full.json", tmp_path / "iata_places.json"
+    shutil.copy(iata_store.JSON_PATH, json_path)
+    shutil.copy(iata_store.PLACES_PATH, places_path)
+    paths = dict(json_path=str(json_path), places_path=str(places_path),
+                 versions_dir=str(tmp_path / "iata_versions"), bin_path=None)
+    airports = json.loads(json_path.read_text(encoding="utf-8"))
+    base, snapshot = tmp_path / "base.dat", tmp_path / "airports.dat"
+    write_snapshot(airports, base)
+    write_snapshot([dict(airports[1], name=airports[1]["name"] + " International")] + airports[2:] + [NEW_AIRPORT],
+                   snapshot)
+    return paths, airports, str(base), str(snapshot)
+
+
+def test_refresh_publishes_only_the_diff(published):
+    paths, _, base, snapshot = published
+    first, _ = refresh(base, **paths)
+    manifest, diff = refresh(snapshot, **paths)
+    assert {kind: len(entries) for kind, entries in diff.items()} == {"added": 1, "removed": 1, "changed": 1}
+    assert manifest["previous"] == [first["version"]]
+    again, again_diff = refresh(snapshot, **paths)
+    assert again == manifest and not any(again_diff.values())
+
+
+def test_hot_swap_serves_the_new_version(published):
+    paths, airports, _, snapshot = published
+    refresh(snapshot, **paths)
+    original = iata_store.load_dataset()
+    try:
+        swapped = iata_store.reload_dataset(app._swap_iata_dataset,
+                                            os.path.join(paths["versions_dir"], "manifest.json"),
+                                            paths["json_path"], paths["places_path"])
+        assert swapped is not None and iata_store.load_dataset() is swapped
+        assert location_api.get_iata_code(NEW_AIRPORT["city"]) == NEW_AIRPORT["iata"]
+        assert location_api._RESOLVER.row_of(airports[0]["iata"]) is None
+        assert NEW_AIRPORT["city"] in app.COUNTRY_TO_CITY_SET[NEW_AIRPORT["country"]]
+        assert any(s["city"] == NEW_AIRPORT["city"] for s in suggest_cities(NEW_AIRPORT["city"][:6]))
+    finally:
+        app._swap_iata_dataset(original)
+        iata_store._DATASET = original
+
+
+def test_watcher_starts_once_per_process(monkeypatch):
+    started = []
+    monkeypatch.setattr(iata_store, "_WATCHER", None)
+    monkeypatch.setattr(iata_store.threading.Thread, "start", lambda thread: started.append(thread))
+    first = iata_store.watch_dataset(None, interval=3600)
+    assert iata_store.watch_dataset(None, interval=3600) is first
+    # A forked worker (another pid) gets its own thread
+    monkeypatch.setattr(iata_store.os, "getpid", lambda: -1)
+    assert iata_store.watch_dataset(None, interval=3600) is not first
+    assert len(started) == 2
+
+
+
+def test_json_edited_after_a_publish_wins_over_the_manifest(published, tmp_path):
+    paths, airports, _, snapshot = published
+    refresh(snapshot, **paths)
+    manifest_path = os.path.join(paths["versions_dir"], "manifest.json")
+    current = dict(manifest_path=manifest_path, bin_path=str(tmp_path / "iata_codes.bin"),
+                   json_path=paths["json_path"], places_path=paths["places_path"])
+    assert iata_store.open_current(**current).version == iata_store.read_manifest(manifest_path)["version"]
+
+    # Edited by hand after the publish: the JSON is loaded, and the watcher does not switch back
+    with open(paths["json_path"], "w", encoding="utf-8") as f:
+        json.dump(airports[:10], f)
+    dataset = iata_store.open_current(**current)
+    assert dataset.version is None and dataset.rows == 10
+    assert iata_store.reload_dataset(None, manifest_path, paths["json_path"], paths["places_path"]) is None
@@ -0,0 +1,48 @@
+import json
+
+from planner.iata_store import (
+    JSON_PATH, IataDataset, build_artifact, load_places, open_dataset, source_digest, write_artifact,
+)
+
+
+def test_artifact_round_trips_the_json_records():
+    with open(JSON_PATH, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    dataset = IataDataset(build_artifact(records, load_places()))
+    assert dataset.rows == len(records)
+    for original, stored in zip(records[::97], list(dataset.records())[::97]):
+        assert {k: stored[k] for k in ("city", "country", "iata", "name")} == \
+               {k: original[k] for k in ("city", "country", "iata", "name")}
+        if original["lat"] is not None:
+            assert abs(stored["lat"] - original["lat"]) < 1e-3
+
+
+def test_city_lookups_on_a_small_artifact():
+    records = [
+        {"city": "Paris", "country": "France", "iata": "CDG", "name": "Charles de Gaulle", "lat": 49.0, "lon": 2.5},
+        {"city": "Paris", "country": "France", "iata": "ORY", "name": "Orly", "lat": 48.7, "lon": 2.4},
+        {"city": "Parma", "country": "Italy", "iata": "PMF", "name": "Parma", "lat": None, "lon": None},
+    ]
+    dataset = IataDataset(build_artifact(records, [{"city": "Versailles", "lat": 48.8, "lon": 2.1}]))
+    index = dataset.find_city("paris")
+    assert dataset.value("iata", dataset.city_first_row(index, index + 1)) == "CDG"
+    assert dataset.find_city("lyon") == -1
+    assert dataset.coordinates(2) is None
+    assert dataset.find_place("versailles") == (48.79999923706055, 2.0999999046325684)
+    assert list(dataset.gram_postings("orl")) == [1]
+
+
+def test_open_dataset_rebuilds_an_artifact_built_from_other_json(tmp_path):
+    records = [{"city": "Paris", "country": "France", "iata": "CDG", "name": "Charles de Gaulle", "lat": 49.0, "lon": 2.5}]
+    json_path, places_path, bin_path = tmp_path / "codes.json", tmp_path / "places.json", tmp_path / "codes.bin"
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    write_artifact(records, bin_path, source=source_digest(json_path, places_path))
+    assert open_dataset(bin_path, json_path, places_path).rows == 1
+
+    records.append({"city": "Lyon", "country": "France", "iata": "LYS", "name": "Saint-Exupery", "lat": None, "lon": None})
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    dataset = open_dataset(bin_path, json_path, places_path)
+    assert dataset.rows == 2
+    assert dataset.source == source_digest(json_path, places_path)
+    # The rebuilt artifact was written back, so the next process maps it as is
+    assert IataDataset(bin_path.read_bytes()).rows == 2
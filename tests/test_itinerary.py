@@ -0,0 +1,45 @@
+import pytest
+
+from planner import itinerary, llm_cache
+from planner.cache import get_cache
+from planner.fakes import FakeLLMClient
+
+
+class RecordingLLM(FakeLLMClient):
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+        generate = self.models.generate_content
+
+        def record(model=None, contents=None, config=None):
+            self.prompts.append(contents)
+            return generate(model=model, contents=contents, config=config)
+        self.models.generate_content = record
+
+
+@pytest.fixture
+def itinerary_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "_cache", get_cache("test_itinerary", ttl=60))
+
+
+def plan(client, budget, interests):
+    return itinerary.generate_itinerary("Tokyo", 3, budget, interests, "DEL", "NRT", [], [], client=client)
+
+
+def test_bucket_budget():
+    assert llm_cache.bucket_budget("₹ 76,000") == llm_cache.bucket_budget("₹  80,000") == "₹ 77,000"
+    assert llm_cache.canonical_interests("Nightlife, culture and  Culture") == "culture, nightlife"
+
+
+def test_model_sees_the_budget_and_interests_as_written(itinerary_cache):
+    client = RecordingLLM()
+    plan(client, "$ 100.50", "rock and roll")
+    assert "$ 100.50" in client.prompts[0] and "rock and roll" in client.prompts[0]
+
+
+def test_near_identical_requests_share_a_cache_entry(itinerary_cache):
+    client = RecordingLLM()
+    first = plan(client, "₹ 80,000", "food, culture")
+    assert plan(client, "₹ 79,000", "Culture and food") == first
+    assert len(client.prompts) == 1
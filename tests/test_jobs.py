@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from planner.jobs import DONE, QUEUED, RUNNING, JobQueue, webhook_allowed
+
+
+@pytest.fixture
+def workers(tmp_path):
+    # Two worker processes' queues on one host, sharing the job store file
+    path = str(tmp_path / "jobs.sqlite3")
+    return JobQueue(workers=1, store_path=path), JobQueue(workers=1, store_path=path)
+
+
+def test_any_worker_answers_a_status_poll(workers):
+    first, second = workers
+    job, created = first.submit("trip", lambda: {"plan": 1})
+    assert created
+    job.finished.wait(5)
+    assert second.get(job.id)["status"] == DONE
+    assert second.get(job.id)["result"] == {"plan": 1}
+    assert second.get("unknown") is None
+
+
+def test_identical_requests_in_another_worker_join_the_running_job(workers):
+    first, second = workers
+    release = threading.Event()
+    job, _ = first.submit("trip", release.wait, 5)
+    joined, created = second.submit("trip", lambda: "never run")
+    assert not created and joined.id == job.id and joined.status in (QUEUED, RUNNING)
+    release.set()
+    job.finished.wait(5)
+    other, created = second.submit("trip", lambda: "again")
+    assert created and other.id != job.id
+
+
+def test_webhook_hosts():
+    assert not webhook_allowed("http://169.254.169.254/latest")
+    assert not webhook_allowed("file:///etc/passwd")
+
+
+def test_every_subscriber_gets_the_webhook(workers, monkeypatch):
+    first, second = workers
+    sent = []
+    monkeypatch.setattr("planner.jobs.requests.post", lambda url, json, timeout: sent.append((url, json["status"])))
+    release = threading.Event()
+    job, _ = first.submit("trip", release.wait, 5, webhook="https://a.example/hook")
+    first.submit("trip", lambda: None, webhook="https://b.example/hook")
+    second.submit("trip", lambda: None, webhook="https://c.example/hook")
+    second.submit("trip", lambda: None, webhook="https://c.example/hook")
+    release.set()
+    job.finished.wait(5)
+    deadline = time.monotonic() + 5
+    while len(sent) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(sent) == [("https://a.example/hook", DONE), ("https://b.example/hook", DONE),
+                            ("https://c.example/hook", DONE)]
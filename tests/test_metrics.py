@@ -0,0 +1,28 @@
+import os
+
+from planner import metrics
+from planner.orchestrator import Call, fan_out
+
+
+@metrics.timed("test.pool_stage")
+def _lookup(value):
+    return value
+
+
+def test_stages_run_on_pool_threads_reach_server_timing():
+    metrics.start_request()
+    results, missed = fan_out({"a": Call(_lookup, 1), "b": Call(_lookup, 2)}, deadline=5)
+    header = metrics.finish_request()
+    assert results == {"a": 1, "b": 2} and not missed
+    assert "test-pool_stage;dur=" in header
+    # Nothing is collected outside a request
+    _lookup(3)
+    assert metrics.finish_request() == ""
+
+
+def test_prometheus_series_are_labelled_with_the_worker_pid():
+    metrics.observe("test.pid_stage", 0.01)
+    body = metrics.render_prometheus({"planner_cache_hits_total": {"flights": 1}})
+    pid = f'pid="{os.getpid()}"'
+    assert f'planner_stage_seconds_count{{{pid},stage="test.pid_stage"}} ' in body
+    assert f'planner_cache_hits_total{{{pid},cache="flights"}} 1' in body
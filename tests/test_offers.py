@@ -0,0 +1,23 @@
+import json
+import os
+
+from planner.offers import FlightOffer, parse_offers, top_offers
+
+
+def load_raw(fixtures_dir):
+    with open(os.path.join(fixtures_dir, "flight_offers.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_top_offers_by_price_matches_sorting_the_raw_payload(fixtures_dir):
+    raw = load_raw(fixtures_dir)
+    expected = [offer["id"] for offer in sorted(raw, key=lambda f: float(f["price"]["grandTotal"]))[:3]]
+    assert [offer.id for offer in top_offers(parse_offers(raw), 3, by="price")] == expected
+
+
+def test_dict_round_trip_is_smaller_than_the_raw_payload(fixtures_dir):
+    raw = load_raw(fixtures_dir)
+    offers = parse_offers(raw)
+    compact = [offer.to_dict() for offer in offers]
+    assert [FlightOffer.from_dict(data).to_dict() for data in compact] == compact
+    assert len(json.dumps(compact)) < len(json.dumps(raw))
@@ -0,0 +1,31 @@
+import time
+
+from planner.orchestrator import gather_trip_data
+
+
+def fake_flights(origin, destination, departure_date, adults=1, max_results=3, delay=0.3):
+    time.sleep(delay)
+    return [{"id": "1", "price": 100.0, "price_text": "100.00", "currency": "EUR", "duration_minutes": 120,
+             "stops": 0, "route": [origin, destination], "carriers": ["AI"]}]
+
+
+def fake_hotels(city_code, delay=0.5):
+    time.sleep(delay)
+    return [{"name": f"Hotel {city_code}", "address": {"lines": ["Main St"]}}]
+
+
+def test_lookups_run_concurrently():
+    start = time.perf_counter()
+    flights, hotels = gather_trip_data("DEL", "NRT", "2026-11-01", flight_search=fake_flights, hotel_search=fake_hotels)
+    elapsed = time.perf_counter() - start
+    assert flights and hotels
+    # The slowest call, not the sum of both
+    assert elapsed < 0.5 + 0.25
+
+
+def test_deadline_drops_a_stuck_lookup():
+    start = time.perf_counter()
+    flights, hotels = gather_trip_data("DEL", "NRT", "2026-11-01", flight_search=fake_flights,
+                                       hotel_search=lambda city_code: fake_hotels(city_code, delay=3.0), deadline=0.6)
+    assert flights and hotels == []
+    assert time.perf_counter() - start < 0.6 + 0.25
@@ -0,0 +1,18 @@
+import json
+import os
+
+from config.settings import PROMPT_TOKEN_BUDGET
+from planner.offers import parse_offers
+from planner.prompts import build_itinerary_prompt, estimate_tokens
+
+
+def test_prompt_stays_within_the_token_budget_for_large_results(fixtures_dir):
+    with open(os.path.join(fixtures_dir, "flight_offers.json"), "r", encoding="utf-8") as f:
+        offers = parse_offers(json.load(f))
+    with open(os.path.join(fixtures_dir, "hotels.json"), "r", encoding="utf-8") as f:
+        hotels = json.load(f)
+    flights = [offers[i % len(offers)] for i in range(50)]
+    hotels = [hotels[i % len(hotels)] for i in range(50)]
+    prompt = build_itinerary_prompt("Tokyo", 5, "₹ 80,000", "culture, food", "DEL", "NRT", flights, hotels)
+    assert estimate_tokens(prompt) <= PROMPT_TOKEN_BUDGET
+    assert "Tokyo" in prompt and "₹ 80,000" in prompt
@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from planner import metrics
+from planner.cache import MISSING
+from planner.resilience import CircuitBreaker, CircuitOpen, Upstream, backoff_delays
+
+
+class TransientError(Exception):
+    pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def flaky(failures, result="ok"):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise TransientError("503")
+        return result
+    return fn, calls
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    clock.now = 10
+    assert breaker.allow() and not breaker.allow()  # a single half-open probe
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_backoff_is_capped():
+    assert all(0 <= delay <= 0.4 for delay in backoff_delays(6, base=0.1, cap=0.4))
+
+
+def test_call_retries_transient_errors():
+    upstream = Upstream("test_retry", deadline=5, retries=2, retryable=lambda e: isinstance(e, TransientError))
+    fn, calls = flaky(2)
+    assert upstream.call(fn) == "ok" and len(calls) == 3
+
+
+def test_call_does_not_retry_the_callers_errors():
+    upstream = Upstream("test_client_error", deadline=5, retries=2, retryable=lambda e: isinstance(e, TransientError))
+
+    def bad_request():
+        raise ValueError("400")
+    with pytest.raises(ValueError):
+        upstream.call(bad_request)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_refuses_calls():
+    upstream = Upstream("test_open", deadline=5, retries=0, retryable=lambda e: True,
+                        breaker=CircuitBreaker(failures=1, reset_timeout=60))
+    fn, calls = flaky(5)
+    with pytest.raises(TransientError):
+        upstream.call(fn)
+    with pytest.raises(CircuitOpen):
+        upstream.call(fn)
+    assert len(calls) == 1
+
+
+def test_serve_falls_back_to_the_last_good_result_on_a_hang():
+    upstream = Upstream("test_hang", deadline=0.2, retries=0, retryable=lambda e: True)
+    assert upstream.serve("k", lambda: "fresh") == "fresh"
+    start = time.perf_counter()
+    assert upstream.serve("k", lambda: time.sleep(1) or "late") == "fresh"
+    assert time.perf_counter() - start < 0.5
+    assert upstream.serve("other", lambda: time.sleep(1), default=[]) == []
+    with pytest.raises(TransientError):
+        upstream.serve("other", flaky(1)[0], default=MISSING)
+
+
+def test_a_slow_upstream_does_not_starve_another():
+    slow = Upstream("test_slow_llm", deadline=5, retries=0, retryable=lambda e: True, workers=2)
+    fast = Upstream("test_fast_search", deadline=0.3, retries=0, retryable=lambda e: True, workers=2)
+    pool = ThreadPoolExecutor(max_workers=8)
+    busy = [pool.submit(slow.serve, f"k{i}", time.sleep, 0.5) for i in range(8)]
+    time.sleep(0.05)
+    assert fast.serve("route", lambda: "fresh") == "fresh"
+    assert fast.breaker.state == CircuitBreaker.CLOSED
+    for future in busy:
+        future.result()
+    pool.shutdown()
+
+
+def test_a_fetch_that_never_started_is_not_a_breaker_failure():
+    upstream = Upstream("test_queued", deadline=0.2, retries=0, retryable=lambda e: True,
+                        breaker=CircuitBreaker(failures=2, reset_timeout=60), workers=1)
+    pool = ThreadPoolExecutor(max_workers=1)
+    hung = pool.submit(upstream.serve, "a", time.sleep, 0.6)
+    time.sleep(0.05)
+    # The only worker is taken: the second fetch is refused as busy, and the service is not blamed
+    assert upstream.serve("b", lambda: "never", default="busy") == "busy"
+    counts = metrics.snapshot()
+    assert counts["busy"]["test_queued"] == 1 and "test_queued" not in counts["rejected"]
+    hung.result()
+    # One failure (the hang itself) is below the threshold of two
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+    pool.shutdown()